@@ -20,12 +20,22 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 # for 'autogenerate' support
-from app.database.db import Base
+from app.database.db import Base, sync_url
 from app.models.client import Client
-from app.models.service import Service
-from app.models.service_level import ServiceLevel
+from app.models.urgency_level import UrgencyLevel
+from app.models.service_type import ServiceType
+from app.models.waste_type import WasteType
+from app.models.access_difficulty import AccessDifficulty
 from app.models.job import Job
+from app.models.job_draft import JobDraft
+from app.models.job_media import JobMedia
 from app.models.invoice import Invoice
+from app.models.payment import Payment
+from app.models.crew_rating import CrewRating
+from app.models.outbox_event import OutboxEvent
+from app.models.rate_card import RateCard
+from app.models.rate_limit_bucket import RateLimitBucket
+from app.models.idempotency_key import IdempotencyKey
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -46,7 +56,7 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    url = os.getenv("DATABASE_URL") or config.get_main_option("sqlalchemy.url")
+    url = sync_url or config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -66,7 +76,7 @@ def run_migrations_online() -> None:
 
     """
     configuration = config.get_section(config.config_ini_section, {})
-    configuration["sqlalchemy.url"] = os.getenv("DATABASE_URL") or configuration.get("sqlalchemy.url")
+    configuration["sqlalchemy.url"] = sync_url or configuration.get("sqlalchemy.url")
     
     connectable = engine_from_config(
         configuration,
@@ -0,0 +1,53 @@
+"""add hot query indexes
+
+Revision ID: 3f9a1c2b7d10
+Revises: 
+Create Date: 2026-10-19 09:12:41.503112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2b7d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial predicate)
+INDEXES = [
+    ("ix_jobs_client_created", "jobs", ["client_id", "created_at", "id"], None),
+    ("ix_jobs_client_status_created", "jobs", ["client_id", "status", "created_at"], None),
+    ("ix_jobs_client_status_updated", "jobs", ["client_id", "status", "updated_at"], None),
+    ("ix_jobs_assigned_crew_id", "jobs", ["assigned_crew_id"], "assigned_crew_id IS NOT NULL"),
+    ("ix_jobs_drafts_created", "jobs", ["created_at"], "client_id IS NULL AND status = 'pending'"),
+    ("ix_payments_job_type_status", "payments", ["job_id", "payment_type", "payment_status"], None),
+    ("ix_payments_transaction_id", "payments", ["transaction_id"], "transaction_id IS NOT NULL"),
+    ("ix_payments_client_created", "payments", ["client_id", "created_at", "id"], None),
+    ("ix_invoices_job_id", "invoices", ["job_id"], None),
+    ("ix_invoices_client_generated", "invoices", ["client_id", "generated_at", "id"], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, and keeps the live tables writable while building
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,48 @@
+"""add crew ratings aggregate
+
+Revision ID: 8c4e2d9f1a37
+Revises: 3f9a1c2b7d10
+Create Date: 2026-10-19 10:03:18.221904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2d9f1a37'
+down_revision: Union[str, None] = '3f9a1c2b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'crew_ratings',
+        sa.Column('crew_id', sa.String(), nullable=False),
+        sa.Column('rating_sum', sa.Float(), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('crew_id'),
+        if_not_exists=True,
+    )
+    # jobs.rating stays the source of truth; recompute rather than trust any rows written before this ran
+    op.execute(
+        """
+        INSERT INTO crew_ratings (crew_id, rating_sum, rating_count, updated_at)
+        SELECT assigned_crew_id, SUM(rating), COUNT(rating), now()
+        FROM jobs
+        WHERE assigned_crew_id IS NOT NULL AND rating IS NOT NULL
+        GROUP BY assigned_crew_id
+        ON CONFLICT (crew_id) DO UPDATE
+        SET rating_sum = EXCLUDED.rating_sum,
+            rating_count = EXCLUDED.rating_count,
+            updated_at = EXCLUDED.updated_at
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('crew_ratings', if_exists=True)
@@ -0,0 +1,65 @@
+"""make invoices.job_id unique
+
+Revision ID: a1d7e9c3f5b8
+Revises: e8a4c6b2d0f7
+Create Date: 2026-10-20 10:14:36.208415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d7e9c3f5b8'
+down_revision: Union[str, None] = 'e8a4c6b2d0f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def index_is_valid(connection, name: str):
+    """True or False once the index exists, None if it doesn't"""
+    return connection.execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+
+
+def upgrade() -> None:
+    # Invoices are financial records: duplicates left by concurrent invoice.generate
+    # deliveries are resolved by hand, never deleted here
+    connection = op.get_bind()
+    duplicated = connection.execute(
+        sa.text("SELECT job_id FROM invoices GROUP BY job_id HAVING count(*) > 1 ORDER BY job_id")
+    ).scalars().all()
+    if duplicated:
+        raise RuntimeError(
+            f"{len(duplicated)} jobs have more than one invoice; keep one per job and rerun: {', '.join(duplicated)}"
+        )
+
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        # A concurrent build that failed (a duplicate inserted meanwhile) leaves the index
+        # INVALID, and IF NOT EXISTS would then keep it as it is
+        if index_is_valid(connection, 'uq_invoices_job_id') is False:
+            op.drop_index('uq_invoices_job_id', table_name='invoices', postgresql_concurrently=True)
+        op.create_index(
+            'uq_invoices_job_id',
+            'invoices',
+            ['job_id'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        if not index_is_valid(connection, 'uq_invoices_job_id'):
+            raise RuntimeError("uq_invoices_job_id was not built; check invoices for duplicate job_ids and rerun")
+        # The unique index serves the by-job lookups
+        op.drop_index('ix_invoices_job_id', table_name='invoices', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_invoices_job_id', 'invoices', ['job_id'], postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('uq_invoices_job_id', table_name='invoices', postgresql_concurrently=True, if_exists=True)
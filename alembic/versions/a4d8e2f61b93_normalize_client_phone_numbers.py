@@ -0,0 +1,69 @@
+"""normalize client phone numbers to E.164 and index them
+
+Revision ID: a4d8e2f61b93
+Revises: f3c7a2d9b8e1
+Create Date: 2026-10-19 16:11:05.274931
+
+"""
+import os
+import re
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8e2f61b93'
+down_revision: Union[str, None] = 'f3c7a2d9b8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# app.core.phone.normalize_phone as of this revision, frozen so later changes to it don't rewrite history
+DEFAULT_PHONE_COUNTRY_CODE = os.getenv("DEFAULT_PHONE_COUNTRY_CODE", "44")
+SEPARATORS = re.compile(r"[\s().\-/]")
+E164 = re.compile(r"^\+[1-9]\d{7,14}$")
+
+
+def normalize_phone(value: Optional[str], country_code: str = DEFAULT_PHONE_COUNTRY_CODE) -> Optional[str]:
+    if not value:
+        return None
+    number = SEPARATORS.sub("", value)
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    elif number.startswith("0"):
+        number = f"+{country_code}{number[1:]}"
+    elif not number.startswith("+"):
+        number = "+" + number
+    if number.startswith(f"+{country_code}0"):
+        number = f"+{country_code}{number[len(country_code) + 2:]}"
+    return number if E164.match(number) else None
+
+
+def upgrade() -> None:
+    # Lookups now match E.164 exactly; rewrite what was stored as typed.
+    # Values that don't parse are left alone.
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, phone_number FROM clients WHERE phone_number IS NOT NULL")).fetchall()
+    updates = [
+        {"id": row.id, "phone_number": normalized}
+        for row in rows
+        if (normalized := normalize_phone(row.phone_number)) and normalized != row.phone_number
+    ]
+    if updates:
+        connection.execute(sa.text("UPDATE clients SET phone_number = :phone_number WHERE id = :id"), updates)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_clients_phone_number',
+            'clients',
+            ['phone_number'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_clients_phone_number', table_name='clients', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,94 @@
+"""add job event notify triggers
+
+Revision ID: b71d3e5a9c42
+Revises: 8c4e2d9f1a37
+Create Date: 2026-10-19 11:26:05.874213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d3e5a9c42'
+down_revision: Union[str, None] = '8c4e2d9f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_job_event() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('job_events', json_build_object(
+                'type', 'job',
+                'job_id', NEW.id,
+                'status', NEW.status,
+                'assigned_crew_id', NEW.assigned_crew_id,
+                'crew_changed', NEW.assigned_crew_id IS DISTINCT FROM OLD.assigned_crew_id
+            )::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS jobs_notify_job_event ON jobs")
+    op.execute(
+        """
+        CREATE TRIGGER jobs_notify_job_event
+        AFTER UPDATE OF status, assigned_crew_id ON jobs
+        FOR EACH ROW
+        WHEN (NEW.status IS DISTINCT FROM OLD.status OR NEW.assigned_crew_id IS DISTINCT FROM OLD.assigned_crew_id)
+        EXECUTE FUNCTION notify_job_event()
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_job_photo_event() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('job_events', json_build_object(
+                'type', 'photo',
+                'job_id', NEW.job_id,
+                'photo_type', NEW.type,
+                'photo_url', NEW.photo_url
+            )::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # job_photos is owned by the crew backend and may not exist yet on a fresh database
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF to_regclass('job_photos') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS job_photos_notify_job_event ON job_photos;
+                CREATE TRIGGER job_photos_notify_job_event
+                AFTER INSERT ON job_photos
+                FOR EACH ROW EXECUTE FUNCTION notify_job_photo_event();
+            END IF;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF to_regclass('job_photos') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS job_photos_notify_job_event ON job_photos;
+            END IF;
+        END
+        $$
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS jobs_notify_job_event ON jobs")
+    op.execute("DROP FUNCTION IF EXISTS notify_job_photo_event()")
+    op.execute("DROP FUNCTION IF EXISTS notify_job_event()")
@@ -0,0 +1,41 @@
+"""add idempotency keys
+
+Revision ID: b7e3d1f9a4c2
+Revises: d5f2c8a1e7b6
+Create Date: 2026-10-19 19:12:44.305187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d1f9a4c2'
+down_revision: Union[str, None] = 'd5f2c8a1e7b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('response_status', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('scope', 'key'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_idempotency_keys_expires', 'idempotency_keys', ['expires_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_keys_expires', table_name='idempotency_keys', if_exists=True)
+    op.drop_table('idempotency_keys', if_exists=True)
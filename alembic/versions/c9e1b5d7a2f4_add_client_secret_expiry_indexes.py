@@ -0,0 +1,45 @@
+"""add partial indexes on client OTP and reset token expiry
+
+Revision ID: c9e1b5d7a2f4
+Revises: a4d8e2f61b93
+Create Date: 2026-10-19 17:24:52.613088
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1b5d7a2f4'
+down_revision: Union[str, None] = 'a4d8e2f61b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, column) - each partial on the column being set
+INDEXES = [
+    ("ix_clients_otp_expiry", "otp_expiry"),
+    ("ix_clients_reset_otp_expiry", "reset_otp_expiry"),
+    ("ix_clients_reset_token_expiry", "reset_token_expiry"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, column in INDEXES:
+            op.create_index(
+                name,
+                'clients',
+                [column],
+                postgresql_where=sa.text(f"{column} IS NOT NULL"),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, column in reversed(INDEXES):
+            op.drop_index(name, table_name='clients', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,68 @@
+"""move anonymous drafts out of jobs into job_drafts
+
+Revision ID: d5f2c8a1e7b6
+Revises: c9e1b5d7a2f4
+Create Date: 2026-10-19 18:05:39.117402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f2c8a1e7b6'
+down_revision: Union[str, None] = 'c9e1b5d7a2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DRAFT_FIELDS = (
+    "property_address", "preferred_date", "preferred_time", "service_type", "urgency_level",
+    "property_size", "van_loads", "waste_types", "furniture_items", "property_photos",
+)
+DRAFTS = "client_id IS NULL AND status = 'pending'"
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_drafts',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_job_drafts_created', 'job_drafts', ['created_at', 'id'], if_not_exists=True)
+
+    fields = ", ".join(f"'{name}', {name}" for name in DRAFT_FIELDS)
+    op.execute(
+        f"INSERT INTO job_drafts (id, data, created_at) "
+        f"SELECT id, json_build_object({fields})::text, COALESCE(created_at, now()) FROM jobs WHERE {DRAFTS} "
+        f"ON CONFLICT (id) DO NOTHING"
+    )
+    op.execute(f"DELETE FROM jobs WHERE {DRAFTS}")
+    op.drop_index('ix_jobs_drafts_created', table_name='jobs', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_jobs_drafts_created',
+        'jobs',
+        ['created_at'],
+        postgresql_where=sa.text(DRAFTS),
+        if_not_exists=True,
+    )
+    columns = ", ".join(DRAFT_FIELDS)
+    values = ", ".join(
+        f"(data::json ->> '{name}')::int" if name in ("van_loads", "furniture_items") else f"data::json ->> '{name}'"
+        for name in DRAFT_FIELDS
+    )
+    op.execute(
+        f"INSERT INTO jobs (id, {columns}, status, created_at, updated_at) "
+        f"SELECT id, {values}, 'pending', created_at, created_at FROM job_drafts "
+        f"ON CONFLICT (id) DO NOTHING"
+    )
+    op.drop_index('ix_job_drafts_created', table_name='job_drafts', if_exists=True)
+    op.drop_table('job_drafts', if_exists=True)
@@ -0,0 +1,117 @@
+"""add rate cards
+
+Revision ID: e6b1f0a9c3d8
+Revises: d2a8f4c61e05
+Create Date: 2026-10-19 13:20:41.538207
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b1f0a9c3d8'
+down_revision: Union[str, None] = 'd2a8f4c61e05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Version 1 is the rules file that shipped with the code at this revision
+INITIAL_RULES = {
+    "base_price": 250.0,
+    "minimum_price": 350.0,
+    "property_size": {
+        "studio": 100, "1bed": 100, "1": 100,
+        "2bed": 200, "2": 200,
+        "3bed": 350, "3": 350,
+        "4bed": 500, "4+bed": 500, "4": 500, "5": 500
+    },
+    "van_loads": [
+        {"min_loads": 1, "price": 150},
+        {"min_loads": 2, "price": 300},
+        {"min_loads": 3, "price": 450},
+        {"min_loads": 4, "price": 600}
+    ],
+    "waste_type": {
+        "general": 0, "garden": 100, "gardenwaste": 100,
+        "construction": 200, "hazardous": 300, "hoarder": 300
+    },
+    "waste_type_per_item": {"furniture": 50},
+    "access_difficulty": {"stairs": 100, "parking": 100, "long_carry": 100},
+    "urgency": {"standard": 0, "48h": 0, "24h": 150, "same_day": 300},
+    "compliance_addons": {
+        "photo": 50, "photo_report": 50,
+        "council_pack": 100, "council_compliance_pack": 100,
+        "bio_clean": 250, "deep_sanitation": 250
+    },
+    "sla_base_prices": {
+        "24h": 2500.0, "48h": 1800.0, "5-7d": 1200.0,
+        "24 hour – emergency": 2500.0,
+        "48 hour – standard": 1800.0,
+        "5–7 days – scheduled": 1200.0
+    },
+    "vehicle_surcharges": {
+        "small_van": 0.0, "small van": 0.0, "small van (included)": 0.0,
+        "large_van": 200.0, "large van": 200.0, "large van (+£200)": 200.0,
+        "luton_van": 350.0, "luton van": 350.0, "luton van (+£350)": 350.0,
+        "7.5_tonne_truck": 500.0, "7.5 tonne truck": 500.0, "7.5 tonne truck (+£500)": 500.0
+    }
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_cards',
+        sa.Column('version', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('rules', sa.Text(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('note', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('activated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('version'),
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ux_rate_cards_active',
+        'rate_cards',
+        ['is_active'],
+        unique=True,
+        postgresql_where=sa.text('is_active'),
+        if_not_exists=True,
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO rate_cards (rules, is_active, note, created_at, activated_at) "
+            "SELECT :rules, true, 'Initial rates', now() at time zone 'utc', now() at time zone 'utc' "
+            "WHERE NOT EXISTS (SELECT 1 FROM rate_cards)"
+        ).bindparams(rules=json.dumps(INITIAL_RULES, ensure_ascii=False))
+    )
+
+    # Workers LISTEN on rate_cards and swap their in-memory snapshot on change
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_rate_card_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('rate_cards', json_build_object('version', NEW.version, 'is_active', NEW.is_active)::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS rate_cards_notify_change ON rate_cards")
+    op.execute(
+        """
+        CREATE TRIGGER rate_cards_notify_change
+        AFTER INSERT OR UPDATE ON rate_cards
+        FOR EACH ROW EXECUTE FUNCTION notify_rate_card_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS rate_cards_notify_change ON rate_cards")
+    op.execute("DROP FUNCTION IF EXISTS notify_rate_card_change()")
+    op.drop_index('ux_rate_cards_active', table_name='rate_cards', if_exists=True)
+    op.drop_table('rate_cards', if_exists=True)
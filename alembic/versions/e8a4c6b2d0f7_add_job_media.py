@@ -0,0 +1,122 @@
+"""add job_media, filled from jobs.property_photos and job_photos
+
+Revision ID: e8a4c6b2d0f7
+Revises: b7e3d1f9a4c2
+Create Date: 2026-10-19 19:48:21.663014
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a4c6b2d0f7'
+down_revision: Union[str, None] = 'b7e3d1f9a4c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Ids of copied rows are derived from their source, so copying twice is a no-op
+JOB_PHOTO_ID = "md5('job_photos:' || {row}.id::text)::uuid::text"
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_media',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('job_id', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('size_bytes', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('thumbnail_url', sa.Text(), nullable=True),
+        sa.Column('position', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_job_media_job_kind_position', 'job_media', ['job_id', 'kind', 'position', 'created_at'], if_not_exists=True
+    )
+
+    # Client property photos: comma-joined (POST /api/jobs) or a JSON array (confirmed drafts)
+    op.execute(
+        """
+        INSERT INTO job_media (id, job_id, kind, url, position, created_at)
+        SELECT md5('jobs:' || j.id || ':' || p.n)::uuid::text, j.id, 'property', btrim(p.url), p.n - 1, j.created_at
+        FROM jobs j
+        CROSS JOIN LATERAL unnest(
+            CASE WHEN left(btrim(j.property_photos), 1) = '['
+                 THEN ARRAY(SELECT json_array_elements_text(j.property_photos::json))
+                 ELSE string_to_array(j.property_photos, ',')
+            END
+        ) WITH ORDINALITY AS p(url, n)
+        WHERE btrim(COALESCE(j.property_photos, '')) <> '' AND btrim(p.url) <> ''
+        ON CONFLICT (id) DO NOTHING
+        """
+    )
+
+    # Crew before/after photos stay in job_photos, which the crew backend writes; mirror them
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION mirror_job_photo() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM job_media WHERE id = {JOB_PHOTO_ID.format(row="OLD")};
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.type IN ('before', 'after') THEN
+                INSERT INTO job_media (id, job_id, kind, url, position, created_at)
+                VALUES ({JOB_PHOTO_ID.format(row="NEW")}, NEW.job_id, NEW.type, NEW.photo_url, 0,
+                        COALESCE(NEW.timestamp, now() AT TIME ZONE 'utc'))
+                ON CONFLICT (id) DO NOTHING;
+                INSERT INTO outbox_events (id, event_type, payload, status, attempts, available_at, created_at)
+                VALUES (gen_random_uuid()::text, 'media.thumbnail',
+                        json_build_object('media_ids', json_build_array({JOB_PHOTO_ID.format(row="NEW")}))::text,
+                        'pending', 0, now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc');
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # job_photos is owned by the crew backend and may not exist yet on a fresh database
+    op.execute(
+        f"""
+        DO $$
+        BEGIN
+            IF to_regclass('job_photos') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS job_photos_mirror_media ON job_photos;
+                CREATE TRIGGER job_photos_mirror_media
+                AFTER INSERT OR UPDATE OR DELETE ON job_photos
+                FOR EACH ROW EXECUTE FUNCTION mirror_job_photo();
+
+                INSERT INTO job_media (id, job_id, kind, url, position, created_at)
+                SELECT {JOB_PHOTO_ID.format(row="p")}, p.job_id, p.type, p.photo_url, 0, p.timestamp
+                FROM job_photos p WHERE p.type IN ('before', 'after')
+                ON CONFLICT (id) DO NOTHING;
+            END IF;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF to_regclass('job_photos') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS job_photos_mirror_media ON job_photos;
+            END IF;
+        END
+        $$
+        """
+    )
+    op.execute("DROP FUNCTION IF EXISTS mirror_job_photo()")
+    op.drop_index('ix_job_media_job_kind_position', table_name='job_media', if_exists=True)
+    op.drop_table('job_media', if_exists=True)
@@ -0,0 +1,33 @@
+"""add rate limit buckets
+
+Revision ID: f3c7a2d9b8e1
+Revises: e6b1f0a9c3d8
+Create Date: 2026-10-19 15:02:17.840213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a2d9b8e1'
+down_revision: Union[str, None] = 'e6b1f0a9c3d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_buckets', if_exists=True)
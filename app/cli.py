@@ -0,0 +1,82 @@
+"""
+One-off maintenance commands, kept out of worker startup.
+
+  python -m app.cli migrate   create missing legacy tables, then `alembic upgrade head`
+  python -m app.cli seed      fill empty lookup tables
+  python -m app.cli setup     migrate + seed (the Procfile release command)
+  python -m app.cli maintenance   purge expired drafts and OTPs once (see app/core/maintenance.py)
+  python -m app.cli thumbnails    queue thumbnails for job photos that have none (see app/core/media.py)
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from app.core.logging_config import setup_logging, shutdown_logging
+
+logger = logging.getLogger("app.cli")
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+
+def migrate():
+    from alembic import command
+    from alembic.config import Config
+    import app.models  # noqa: F401 - registers every table on Base.metadata
+    import app.models.payment  # noqa: F401
+    from app.database.db import init_db
+
+    # Only the tables that predate the migrations; Alembic creates everything since
+    init_db()
+    # No ini file: alembic.ini's logging section would replace our handlers
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    command.upgrade(config, "head")
+    logger.info("Database migrated to head")
+
+def seed():
+    from app.database.db import SessionLocal
+    from app.database.seed import seed_reference_data
+
+    db = SessionLocal()
+    try:
+        seed_reference_data(db)
+    finally:
+        db.close()
+
+def setup():
+    migrate()
+    seed()
+
+def maintenance():
+    from app.core.maintenance import worker
+
+    counts = worker.run_once()
+    logger.info("Maintenance finished: %s", counts)
+
+def thumbnails():
+    from app.core.media import queue_missing_thumbnails
+
+    logger.info("Queued thumbnails for %d job photos", queue_missing_thumbnails())
+
+COMMANDS = {
+    "migrate": migrate, "seed": seed, "setup": setup, "maintenance": maintenance, "thumbnails": thumbnails,
+}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=COMMANDS)
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    try:
+        COMMANDS[args.command]()
+    except Exception:
+        logger.exception("%s failed", args.command)
+        return 1
+    finally:
+        shutdown_logging()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
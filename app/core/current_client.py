@@ -0,0 +1,165 @@
+"""
+`get_current_client` - the authenticated client, resolved once per request.
+
+Resolved clients are kept for CLIENT_CACHE_TTL seconds per token subject, so
+most requests skip the lookup query entirely. A hit is attached to the
+request's session with `merge(load=False)` (no SELECT), so handlers can read
+and update it as if they had queried it.
+
+The cache is per worker. Updates through the ORM in this worker evict the
+entry when they are flushed and again when they commit, and a lookup that
+raced the write doesn't put its row back (see ClientCache). Changes made by
+other workers or by raw SQL are picked up when the entry expires, which
+bounds staleness to the TTL.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from fastapi import Depends, HTTPException
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from app.core.security import get_current_user
+from app.database.db import get_db
+from app.models.client import Client
+
+CLIENT_CACHE_TTL = float(os.getenv("CLIENT_CACHE_TTL", "30"))
+CLIENT_CACHE_SIZE = int(os.getenv("CLIENT_CACHE_SIZE", "10000"))
+
+class ClientCache:
+    """
+    LRU of subject -> (expires_at, column values), with the subjects of each
+    client id alongside so invalidate() only touches that client's entries.
+
+    Every invalidate() bumps a generation. A lookup takes generation() before
+    it queries and hands it to put(), which drops the values if their client
+    was invalidated since: the row it read may predate the write.
+    """
+
+    def __init__(self, ttl: float = CLIENT_CACHE_TTL, max_size: int = CLIENT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._subjects: Dict[str, Set[str]] = {}  # client id -> subjects cached for it
+        self._generation = 0
+        # client id -> generation of its last invalidation, for the most recent
+        # max_size clients; anything older is covered by _floor
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, subject: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(subject)
+                return None
+            self._entries.move_to_end(subject)
+            return entry[1]
+
+    def put(self, subject: str, values: dict, generation: int):
+        if self.ttl <= 0:
+            return
+        client_id = str(values["id"])
+        with self._lock:
+            if max(self._floor, self._invalidated.get(client_id, 0)) > generation:
+                return
+            self._drop(subject)
+            self._entries[subject] = (time.monotonic() + self.ttl, values)
+            self._subjects.setdefault(client_id, set()).add(subject)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, client_id) -> None:
+        client_id = str(client_id)
+        with self._lock:
+            self._generation += 1
+            self._invalidated[client_id] = self._generation
+            self._invalidated.move_to_end(client_id)
+            while len(self._invalidated) > self.max_size:
+                self._floor = max(self._floor, self._invalidated.popitem(last=False)[1])
+            # Subjects are client ids; legacy tokens carried the email instead
+            for subject in list(self._subjects.get(client_id, ())):
+                self._drop(subject)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._subjects.clear()
+
+    def _drop(self, subject: str):
+        """Remove an entry and its index link. Caller holds the lock."""
+        entry = self._entries.pop(subject, None)
+        if entry is None:
+            return
+        client_id = str(entry[1]["id"])
+        subjects = self._subjects.get(client_id)
+        if subjects is not None:
+            subjects.discard(subject)
+            if not subjects:
+                del self._subjects[client_id]
+
+cache = ClientCache()
+
+def _snapshot(client: Client) -> dict:
+    return {attr.key: getattr(client, attr.key) for attr in inspect(Client).column_attrs}
+
+def _attach(db: Session, values: dict) -> Client:
+    client = Client(**values)
+    make_transient_to_detached(client)
+    return db.merge(client, load=False)
+
+def _lookup(db: Session, subject: str) -> Optional[Client]:
+    try:
+        client_id = uuid.UUID(subject)
+    except ValueError:
+        return Client.get_by_email(db, subject)
+    return db.get(Client, client_id)
+
+def get_current_client(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)) -> Client:
+    subject = current_user.get("sub")
+    if not subject:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    values = cache.get(subject)
+    if values is not None:
+        return _attach(db, values)
+
+    generation = cache.generation()
+    client = _lookup(db, subject)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    cache.put(subject, _snapshot(client), generation)
+    return client
+
+def invalidate_client(client_id) -> None:
+    cache.invalidate(client_id)
+
+# session.info key: ids of clients written in the session's open transaction
+_WRITTEN = "current_client.written"
+
+@event.listens_for(Client, "after_update")
+@event.listens_for(Client, "after_delete")
+def _evict(mapper, connection, target):
+    cache.invalidate(target.id)
+    # Once more at commit: a lookup between this flush and the commit still reads the old row
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_WRITTEN, set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(session):
+    for client_id in session.info.pop(_WRITTEN, ()):
+        cache.invalidate(client_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written(session):
+    session.info.pop(_WRITTEN, None)
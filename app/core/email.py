@@ -3,8 +3,12 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+import logging
 from pathlib import Path
 from dotenv import load_dotenv
+from app.core.metrics import span
+
+logger = logging.getLogger(__name__)
 
 # Load .env from project root
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -20,17 +24,14 @@ def send_otp_email(email: str, otp: str):
     smtp_user = os.getenv("SMTP_USER", "")
     smtp_password = os.getenv("SMTP_PASSWORD", "")
     
-    print(f"[EMAIL DEBUG] SMTP_SERVER: {smtp_server}")
-    print(f"[EMAIL DEBUG] SMTP_PORT: {smtp_port}")
-    print(f"[EMAIL DEBUG] SMTP_USER: {smtp_user}")
-    print(f"[EMAIL DEBUG] SMTP_PASSWORD: {'SET' if smtp_password else 'NOT SET'}")
-    print(f"[EMAIL DEBUG] Target email: {email}")
-    print(f"[EMAIL DEBUG] OTP: {otp}")
+    # Never log the OTP itself
+    logger.debug("Sending OTP email to %s via %s:%s as %s", email, smtp_server, smtp_port, smtp_user)
     
     if not smtp_user or not smtp_password:
-        print("[EMAIL ERROR] Email not configured. Skipping OTP email.")
-        print(f"[EMAIL ERROR] SMTP_USER empty: {not smtp_user}")
-        print(f"[EMAIL ERROR] SMTP_PASSWORD empty: {not smtp_password}")
+        logger.error(
+            "Email not configured, skipping OTP email (SMTP_USER empty: %s, SMTP_PASSWORD empty: %s)",
+            not smtp_user, not smtp_password
+        )
         return
     
     subject = "Verify Your Email - OTP"
@@ -51,34 +52,21 @@ def send_otp_email(email: str, otp: str):
     msg.attach(MIMEText(body, 'plain'))
     
     try:
-        print(f"[EMAIL DEBUG] Connecting to {smtp_server}:{smtp_port}...")
-        server = smtplib.SMTP(smtp_server, smtp_port, timeout=10)
-        print(f"[EMAIL DEBUG] Connected successfully")
-        
-        print(f"[EMAIL DEBUG] Starting TLS...")
-        server.starttls()
-        print(f"[EMAIL DEBUG] TLS started")
-        
-        print(f"[EMAIL DEBUG] Logging in as {smtp_user}...")
-        server.login(smtp_user, smtp_password)
-        print(f"[EMAIL DEBUG] Login successful")
-        
-        print(f"[EMAIL DEBUG] Sending message...")
-        server.send_message(msg)
-        print(f"[EMAIL DEBUG] Message sent")
-        
-        server.quit()
-        print(f"[EMAIL SUCCESS] OTP sent to {email}")
+        with span("smtp"):
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=10)
+            server.starttls()
+            server.login(smtp_user, smtp_password)
+            server.send_message(msg)
+            server.quit()
+        logger.info("OTP email sent to %s", email)
     except smtplib.SMTPAuthenticationError as e:
-        print(f"[EMAIL ERROR] SMTP Authentication failed: {e}")
+        logger.error("SMTP authentication failed: %s", e)
         raise
     except smtplib.SMTPException as e:
-        print(f"[EMAIL ERROR] SMTP error: {e}")
+        logger.error("SMTP error sending OTP email: %s", e)
         raise
-    except Exception as e:
-        print(f"[EMAIL ERROR] Failed to send OTP email: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Failed to send OTP email")
         raise
 
 def send_password_reset_email(email: str, reset_token: str):
@@ -88,7 +76,7 @@ def send_password_reset_email(email: str, reset_token: str):
     smtp_password = os.getenv("SMTP_PASSWORD", "")
     
     if not smtp_user or not smtp_password:
-        print("Email not configured. Skipping password reset email.")
+        logger.warning("Email not configured. Skipping password reset email.")
         return
     
     reset_link = f"http://localhost:8000/reset-password?token={reset_token}"
@@ -117,14 +105,15 @@ def send_password_reset_email(email: str, reset_token: str):
     msg.attach(MIMEText(body, 'plain'))
     
     try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-        server.quit()
-        print(f"Password reset email sent to {email}")
+        with span("smtp"):
+            server = smtplib.SMTP(smtp_server, smtp_port)
+            server.starttls()
+            server.login(smtp_user, smtp_password)
+            server.send_message(msg)
+            server.quit()
+        logger.info("Password reset email sent to %s", email)
     except Exception as e:
-        print(f"Failed to send password reset email: {e}")
+        logger.error("Failed to send password reset email: %s", e)
 
 def send_job_assignment_email(crew_email: str, crew_name: str, job_id: str, address: str, scheduled_date: str):
     smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -155,11 +144,14 @@ Emergency Property Clearance Team"""
     msg['Subject'] = subject
     msg.attach(MIMEText(body, 'plain'))
     
-    try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-        server.quit()
-    except:
-        pass
+    # Let failures propagate so the outbox relay retries the delivery
+    with span("smtp"):
+        server = smtplib.SMTP(smtp_server, smtp_port, timeout=10)
+        try:
+            server.starttls()
+            server.login(smtp_user, smtp_password)
+            server.send_message(msg)
+            server.quit()
+        except Exception:
+            server.close()
+            raise
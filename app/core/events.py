@@ -0,0 +1,143 @@
+"""
+Job tracking push events.
+
+Postgres triggers (see the 'add job event notify triggers' migration) NOTIFY
+on the `job_events` channel whenever a job's status or crew changes or a crew
+photo is uploaded - including writes made by the crew and admin backends.
+Each worker holds one LISTEN connection and fans the events out in-process to
+every tracking stream subscribed to that job. Other modules can piggyback
+extra channels on the same connection with `listener.add_channel()`.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Set
+
+JOB_EVENTS_CHANNEL = "job_events"
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("JOB_EVENTS_QUEUE_SIZE", "32"))
+LISTEN_ENABLED = os.getenv("JOB_EVENTS_LISTEN", "true").lower() == "true"
+RECONNECT_DELAY_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+class JobEventBroker:
+    """In-process pub/sub keyed by job id. Must be used from the event loop thread."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[job_id].add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(job_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: dict) -> int:
+        """Deliver to every subscriber of job_id. A slow consumer loses its oldest event, never blocks the others."""
+        queues = self._subscribers.get(job_id)
+        if not queues:
+            return 0
+        for queue in queues:
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+        return len(queues)
+
+    def subscriber_count(self, job_id: Optional[str] = None) -> int:
+        if job_id is not None:
+            return len(self._subscribers.get(job_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+class JobEventListener:
+    """Background task that LISTENs on Postgres and feeds the broker"""
+
+    def __init__(self, broker: JobEventBroker, channel: str = JOB_EVENTS_CHANNEL):
+        self.broker = broker
+        self.channel = channel
+        self._extra_channels: Dict[str, Callable[[str], None]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def add_channel(self, channel: str, callback: Callable[[str], None]):
+        """LISTEN on another channel too; callback receives the raw payload on the event loop"""
+        self._extra_channels[channel] = callback
+
+    def _dispatch_extra(self, connection, pid, channel, payload):
+        callback = self._extra_channels.get(channel)
+        if callback is None:
+            return
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.error("Error handling notification on '%s': %s", channel, e)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed job event: %s", payload)
+            return
+        job_id = event.get("job_id")
+        if job_id:
+            self.broker.publish(job_id, event)
+
+    async def _run(self):
+        import asyncpg
+        from app.database.db import sync_url
+
+        dsn = sync_url.replace("postgresql+psycopg2://", "postgresql://")
+        while not self._stopping:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(self.channel, self._on_notify)
+                for channel in list(self._extra_channels):
+                    await connection.add_listener(channel, self._dispatch_extra)
+                logger.info("Listening for job events on '%s'", self.channel)
+                # asyncpg delivers notifications on its own; just watch for the connection dropping
+                while not self._stopping and not connection.is_closed():
+                    await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Job event listener error: %s", e)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            if not self._stopping:
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def start(self):
+        if self._task is None and LISTEN_ENABLED:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Singleton instances
+broker = JobEventBroker()
+listener = JobEventListener(broker)
@@ -0,0 +1,149 @@
+"""
+Idempotency-Key support for endpoints with side effects.
+
+A client that retries a request sends the same `Idempotency-Key` header
+each time. The first request claims the key (one row in idempotency_keys,
+committed before any work starts), does the work, and stores its response in
+the same transaction as its own writes. Anything that arrives with that key
+afterwards gets the stored response back (with `Idempotent-Replayed: true`)
+without running the handler again - no second upload, geocode or dispatch.
+
+  - a duplicate that arrives while the first is still running waits for it
+    (up to IDEMPOTENCY_WAIT_SECONDS), then replays its response, or gets
+    409 + Retry-After if it is still not done
+  - reusing a key for a different request is a 422
+  - if the first request fails, its claim is released and the key can be
+    retried; a claim left behind by a dead worker is taken over once it is
+    older than IDEMPOTENCY_LOCK_SECONDS
+  - keys are scoped per caller and kept for IDEMPOTENCY_TTL_HOURS; the
+    maintenance worker deletes expired ones
+
+    claim = await idempotency.claim(db, str(client.id), key, fingerprint(...))
+    if isinstance(claim, Response):
+        return claim
+    ...
+    claim.complete(db, 200, body)
+    db.commit()
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Union
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import text
+from app.core.metrics import Counter, register
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+POLL_SECONDS = 0.2
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = register(Counter(
+    "idempotency_requests_total", "Requests carrying an Idempotency-Key, by outcome", ("outcome",)
+))
+
+# Claims a new key, or takes over one that expired or whose first request was abandoned
+_CLAIM = text("""
+    INSERT INTO idempotency_keys (scope, key, fingerprint, status, locked_until, expires_at, created_at)
+    VALUES (:scope, :key, :fingerprint, 'in_progress', :locked_until, :expires_at, :now)
+    ON CONFLICT (scope, key) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint, status = 'in_progress',
+            response_status = NULL, response_body = NULL,
+            locked_until = EXCLUDED.locked_until, expires_at = EXCLUDED.expires_at, created_at = EXCLUDED.created_at
+        WHERE idempotency_keys.expires_at < :now
+           OR (idempotency_keys.status = 'in_progress' AND idempotency_keys.locked_until < :now)
+    RETURNING key
+""")
+
+_EXISTING = text("""
+    SELECT fingerprint, status, response_status, response_body FROM idempotency_keys
+    WHERE scope = :scope AND key = :key
+""")
+
+_COMPLETE = text("""
+    UPDATE idempotency_keys SET status = 'completed', response_status = :status, response_body = :body
+    WHERE scope = :scope AND key = :key
+""")
+
+_RELEASE = text("DELETE FROM idempotency_keys WHERE scope = :scope AND key = :key AND status = 'in_progress'")
+
+def fingerprint(*parts) -> str:
+    """Hash of what makes two requests 'the same' (method, path, fields, file names and sizes)"""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class IdempotencyClaim:
+    """The key is ours: run the request, then `complete` it in the same transaction (or `release` on failure)"""
+
+    def __init__(self, scope: str, key: str):
+        self.scope = scope
+        self.key = key
+
+    def complete(self, db, status_code: int, body) -> None:
+        """Store the response for replays. Does not commit."""
+        db.execute(_COMPLETE, {
+            "scope": self.scope, "key": self.key, "status": status_code, "body": json.dumps(body, default=str)
+        })
+
+    def release(self, db) -> None:
+        """The request failed; let the client retry with the same key"""
+        try:
+            db.rollback()
+            db.execute(_RELEASE, {"scope": self.scope, "key": self.key})
+            db.commit()
+        except Exception as e:
+            # The claim lapses after IDEMPOTENCY_LOCK_SECONDS anyway
+            logger.warning("Could not release idempotency key: %s", e)
+
+def replay(status_code: int, body: str) -> Response:
+    return JSONResponse(status_code=status_code, content=json.loads(body), headers={REPLAYED_HEADER: "true"})
+
+async def claim(db, scope: str, key: str, request_fingerprint: str) -> Union[IdempotencyClaim, Response]:
+    """Claim `key` for this request, or return the response to send instead. Commits."""
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    params = {"scope": scope, "key": key}
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.utcnow()
+        claimed = db.execute(_CLAIM, dict(
+            params,
+            fingerprint=request_fingerprint,
+            now=now,
+            locked_until=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+            expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+        )).first()
+        existing = None if claimed else db.execute(_EXISTING, params).first()
+        # Each poll is its own short transaction, so no connection is held while waiting
+        db.commit()
+
+        if claimed:
+            OUTCOMES.inc(("claimed",))
+            return IdempotencyClaim(scope, key)
+        if existing is None:
+            continue  # released between the two statements; claim again
+
+        if existing.fingerprint != request_fingerprint:
+            OUTCOMES.inc(("mismatch",))
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if existing.status == "completed":
+            OUTCOMES.inc(("replayed",))
+            return replay(existing.response_status, existing.response_body)
+        if time.monotonic() >= deadline:
+            OUTCOMES.inc(("in_progress",))
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"}
+            )
+        await asyncio.sleep(POLL_SECONDS)
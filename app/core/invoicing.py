@@ -0,0 +1,110 @@
+"""
+Paid invoice generation (PDF + storage upload + Invoice row)
+"""
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from app.models.invoice import Invoice
+from app.models.job import Job
+from app.core.storage import storage
+import os
+import random
+import tempfile
+import uuid
+
+def generate_paid_invoice(db, job_id: str, client, fallback_amount: float = None) -> Invoice:
+    """
+    Create the invoice for a fully paid job. Idempotent, also under concurrent
+    calls: returns the existing invoice if the job already has one. Does not
+    commit.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    existing_invoice = db.query(Invoice).filter(Invoice.job_id == job_id).first()
+    if existing_invoice:
+        return existing_invoice
+
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise Exception("Job not found for invoice generation")
+
+    quote_amount = job.quote_amount if job.quote_amount else fallback_amount
+    deposit_amount = job.deposit_amount if job.deposit_amount else 0.0
+    remaining_amount = float(quote_amount) - float(deposit_amount)
+
+    invoice_number = f"INV-{random.randint(10000, 99999)}"
+
+    # Generate PDF
+    tmp_file_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+            tmp_file_path = tmp_file.name
+            c = canvas.Canvas(tmp_file_path, pagesize=letter)
+            width, height = letter
+
+            # Invoice content
+            c.setFont("Helvetica-Bold", 20)
+            c.drawString(50, height - 50, "INVOICE")
+
+            c.setFont("Helvetica", 12)
+            c.drawString(50, height - 100, f"Invoice Number: {invoice_number}")
+            c.drawString(50, height - 120, f"Job ID: {job_id}")
+            c.drawString(50, height - 140, f"Date: {datetime.utcnow().strftime('%Y-%m-%d')}")
+
+            c.drawString(50, height - 180, "Bill To:")
+            c.drawString(50, height - 200, f"{client.full_name}")
+            c.drawString(50, height - 220, f"{client.email}")
+
+            # Payment breakdown
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(50, height - 280, "Payment Details:")
+            c.setFont("Helvetica", 12)
+            c.drawString(50, height - 300, f"Quote Amount: £{float(quote_amount):.2f}")
+            c.drawString(50, height - 320, f"Deposit Paid: £{float(deposit_amount):.2f}")
+            c.drawString(50, height - 340, f"Remaining Paid: £{remaining_amount:.2f}")
+
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(50, height - 380, f"Total Amount: £{float(quote_amount):.2f}")
+
+            c.setFont("Helvetica", 10)
+            c.drawString(50, 50, "Thank you for your business!")
+            c.save()
+
+        # Upload PDF to Utho storage
+        with open(tmp_file_path, 'rb') as pdf_file:
+            pdf_url = storage.upload_file(
+                pdf_file.read(),
+                f"invoices/{client.id}",
+                f"{invoice_number}.pdf"
+            )
+    finally:
+        # Clean up temp file
+        if tmp_file_path and os.path.exists(tmp_file_path):
+            try:
+                os.unlink(tmp_file_path)
+            except OSError:
+                pass
+
+    if not pdf_url:
+        # Raised before the insert so the outbox event stays pending and is redelivered
+        raise RuntimeError(f"Could not upload invoice PDF for job {job_id}")
+
+    # Create invoice with PDF URL and quote amount. A concurrent delivery for
+    # the same job may have got here first: the unique job_id makes this a
+    # no-op then, and its invoice is returned instead
+    invoice_id = db.execute(
+        insert(Invoice).values(
+            id=str(uuid.uuid4()),
+            job_id=job_id,
+            client_id=client.id,
+            invoice_number=invoice_number,
+            amount=quote_amount,
+            status="paid",
+            pdf_path=pdf_url,
+            generated_by="system",
+            generated_at=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=["job_id"]).returning(Invoice.id)
+    ).scalar()
+    if invoice_id is None:
+        storage.delete_file(pdf_url)
+    return db.query(Invoice).filter(Invoice.job_id == job_id).one()
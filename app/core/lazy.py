@@ -0,0 +1,61 @@
+"""
+Deferred imports for heavy integration libraries.
+
+Stripe, geopy, Twilio, reportlab and boto3 together add a few hundred
+milliseconds and tens of MB to every worker, yet most requests never touch
+them. Integration modules bind them through `lazy_import`, which returns a
+stand-in that imports the real module on first attribute access, so call
+sites keep reading `stripe.checkout.Session.create(...)`.
+
+benchmarks/bench_import_time.py reports what main still imports eagerly and
+fails when the budget is exceeded.
+"""
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Callable, Optional
+
+class LazyModule(ModuleType):
+    def __init__(self, name: str, on_load: Optional[Callable[[ModuleType], None]] = None):
+        super().__init__(name)
+        self.__dict__["_lazy_on_load"] = on_load
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    on_load = self.__dict__["_lazy_on_load"]
+                    if on_load is not None:
+                        on_load(module)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+def lazy_import(name: str, on_load: Optional[Callable[[ModuleType], None]] = None) -> ModuleType:
+    """
+    `stripe = lazy_import("stripe")` - the import (and `on_load`, for one-time
+    configuration such as setting an API key) happens on first use.
+    """
+    return LazyModule(name, on_load)
+
+def is_available(name: str) -> bool:
+    """Whether an optional dependency is installed, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -1,9 +1,11 @@
-from geopy.geocoders import Nominatim
 from math import radians, sin, cos, sqrt, atan2
+from app.core.lazy import lazy_import
+
+geocoders = lazy_import("geopy.geocoders")
 
 def geocode_address(address: str):
     try:
-        geolocator = Nominatim(user_agent="emergency_clearance")
+        geolocator = geocoders.Nominatim(user_agent="emergency_clearance")
         location = geolocator.geocode(address)
         if location:
             return location.latitude, location.longitude
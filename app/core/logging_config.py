@@ -0,0 +1,130 @@
+"""
+Logging setup.
+
+Application code logs through `logging.getLogger(__name__)`. `setup_logging()`
+installs a QueueHandler on the root logger, so a request only pays for
+building the record and putting it on an in-memory queue; formatting and the
+blocking write to stdout happen on a QueueListener thread.
+
+Configuration (environment):
+    LOG_LEVEL               root level, default INFO
+    LOG_LEVELS              per-logger overrides, e.g. "app.core.email=DEBUG,app.routers.auth=WARNING"
+    LOG_FORMAT              "json" (default) or "text"
+    LOG_DEBUG_SAMPLE_RATE   fraction of enabled DEBUG records to keep, default 1.0
+
+A disabled level costs one cached `isEnabledFor` check at the call site, so
+always pass arguments lazily (`logger.debug("x=%s", x)`), never pre-formatted.
+Debug sampling is decided before the LogRecord is built, so dropped lines are
+nearly as cheap as disabled ones. It applies to loggers created after
+setup_logging(), which main.py calls before importing the app.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_debug_sample_rate = 1.0
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra={...}` fields are included as-is"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Keeps the traceback in exc_text instead of folding it into the message"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The root queue handler is the only consumer, so modify in place
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class SampledLogger(logging.Logger):
+    """Keeps a random fraction of enabled DEBUG lines; other levels are untouched"""
+
+    def debug(self, msg, *args, **kwargs):
+        if self.isEnabledFor(logging.DEBUG) and (_debug_sample_rate >= 1.0 or random.random() < _debug_sample_rate):
+            self._log(logging.DEBUG, msg, args, **kwargs)
+
+def set_debug_sample_rate(rate: float):
+    global _debug_sample_rate
+    _debug_sample_rate = rate
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """'a.b=DEBUG,c=warning' -> {'a.b': 10, 'c': 30}; malformed entries are ignored"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+def setup_logging(stream=None) -> logging.handlers.QueueListener:
+    """Configure root logging once per process. Safe to call again."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        output.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+
+    set_debug_sample_rate(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0")))
+    logging.setLoggerClass(SampledLogger)
+    # Neither formatter emits these, so don't pay to collect them on every record
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging.logThreads = False
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper()))
+    for name, level in parse_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
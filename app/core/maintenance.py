@@ -0,0 +1,168 @@
+"""
+Periodic cleanup of data nobody will come back for.
+
+  - anonymous job drafts (job_drafts) older than DRAFT_TTL_HOURS are
+    deleted; their uploaded photos are removed through
+    the outbox ("storage.delete_files"), so a storage outage only delays them
+  - registration OTPs, password-reset OTPs and reset tokens past their expiry
+    are cleared from clients
+  - Idempotency-Key responses past IDEMPOTENCY_TTL_HOURS are deleted
+
+Every worker runs the loop every MAINTENANCE_INTERVAL seconds. Each task
+works in batches of MAINTENANCE_BATCH_SIZE rows, one short transaction per
+batch, claimed with SKIP LOCKED so workers running at the same time split the
+work instead of blocking each other, and stops after MAINTENANCE_MAX_BATCHES
+so a large backlog is worked off over several runs rather than in one long
+burst. `python -m app.cli maintenance` runs a single pass, e.g. from cron
+with MAINTENANCE_ENABLED=false on the web workers.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import text
+from app.core.metrics import Counter, register
+from app.core.outbox import enqueue
+
+MAINTENANCE_ENABLED = os.getenv("MAINTENANCE_ENABLED", "true").lower() == "true"
+MAINTENANCE_INTERVAL = float(os.getenv("MAINTENANCE_INTERVAL", "600"))
+BATCH_SIZE = int(os.getenv("MAINTENANCE_BATCH_SIZE", "500"))
+MAX_BATCHES = int(os.getenv("MAINTENANCE_MAX_BATCHES", "20"))
+DRAFT_TTL_HOURS = float(os.getenv("DRAFT_TTL_HOURS", "72"))
+
+logger = logging.getLogger(__name__)
+
+PURGED = register(Counter("maintenance_rows_total", "Rows deleted or cleared by the maintenance worker", ("task",)))
+
+def draft_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Drafts created before this have expired"""
+    return (now or datetime.utcnow()) - timedelta(hours=DRAFT_TTL_HOURS)
+
+_DELETE_DRAFTS = text("""
+    DELETE FROM job_drafts WHERE id IN (
+        SELECT id FROM job_drafts WHERE created_at < :cutoff
+        ORDER BY created_at LIMIT :limit FOR UPDATE SKIP LOCKED
+    ) RETURNING id, data::json ->> 'property_photos'
+""")
+
+# (task, expiry column, columns to clear)
+EXPIRING_SECRETS = [
+    ("otp", "otp_expiry", ("otp", "otp_expiry")),
+    ("reset_otp", "reset_otp_expiry", ("reset_otp", "reset_otp_expiry")),
+    ("reset_token", "reset_token_expiry", ("reset_token", "reset_token_expiry")),
+]
+
+_DELETE_IDEMPOTENCY_KEYS = text("""
+    DELETE FROM idempotency_keys WHERE (scope, key) IN (
+        SELECT scope, key FROM idempotency_keys WHERE expires_at < :now
+        LIMIT :limit FOR UPDATE SKIP LOCKED
+    )
+""")
+
+def _clear_statement(expiry: str, columns: tuple):
+    assignments = ", ".join(f"{column} = NULL" for column in columns)
+    return text(f"""
+        UPDATE clients SET {assignments} WHERE id IN (
+            SELECT id FROM clients WHERE {expiry} < :now
+            LIMIT :limit FOR UPDATE SKIP LOCKED
+        )
+    """)
+
+_CLEAR_SECRETS = [(task, _clear_statement(expiry, columns)) for task, expiry, columns in EXPIRING_SECRETS]
+
+class MaintenanceWorker:
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.database.db import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _batches(self, run_batch) -> int:
+        total = 0
+        for _ in range(MAX_BATCHES):
+            if self._stopping:
+                break
+            count = run_batch()
+            total += count
+            if count < BATCH_SIZE:
+                break
+        return total
+
+    def purge_drafts_batch(self) -> int:
+        db = self._session()
+        try:
+            rows = db.execute(_DELETE_DRAFTS, {"cutoff": draft_cutoff(), "limit": BATCH_SIZE}).fetchall()
+            urls = []
+            for _, photos in rows:
+                if photos:
+                    try:
+                        urls.extend(json.loads(photos))
+                    except ValueError:
+                        logger.warning("Unreadable property_photos on an expired draft: %r", photos[:200])
+            if urls:
+                enqueue(db, "storage.delete_files", {"urls": urls})
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def expire_batch(self, statement) -> int:
+        db = self._session()
+        try:
+            count = db.execute(statement, {"now": datetime.utcnow(), "limit": BATCH_SIZE}).rowcount
+            db.commit()
+            return count
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def run_once(self) -> Dict[str, int]:
+        counts = {"drafts": self._batches(self.purge_drafts_batch)}
+        for task, statement in _CLEAR_SECRETS:
+            counts[task] = self._batches(lambda: self.expire_batch(statement))
+        counts["idempotency_keys"] = self._batches(lambda: self.expire_batch(_DELETE_IDEMPOTENCY_KEYS))
+        for task, count in counts.items():
+            if count:
+                PURGED.inc((task,), count)
+        if any(counts.values()):
+            logger.info("Maintenance: %s", ", ".join(f"{task}={count}" for task, count in counts.items()))
+        return counts
+
+    async def _run(self):
+        while not self._stopping:
+            # Sleep first: a worker that just booted has better things to do
+            await asyncio.sleep(MAINTENANCE_INTERVAL)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error("Maintenance run failed: %s", e)
+
+    def start(self):
+        if self._task is None and MAINTENANCE_ENABLED:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Singleton instance
+worker = MaintenanceWorker()
@@ -0,0 +1,115 @@
+"""
+Job photo thumbnails.
+
+Photos are recorded in job_media when they are uploaded (client property
+photos) or mirrored from job_photos (crew before/after photos, by a trigger).
+Either way a "media.thumbnail" outbox event follows, and the relay downloads
+each photo, records its dimensions and uploads a JPEG of at most
+THUMBNAIL_SIZE pixels on the long side next to it under thumbnails/. List
+views then show `thumbnail_url` instead of the full upload.
+
+Thumbnails need Pillow (`pip install Pillow`). Without it the events are
+delivered without doing anything and views fall back to the full photo.
+`python -m app.cli thumbnails` queues the photos that have no thumbnail yet.
+"""
+import io
+import logging
+import os
+from typing import List, Tuple
+from sqlalchemy import text
+from app.core.lazy import is_available, lazy_import
+
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "320"))
+THUMBNAILS_PER_EVENT = 20
+
+PIL_AVAILABLE = is_available("PIL")
+pil_image = lazy_import("PIL.Image")
+
+logger = logging.getLogger(__name__)
+
+def make_thumbnail(data: bytes) -> Tuple[int, int, bytes]:
+    """(width, height) of the photo and a JPEG thumbnail of it"""
+    with pil_image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        out = io.BytesIO()
+        image.convert("RGB").save(out, format="JPEG", quality=80, optimize=True)
+    return width, height, out.getvalue()
+
+def thumbnail_events(media_ids: List[str]) -> List[dict]:
+    """Outbox payloads for `media_ids`, a bounded number of photos per event"""
+    return [
+        {"media_ids": media_ids[i:i + THUMBNAILS_PER_EVENT]}
+        for i in range(0, len(media_ids), THUMBNAILS_PER_EVENT)
+    ]
+
+def queue_missing_thumbnails(session_factory=None, batch_size: int = 500) -> int:
+    """Queue "media.thumbnail" events for every photo without a thumbnail. Returns how many."""
+    from app.core.outbox import enqueue
+    if session_factory is None:
+        from app.database.db import SessionLocal as session_factory
+
+    queued, after = 0, ""
+    db = session_factory()
+    try:
+        while True:
+            ids = db.execute(
+                text("SELECT id FROM job_media WHERE thumbnail_url IS NULL AND id > :after ORDER BY id LIMIT :limit"),
+                {"after": after, "limit": batch_size}
+            ).scalars().all()
+            if not ids:
+                return queued
+            for payload in thumbnail_events(ids):
+                enqueue(db, "media.thumbnail", payload)
+            db.commit()
+            queued += len(ids)
+            after = ids[-1]
+    finally:
+        db.close()
+
+def generate_thumbnails(media_ids: List[str], session_factory=None) -> int:
+    """Thumbnail the given job_media rows that still need one. Returns how many were made."""
+    if not PIL_AVAILABLE:
+        logger.warning("Pillow not installed, %d job photos left without thumbnails", len(media_ids))
+        return 0
+    from app.core.storage import storage
+    if session_factory is None:
+        from app.database.db import SessionLocal as session_factory
+
+    db = session_factory()
+    try:
+        rows = db.execute(
+            text("SELECT id, url FROM job_media WHERE id = ANY(:ids) AND thumbnail_url IS NULL"),
+            {"ids": list(media_ids)}
+        ).fetchall()
+        # Nothing is held open while downloading and uploading
+        db.commit()
+
+        made, failed = 0, 0
+        for media_id, url in rows:
+            data = storage.download_file(url)
+            if data is None:
+                failed += 1
+                continue
+            try:
+                width, height, jpeg = make_thumbnail(data)
+            except Exception as e:
+                # Not an image Pillow can read; retrying won't change that
+                logger.warning("Could not read job photo %s: %s", url, e)
+                continue
+            thumbnail_url = storage.upload_thumbnail(jpeg, url)
+            if thumbnail_url is None:
+                failed += 1
+                continue
+            db.execute(
+                text("UPDATE job_media SET width = :width, height = :height, thumbnail_url = :thumb WHERE id = :id"),
+                {"id": media_id, "width": width, "height": height, "thumb": thumbnail_url}
+            )
+            db.commit()
+            made += 1
+        if failed:
+            # Retried by the outbox; photos done already are skipped above
+            raise RuntimeError(f"Could not thumbnail {failed} of {len(rows)} job photos")
+        return made
+    finally:
+        db.close()
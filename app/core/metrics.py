@@ -0,0 +1,317 @@
+"""
+Request metrics and profiling (opt-in).
+
+With METRICS_ENABLED=true, MetricsMiddleware records for every request its
+wall time, the number and total time of SQL statements (SQLAlchemy cursor
+events on the engines) and time spent in external calls wrapped in
+`span("storage" | "stripe" | "smtp" | "twilio")`, plus the wait for a pooled connection.
+Each response carries a Server-Timing header and the aggregates are served in
+Prometheus text format at /metrics, with the pool's saturation.
+Metrics are per worker process; scrape every worker.
+
+With PROFILING_ENABLED=true (and pyinstrument installed), a request sent
+with an `X-Profile` header returns the pyinstrument HTML profile of that
+request instead of its normal response.
+
+Both need METRICS_TOKEN: /metrics answers 401 unless it is sent as a bearer
+token, and profiling stays off without one. It is sent as the X-Profile
+value to profile (the request keeps its own Authorization header), because a
+profile shows the stack frames and locals of whatever endpoint it ran.
+"""
+import contextlib
+import hmac
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+PROFILE_HEADER = b"x-profile"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+STARTUP_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0)
+
+logger = logging.getLogger(__name__)
+
+if PROFILING_ENABLED and not METRICS_TOKEN:
+    logger.warning("PROFILING_ENABLED needs METRICS_TOKEN; profiling stays off")
+    PROFILING_ENABLED = False
+
+class RequestStats:
+    __slots__ = ("start", "db_time", "db_count", "spans")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.db_count = 0
+        self.spans: Dict[str, list] = {}
+
+    def add_span(self, name: str, seconds: float):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def server_timing(self) -> str:
+        parts = [f"app;dur={(time.perf_counter() - self.start) * 1000:.1f}"]
+        if self.db_count:
+            parts.append(f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"')
+        for name, (seconds, count) in self.spans.items():
+            parts.append(f'{name};dur={seconds * 1000:.1f};desc="{count} calls"')
+        return ", ".join(parts)
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+# Minimal Prometheus primitives - a handful of series, so no client library
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: tuple = (), amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: tuple = DURATION_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._values: Dict[tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_values: tuple = ()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {series[-1]}")
+        return lines
+
+class Gauge:
+    """Value read at scrape time from `collect()`, e.g. the connection pool's current state"""
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], float]):
+        self.name, self.help, self.collect = name, help_text, collect
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.collect()}"]
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request wall time", ("method", "route"))
+REQUEST_DB_TIME = Counter("http_request_db_seconds_total", "Time spent in SQL statements per route", ("method", "route"))
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements issued per request", ("method", "route"), STATEMENT_BUCKETS
+)
+DB_STATEMENT_DURATION = Histogram("db_statement_duration_seconds", "SQL statement execution time")
+EXTERNAL_DURATION = Histogram("external_call_duration_seconds", "Time spent in external service calls", ("service",))
+EXTERNAL_ERRORS = Counter("external_call_errors_total", "External service calls that raised", ("service",))
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection (connecting, with no pool)"
+)
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that gave up because the pool stayed exhausted")
+WORKER_STARTUP = Histogram(
+    "worker_startup_seconds", "Worker cold start, from importing main to serving", buckets=STARTUP_BUCKETS
+)
+
+REGISTRY = [
+    REQUESTS, REQUEST_DURATION, REQUEST_DB_TIME, REQUEST_DB_STATEMENTS,
+    DB_STATEMENT_DURATION, EXTERNAL_DURATION, EXTERNAL_ERRORS, POOL_CHECKOUT_WAIT, POOL_TIMEOUTS, WORKER_STARTUP,
+]
+
+def register(metric):
+    """Expose another Counter/Histogram on /metrics"""
+    REGISTRY.append(metric)
+    return metric
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# External call spans
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        EXTERNAL_DURATION.observe(elapsed, (self.name,))
+        if exc_type is not None:
+            EXTERNAL_ERRORS.inc((self.name,))
+        stats = _current.get()
+        if stats is not None:
+            stats.add_span(self.name, elapsed)
+        return False
+
+_NULL_SPAN = contextlib.nullcontext()
+
+def span(name: str):
+    """Time an external call: `with span("stripe"): ...`. A no-op unless metrics are enabled."""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+# SQL statement instrumentation
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_STATEMENT_DURATION.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.db_time += elapsed
+        stats.db_count += 1
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+def instrument_engine(engine):
+    """Count and time statements on a sync Engine (pass get_async_engine().sync_engine for async)"""
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+# Connection pool
+
+def record_pool_checkout(seconds: float, timed_out: bool = False):
+    """Called by the engine's pool for every checkout (app.database.db)"""
+    POOL_CHECKOUT_WAIT.observe(seconds)
+    if timed_out:
+        POOL_TIMEOUTS.inc()
+    stats = _current.get()
+    if stats is not None:
+        stats.add_span("pool", seconds)
+
+# Middleware
+
+def authorized(headers: dict) -> bool:
+    if not METRICS_TOKEN:
+        return False
+    return hmac.compare_digest(headers.get(b"authorization", b""), f"Bearer {METRICS_TOKEN}".encode())
+
+def profile_requested(headers: dict) -> bool:
+    value = headers.get(PROFILE_HEADER)
+    if not value or not METRICS_TOKEN:
+        return False
+    return hmac.compare_digest(value, METRICS_TOKEN.encode())
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses (SSE) pass straight through"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if PROFILING_ENABLED:
+            if profile_requested(dict(scope["headers"])):
+                await self._profile(scope, receive, send)
+                return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", stats.server_timing().encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            REQUESTS.inc(labels + (str(status),))
+            REQUEST_DURATION.observe(time.perf_counter() - stats.start, labels)
+            REQUEST_DB_TIME.inc(labels, stats.db_time)
+            REQUEST_DB_STATEMENTS.observe(stats.db_count, labels)
+
+    async def _profile(self, scope, receive, send):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("X-Profile requested but pyinstrument is not installed")
+            await self.app(scope, receive, send)
+            return
+
+        async def discard(message):
+            pass
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        body = profiler.output_html().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/html; charset=utf-8"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
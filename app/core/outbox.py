@@ -0,0 +1,194 @@
+"""
+Transactional outbox.
+
+Write paths call `enqueue()` before their single commit, so a side effect is
+recorded if and only if the state change is. A background relay in every
+worker then claims due events, runs their handler outside any transaction and
+marks them delivered.
+
+Delivery is at-least-once: a claim is a lease (available_at is pushed forward),
+so if a worker dies mid-handler the event becomes due again once the lease
+expires. Handlers must therefore be idempotent or tolerate repeats.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy import text
+from app.models.outbox_event import OutboxEvent
+
+POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+RELAY_ENABLED = os.getenv("OUTBOX_RELAY_ENABLED", "true").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+HANDLERS: Dict[str, Callable[[dict], None]] = {}
+
+def handler(event_type: str):
+    """Register the function that delivers one event type"""
+    def register(func):
+        HANDLERS[event_type] = func
+        return func
+    return register
+
+def enqueue(db, event_type: str, payload: dict) -> OutboxEvent:
+    """Record a side effect in the caller's transaction. Does not commit."""
+    if event_type not in HANDLERS:
+        raise ValueError(f"No outbox handler registered for '{event_type}'")
+    event = OutboxEvent(event_type=event_type, payload=json.dumps(payload, default=str))
+    db.add(event)
+    return event
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(10 * 2 ** (attempts - 1), 3600))
+
+class OutboxRelay:
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.database.db import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def claim(self, limit: int = BATCH_SIZE) -> list:
+        """Lease up to `limit` due events. Concurrent relays skip each other's rows."""
+        now = datetime.utcnow()
+        db = self._session()
+        try:
+            rows = db.execute(
+                text(
+                    "UPDATE outbox_events SET available_at = :lease_until, attempts = attempts + 1 "
+                    "WHERE id IN ("
+                    "  SELECT id FROM outbox_events WHERE status = 'pending' AND available_at <= :now "
+                    "  ORDER BY available_at LIMIT :limit FOR UPDATE SKIP LOCKED"
+                    ") RETURNING id, event_type, payload, attempts"
+                ),
+                {"now": now, "lease_until": now + timedelta(seconds=LEASE_SECONDS), "limit": limit}
+            ).fetchall()
+            db.commit()
+            return rows
+        finally:
+            db.close()
+
+    def deliver(self, event_id: str, event_type: str, payload: str, attempts: int) -> bool:
+        error = None
+        try:
+            func = HANDLERS.get(event_type)
+            if func is None:
+                raise LookupError(f"No outbox handler registered for '{event_type}'")
+            func(json.loads(payload))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+        db = self._session()
+        try:
+            event = db.get(OutboxEvent, event_id)
+            if event is None:
+                return error is None
+            if error is None:
+                event.status = "delivered"
+                event.delivered_at = datetime.utcnow()
+                event.last_error = None
+            else:
+                event.last_error = error
+                if attempts >= MAX_ATTEMPTS:
+                    event.status = "failed"
+                    logger.error("Outbox event %s (%s) failed permanently: %s", event_id, event_type, error)
+                else:
+                    logger.warning("Outbox event %s (%s) attempt %s failed: %s", event_id, event_type, attempts, error)
+                    event.available_at = datetime.utcnow() + retry_delay(attempts)
+            db.commit()
+        finally:
+            db.close()
+        return error is None
+
+    def run_once(self, limit: int = BATCH_SIZE) -> int:
+        rows = self.claim(limit)
+        for row in rows:
+            self.deliver(row[0], row[1], row[2], row[3])
+        return len(rows)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                processed = await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error("Outbox relay error: %s", e)
+                processed = 0
+            # A full batch means there is probably more waiting
+            if processed < BATCH_SIZE:
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    def start(self):
+        if self._task is None and RELAY_ENABLED:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Handlers
+
+@handler("email.job_assignment")
+def deliver_job_assignment_email(payload: dict):
+    from app.core.email import send_job_assignment_email
+    send_job_assignment_email(
+        payload["crew_email"],
+        payload["crew_name"],
+        payload["job_id"],
+        payload["address"],
+        payload["scheduled_date"]
+    )
+
+@handler("invoice.generate")
+def deliver_paid_invoice(payload: dict):
+    from app.database.db import SessionLocal
+    from app.models.client import Client
+    from app.core.invoicing import generate_paid_invoice
+
+    db = SessionLocal()
+    try:
+        client = db.query(Client).filter(Client.id == payload["client_id"]).first()
+        if not client:
+            raise LookupError(f"Client {payload['client_id']} not found")
+        generate_paid_invoice(db, payload["job_id"], client, fallback_amount=payload.get("amount"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+@handler("storage.delete_files")
+def delete_stored_files(payload: dict):
+    from app.core.storage import storage
+
+    failed = [url for url in payload["urls"] if not storage.delete_file(url)]
+    if failed:
+        # Retried; deleting an object that is already gone succeeds
+        raise RuntimeError(f"Could not delete {len(failed)} of {len(payload['urls'])} files")
+
+@handler("media.thumbnail")
+def generate_media_thumbnails(payload: dict):
+    from app.core.media import generate_thumbnails
+
+    generate_thumbnails(payload["media_ids"])
+
+# Singleton instance
+relay = OutboxRelay()
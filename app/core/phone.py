@@ -0,0 +1,33 @@
+"""
+Phone numbers in E.164 ("+447700900123").
+
+Numbers are normalized before they are stored and before they are looked up,
+so "07700 900123", "+44 7700 900123" and "00447700900123" all match the same
+client. National numbers (leading 0) are read as DEFAULT_PHONE_COUNTRY_CODE,
+UK by default. This is a format check, not a numbering-plan validation.
+"""
+import os
+import re
+from typing import Optional
+
+DEFAULT_PHONE_COUNTRY_CODE = os.getenv("DEFAULT_PHONE_COUNTRY_CODE", "44")
+
+_SEPARATORS = re.compile(r"[\s().\-/]")
+_E164 = re.compile(r"^\+[1-9]\d{7,14}$")
+
+def normalize_phone(value: Optional[str], country_code: str = DEFAULT_PHONE_COUNTRY_CODE) -> Optional[str]:
+    """E.164 form of `value`, or None if it doesn't look like a phone number"""
+    if not value:
+        return None
+    number = _SEPARATORS.sub("", value)
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    elif number.startswith("0"):
+        number = f"+{country_code}{number[1:]}"
+    elif not number.startswith("+"):
+        # Digits with the country code but no "+", as the SMS sender used to accept
+        number = "+" + number
+    if number.startswith(f"+{country_code}0"):
+        # "+44 (0)7700 900123"
+        number = f"+{country_code}{number[len(country_code) + 2:]}"
+    return number if _E164.match(number) else None
@@ -1,32 +1,228 @@
 """
 Price Calculation Utility for Client Backend
+
+Rate tables are compiled once into an immutable PricingEngine. Quotes are
+pure functions of their normalized inputs, so both normalization and whole
+quotes are memoized.
+
+The active engine is built from the active row in `rate_cards` and swapped
+atomically when a new version is published: the table NOTIFYs on change and
+each worker also polls as a fallback. Until the first load (or if the table
+is empty) the bundled pricing_rules.json is used. Requests never touch the
+database - they just read the current snapshot.
 """
+import asyncio
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+PRICING_RULES_PATH = os.getenv(
+    "PRICING_RULES_PATH",
+    os.path.join(os.path.dirname(__file__), "pricing_rules.json")
+)
+QUOTE_CACHE_SIZE = int(os.getenv("PRICING_QUOTE_CACHE_SIZE", "4096"))
+RATE_CARD_CHANNEL = "rate_cards"
+RELOAD_INTERVAL_SECONDS = float(os.getenv("PRICING_RELOAD_INTERVAL", "60"))
+
+logger = logging.getLogger(__name__)
+
+# Input normalization - shared by every engine, so cached at module level
+
+@lru_cache(maxsize=1024)
+def normalize_property_size(value: str) -> str:
+    return value.lower().replace(" ", "").replace("-", "")
+
+@lru_cache(maxsize=1024)
+def normalize_waste_type(value: str) -> str:
+    return value.lower().replace(" ", "").replace("_", "")
+
+@lru_cache(maxsize=1024)
+def normalize_option(value: str) -> str:
+    """Access difficulties and compliance add-ons"""
+    return value.lower().strip().replace(" ", "_")
+
+@lru_cache(maxsize=1024)
+def normalize_urgency(value: str) -> str:
+    return value.lower().replace("-", "").replace(" ", "")
+
+class PricingEngine:
+    """Rate tables compiled from a rules mapping. Immutable once built."""
+
+    def __init__(self, rules: Mapping, version: Optional[str] = None):
+        self.version = version
+        self.base_price = float(rules["base_price"])
+        self.minimum_price = float(rules["minimum_price"])
+        self.property_prices = {k: float(v) for k, v in rules["property_size"].items()}
+        # Highest tier first so the first match wins
+        self.van_load_tiers: Tuple[Tuple[int, float], ...] = tuple(sorted(
+            ((int(t["min_loads"]), float(t["price"])) for t in rules["van_loads"]),
+            reverse=True
+        ))
+        self.waste_prices = {k: float(v) for k, v in rules["waste_type"].items()}
+        self.waste_item_prices = {k: float(v) for k, v in rules.get("waste_type_per_item", {}).items()}
+        self.access_prices = {k: float(v) for k, v in rules["access_difficulty"].items()}
+        self.urgency_prices = {k: float(v) for k, v in rules["urgency"].items()}
+        self.compliance_prices = {k: float(v) for k, v in rules["compliance_addons"].items()}
+        # Reference tables for SLA and vehicle pricing, exposed read-only
+        self.sla_base_prices = {k: float(v) for k, v in rules.get("sla_base_prices", {}).items()}
+        self.vehicle_surcharges = {k: float(v) for k, v in rules.get("vehicle_surcharges", {}).items()}
+        self._quote_key = lru_cache(maxsize=QUOTE_CACHE_SIZE)(self._price_key)
+
+    @classmethod
+    def from_file(cls, path: str = PRICING_RULES_PATH) -> "PricingEngine":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def key(
+        self,
+        property_size: Optional[str] = None,
+        van_loads: Optional[int] = 1,
+        waste_type: Optional[str] = "general",
+        furniture_items: Optional[int] = 0,
+        access_difficulty: Optional[Sequence[str]] = None,
+        urgency: Optional[str] = "standard",
+        compliance_addons: Optional[Sequence[str]] = None
+    ) -> tuple:
+        """Canonical form of a scenario - equal keys always price the same"""
+        waste = normalize_waste_type(waste_type) if waste_type else None
+        return (
+            normalize_property_size(property_size) if property_size else None,
+            van_loads or 0,
+            waste,
+            (furniture_items or 0) if waste in self.waste_item_prices else 0,
+            # Add-ons are summed, so their order never matters
+            tuple(sorted(normalize_option(a) for a in access_difficulty)) if access_difficulty else (),
+            normalize_urgency(urgency) if urgency else None,
+            tuple(sorted(normalize_option(a) for a in compliance_addons)) if compliance_addons else ()
+        )
+
+    def _price_key(self, key: tuple) -> float:
+        property_size, van_loads, waste, items, access, urgency, compliance = key
+        price = self.base_price
+        if property_size is not None:
+            price += self.property_prices.get(property_size, 0.0)
+        for min_loads, tier_price in self.van_load_tiers:
+            if van_loads >= min_loads:
+                price += tier_price
+                break
+        if waste is not None:
+            if waste in self.waste_item_prices:
+                price += self.waste_item_prices[waste] * items
+            else:
+                price += self.waste_prices.get(waste, 0.0)
+        for option in access:
+            price += self.access_prices.get(option, 0.0)
+        if urgency is not None:
+            price += self.urgency_prices.get(urgency, 0.0)
+        for option in compliance:
+            price += self.compliance_prices.get(option, 0.0)
+        return max(price, self.minimum_price)
+
+    def price_key(self, key: tuple) -> float:
+        """Price an already canonical scenario (see key())"""
+        return self._quote_key(key)
+
+    def price(self, **scenario) -> float:
+        return self._quote_key(self.key(**scenario))
+
+    def price_many(self, scenarios: Iterable[Mapping]) -> List[float]:
+        """Price a batch of scenarios (dicts of calculate_job_price keyword arguments)"""
+        quote = self._quote_key
+        key = self.key
+        return [quote(key(**scenario)) for scenario in scenarios]
+
+# Current snapshot. Replaced wholesale, never mutated, so readers need no lock.
+engine = PricingEngine.from_file()
+_reload_lock = threading.Lock()
+
+def get_engine() -> PricingEngine:
+    return engine
 
-# Base prices by SLA type
-SLA_BASE_PRICES = {
-    "24h": 2500.0,
-    "48h": 1800.0,
-    "5-7d": 1200.0,
-    "24 hour – emergency": 2500.0,
-    "48 hour – standard": 1800.0,
-    "5–7 days – scheduled": 1200.0,
-}
-
-# Vehicle type surcharges
-VEHICLE_SURCHARGES = {
-    "small_van": 0.0,
-    "small van": 0.0,
-    "small van (included)": 0.0,
-    "large_van": 200.0,
-    "large van": 200.0,
-    "large van (+£200)": 200.0,
-    "luton_van": 350.0,
-    "luton van": 350.0,
-    "luton van (+£350)": 350.0,
-    "7.5_tonne_truck": 500.0,
-    "7.5 tonne truck": 500.0,
-    "7.5 tonne truck (+£500)": 500.0,
-}
+def __getattr__(name):
+    # SLA_BASE_PRICES / VEHICLE_SURCHARGES follow the active rate card
+    if name == "SLA_BASE_PRICES":
+        return engine.sla_base_prices
+    if name == "VEHICLE_SURCHARGES":
+        return engine.vehicle_surcharges
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def reload_rate_card(db=None) -> bool:
+    """Swap in the active rate card if its version changed. Returns True on swap."""
+    global engine
+    from app.models.rate_card import RateCard
+
+    own_session = db is None
+    if own_session:
+        from app.database.db import SessionLocal
+        db = SessionLocal()
+    try:
+        with _reload_lock:
+            current = engine.version
+            # Cheap check first; only fetch the rules when the version moved
+            active_version = db.query(RateCard.version).filter(RateCard.is_active == True).scalar()
+            if active_version is None or active_version == current:
+                return False
+            card = db.get(RateCard, active_version)
+            new_engine = PricingEngine(json.loads(card.rules), version=card.version)
+            engine = new_engine
+            logger.info("Pricing rate card v%s active (was %s)", card.version, current or "bundled rules")
+            return True
+    finally:
+        if own_session:
+            db.close()
+
+class RateCardReloader:
+    """Keeps the engine snapshot in step with rate_cards via NOTIFY plus polling"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wake: Optional[asyncio.Event] = None
+
+    def _on_notify(self, payload: str):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _reload(self):
+        try:
+            await asyncio.to_thread(reload_rate_card)
+        except Exception as e:
+            # Keep quoting from the last good snapshot
+            logger.error("Rate card reload failed: %s", e)
+
+    async def _run(self):
+        while not self._stopping:
+            await self._reload()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=RELOAD_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        from app.core.events import listener
+
+        if self._task is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            listener.add_channel(RATE_CARD_CHANNEL, self._on_notify)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Singleton instance
+reloader = RateCardReloader()
 
 def calculate_job_price(
     property_size: str = None,
@@ -49,90 +245,12 @@ def calculate_job_price(
     Compliance: photo=+£50, council_pack=+£100, bio_clean=+£250
     Minimum: £350
     """
-    price = 250.0  # Base call-out fee
-    print(f"PRICING DEBUG - Starting price: {price}")
-    
-    # Property size
-    property_prices = {
-        "studio": 100, "1bed": 100, "1-bed": 100, "1": 100,
-        "2bed": 200, "2-bed": 200, "2": 200,
-        "3bed": 350, "3-bed": 350, "3": 350,
-        "4bed": 500, "4+bed": 500, "4-bed": 500, "4": 500, "5": 500
-    }
-    if property_size:
-        normalized_size = property_size.lower().replace(" ", "").replace("-", "")
-        property_add = property_prices.get(normalized_size, 0)
-        print(f"PRICING DEBUG - property_size: {property_size} -> normalized: {normalized_size} -> adding: {property_add}")
-        price += property_add
-    
-    # Van loads
-    if van_loads == 1:
-        print(f"PRICING DEBUG - van_loads: 1 -> adding: 150")
-        price += 150
-    elif van_loads == 2:
-        print(f"PRICING DEBUG - van_loads: 2 -> adding: 300")
-        price += 300
-    elif van_loads == 3:
-        print(f"PRICING DEBUG - van_loads: 3 -> adding: 450")
-        price += 450
-    elif van_loads >= 4:
-        print(f"PRICING DEBUG - van_loads: {van_loads} -> adding: 600")
-        price += 600
-    
-    # Waste type
-    waste_prices = {
-        "general": 0,
-        "furniture": furniture_items * 50 if furniture_items else 0,
-        "garden": 100,
-        "gardenwaste": 100,
-        "construction": 200,
-        "hazardous": 300,
-        "hoarder": 300
-    }
-    if waste_type:
-        normalized_waste = waste_type.lower().replace(" ", "").replace("_", "")
-        waste_add = waste_prices.get(normalized_waste, 0)
-        print(f"PRICING DEBUG - waste_type: {waste_type} -> normalized: {normalized_waste} -> furniture_items: {furniture_items} -> adding: {waste_add}")
-        price += waste_add
-    
-    # Access difficulty
-    if access_difficulty:
-        access_prices = {
-            "stairs": 100,
-            "parking": 100,
-            "long_carry": 100
-        }
-        for difficulty in access_difficulty:
-            normalized = difficulty.lower().strip().replace(" ", "_")
-            add_price = access_prices.get(normalized, 0)
-            print(f"PRICING DEBUG - access: {difficulty} -> normalized: {normalized} -> adding: {add_price}")
-            price += add_price
-    
-    # Urgency
-    urgency_prices = {
-        "standard": 0,
-        "48h": 0,
-        "24h": 150,
-        "same_day": 300
-    }
-    if urgency:
-        price += urgency_prices.get(urgency.lower().replace("-", "").replace(" ", ""), 0)
-    
-    # Compliance add-ons
-    if compliance_addons:
-        compliance_prices = {
-            "photo": 50,
-            "photo_report": 50,
-            "council_pack": 100,
-            "council_compliance_pack": 100,
-            "bio_clean": 250,
-            "deep_sanitation": 250
-        }
-        for addon in compliance_addons:
-            normalized = addon.lower().strip().replace(" ", "_")
-            add_price = compliance_prices.get(normalized, 0)
-            print(f"PRICING DEBUG - compliance: {addon} -> normalized: {normalized} -> adding: {add_price}")
-            price += add_price
-    
-    print(f"PRICING DEBUG - Final price: {price}")
-    return max(price, 350.0)
+    return get_engine().price(
+        property_size=property_size,
+        van_loads=van_loads,
+        waste_type=waste_type,
+        furniture_items=furniture_items,
+        access_difficulty=access_difficulty,
+        urgency=urgency,
+        compliance_addons=compliance_addons
+    )
@@ -0,0 +1,371 @@
+"""
+Token-bucket rate limiting for the unauthenticated endpoints.
+
+Registration, OTP, login, password reset, price estimates and job drafts can
+be called by anyone, and each call costs us an SMTP send, a Twilio SMS, a
+bcrypt hash or an S3 upload. RateLimitMiddleware checks every request that
+matches a rule in RULES before it reaches the router:
+
+  - each rule has one or more limits, keyed by the client IP and/or the
+    identifier in the JSON body (email or phone), so a single address can't
+    be flooded from many IPs and a single IP can't walk through addresses
+  - a limit is a bucket of `capacity` tokens refilled at `capacity / period`
+    tokens per second; a request takes one token from every bucket it maps
+    to, and is refused with 429 + Retry-After when any of them is empty;
+    a refused request gives back what it took from the others, so requests
+    refused on the caller's IP don't keep draining the identifier's bucket
+
+Rules are looked up by (method, path) in a dict, falling back to a short list
+of path patterns, and each bucket is a single keyed read-modify-write, so a
+check is O(1) in the number of clients tracked.
+
+Stores (RATE_LIMIT_STORE):
+  memory     per-worker LRU of buckets (default); limits are per worker
+  postgres   shared rate_limit_buckets table, one upsert per bucket; limits
+             hold across workers and deploys
+
+If the store fails, requests are let through (and logged): the limiter must
+never take the login page down with it.
+
+The client IP is the peer address from the ASGI scope. Behind
+RATE_LIMIT_PROXY_HOPS trusted proxies (1 on Heroku: its router) it is the
+address the outermost proxy saw, i.e. that many X-Forwarded-For entries from
+the right. Entries further left were sent by the client and are ignored, so
+a forged header can't buy a fresh bucket.
+
+Decisions are counted in rate_limit_decisions_total{rule,decision}.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from app.core.metrics import Counter, register
+from app.core.phone import normalize_phone
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+RATE_LIMIT_MEMORY_SIZE = int(os.getenv("RATE_LIMIT_MEMORY_SIZE", "100000"))
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))
+# Bodies larger than this are not parsed for an identifier (only IP limits apply)
+MAX_IDENTIFIER_BODY = 16 * 1024
+
+logger = logging.getLogger(__name__)
+
+DECISIONS = register(Counter(
+    "rate_limit_decisions_total", "Rate limiter decisions by rule", ("rule", "decision")
+))
+
+@dataclass(frozen=True)
+class Limit:
+    key: str          # "ip" or "identifier"
+    capacity: int     # burst size
+    period: float     # seconds to refill a full bucket
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    limits: Tuple[Limit, ...]
+    identifier_fields: Tuple[str, ...] = ()
+
+    @property
+    def needs_identifier(self) -> bool:
+        return any(limit.key == "identifier" for limit in self.limits)
+
+MINUTE, HOUR = 60.0, 3600.0
+
+# Sending a code: SMTP/Twilio per call
+OTP_SEND = Rule("otp_send", (Limit("ip", 10, HOUR), Limit("identifier", 5, HOUR)), ("identifier",))
+# Guessing a code: 6 digits, so keep attempts per identifier low
+OTP_VERIFY = Rule("otp_verify", (Limit("ip", 30, HOUR), Limit("identifier", 10, HOUR)), ("identifier",))
+
+RULES: Dict[Tuple[str, str], Rule] = {
+    ("POST", "/api/auth/register/client"): Rule(
+        "register", (Limit("ip", 5, HOUR), Limit("identifier", 3, HOUR)), ("email",)
+    ),
+    ("POST", "/api/auth/login/client"): Rule(
+        "login", (Limit("ip", 20, MINUTE), Limit("identifier", 10, 15 * MINUTE)), ("email",)
+    ),
+    ("POST", "/api/auth/resend-otp"): OTP_SEND,
+    ("POST", "/api/auth/forgot-password"): OTP_SEND,
+    ("POST", "/api/auth/resend-forgot-otp"): OTP_SEND,
+    ("POST", "/api/auth/verify-otp"): OTP_VERIFY,
+    ("POST", "/api/auth/verify-forgot-otp"): OTP_VERIFY,
+    ("GET", "/api/estimate-price"): Rule("estimate_price", (Limit("ip", 60, MINUTE),)),
+    ("POST", "/api/estimate-price"): Rule("estimate_price", (Limit("ip", 60, MINUTE),)),
+    ("POST", "/api/estimate-price/batch"): Rule("estimate_price_batch", (Limit("ip", 10, MINUTE),)),
+    ("GET", "/api/jobs/"): Rule("job_draft_read", (Limit("ip", 60, MINUTE),)),
+    ("POST", "/api/jobs/"): Rule("job_draft_create", (Limit("ip", 10, HOUR),)),
+}
+
+# Parameterised paths, tried only when the exact lookup misses
+PATTERN_RULES: List[Tuple[str, "re.Pattern", Rule]] = [
+    ("GET", re.compile(r"^/api/jobs/(?!confirm$)[^/]+$"), RULES[("GET", "/api/jobs/")]),
+]
+
+def match_rule(method: str, path: str) -> Optional[Rule]:
+    rule = RULES.get((method, path))
+    if rule is not None:
+        return rule
+    for rule_method, pattern, rule in PATTERN_RULES:
+        if rule_method == method and pattern.match(path):
+            return rule
+    return None
+
+# Stores. `take` removes `cost` tokens from the bucket if it has them and
+# returns 0, otherwise leaves it alone and returns the seconds until it will.
+# `refund` puts tokens taken by `take` back.
+
+class MemoryStore:
+    """Per-worker buckets: key -> (tokens, last refill), least recently used evicted first"""
+
+    def __init__(self, max_size: int = RATE_LIMIT_MEMORY_SIZE):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def refund(self, key: str, limit: Limit, cost: float = 1.0):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                tokens, updated = bucket
+                self._buckets[key] = (min(limit.capacity, tokens + cost), updated)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+# Refill and take in one statement; no row back means the bucket was short
+_TAKE = text("""
+    INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+    VALUES (:key, :capacity - :cost, now())
+    ON CONFLICT (key) DO UPDATE
+        SET tokens = LEAST(:capacity, rate_limit_buckets.tokens
+                     + EXTRACT(EPOCH FROM now() - rate_limit_buckets.updated_at) * :rate) - :cost,
+            updated_at = now()
+        WHERE LEAST(:capacity, rate_limit_buckets.tokens
+              + EXTRACT(EPOCH FROM now() - rate_limit_buckets.updated_at) * :rate) >= :cost
+    RETURNING tokens
+""")
+
+_WAIT = text("""
+    SELECT (:cost - LEAST(:capacity, tokens + EXTRACT(EPOCH FROM now() - updated_at) * :rate)) / :rate
+    FROM rate_limit_buckets WHERE key = :key
+""")
+
+_REFUND = text("UPDATE rate_limit_buckets SET tokens = LEAST(:capacity, tokens + :cost) WHERE key = :key")
+
+# Idle buckets are full again after their period; the longest is an hour
+_PURGE = text("DELETE FROM rate_limit_buckets WHERE updated_at < now() - interval '1 day'")
+PURGE_INTERVAL = 15 * MINUTE
+
+class PostgresStore:
+    """Buckets in rate_limit_buckets, shared by every worker"""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._next_purge = time.monotonic() + PURGE_INTERVAL
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.database.db import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        params = {"key": key, "capacity": limit.capacity, "rate": limit.rate, "cost": cost}
+        db = self._session()
+        try:
+            if db.execute(_TAKE, params).first() is not None:
+                wait = 0.0
+            else:
+                wait = max(db.execute(_WAIT, params).scalar() or 0.0, 0.0)
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + PURGE_INTERVAL
+                db.execute(_PURGE)
+            db.commit()
+            return wait
+        finally:
+            db.close()
+
+    def refund(self, key: str, limit: Limit, cost: float = 1.0):
+        db = self._session()
+        try:
+            db.execute(_REFUND, {"key": key, "capacity": limit.capacity, "cost": cost})
+            db.commit()
+        finally:
+            db.close()
+
+    def clear(self):
+        db = self._session()
+        try:
+            db.execute(text("DELETE FROM rate_limit_buckets"))
+            db.commit()
+        finally:
+            db.close()
+
+def create_store(kind: str = RATE_LIMIT_STORE):
+    if kind == "postgres":
+        return PostgresStore()
+    if kind != "memory":
+        logger.warning("Unknown RATE_LIMIT_STORE %r, using memory", kind)
+    return MemoryStore()
+
+# Middleware
+
+def client_ip(scope, proxy_hops: int = RATE_LIMIT_PROXY_HOPS) -> str:
+    if proxy_hops > 0:
+        forwarded = [
+            entry.strip()
+            for name, value in scope.get("headers", [])
+            if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",")
+            if entry.strip()
+        ]
+        # Each trusted proxy appends the address it received the request from
+        if len(forwarded) >= proxy_hops:
+            return forwarded[-proxy_hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def extract_identifier(body: bytes, fields: Tuple[str, ...]) -> Optional[str]:
+    if not body or len(body) > MAX_IDENTIFIER_BODY:
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    for field in fields:
+        value = data.get(field)
+        if isinstance(value, str) and value.strip():
+            value = value.strip().lower()
+            # One bucket per number however it is typed
+            return value if "@" in value else normalize_phone(value) or value
+    return None
+
+async def read_body(receive) -> Tuple[bytes, list]:
+    """Drain the request body, keeping the messages so they can be replayed to the app"""
+    messages, chunks = [], []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks), messages
+
+def replay(messages: list, receive):
+    pending = list(messages)
+
+    async def replayed():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replayed
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware; requests that match no rule pass straight through"""
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self.store = store if store is not None else create_store()
+        self._blocking = isinstance(self.store, PostgresStore)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = match_rule(scope["method"], scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        identifier = None
+        if rule.needs_identifier:
+            body, messages = await read_body(receive)
+            receive = replay(messages, receive)
+            identifier = extract_identifier(body, rule.identifier_fields)
+
+        wait = await self.check(rule, client_ip(scope), identifier)
+        if wait > 0:
+            await self.reject(send, wait)
+            return
+        await self.app(scope, receive, send)
+
+    async def check(self, rule: Rule, ip: str, identifier: Optional[str]) -> float:
+        keys = []
+        for limit in rule.limits:
+            value = ip if limit.key == "ip" else identifier
+            if value is not None:
+                keys.append((f"{rule.name}:{limit.key}:{value}", limit))
+        try:
+            if self._blocking:
+                wait = await asyncio.to_thread(self._take_all, keys)
+            else:
+                wait = self._take_all(keys)
+        except Exception:
+            logger.exception("Rate limit store failed for %s; allowing the request", rule.name)
+            DECISIONS.inc((rule.name, "error"))
+            return 0.0
+        DECISIONS.inc((rule.name, "limited" if wait > 0 else "allowed"))
+        return wait
+
+    def _take_all(self, keys) -> float:
+        # All or nothing: an allowed request is charged to every bucket, so one
+        # identifier can't be hammered by rotating IPs or vice versa; a refused
+        # one gives back what it took, so it can't drain anyone else's bucket
+        taken = []
+        for key, limit in keys:
+            wait = self.store.take(key, limit)
+            if wait > 0:
+                for taken_key, taken_limit in taken:
+                    self.store.refund(taken_key, taken_limit)
+                return wait
+            taken.append((key, limit))
+        return 0.0
+
+    async def reject(self, send, wait: float):
+        body = json.dumps({"detail": "Too many requests, please try again later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,18 +1,70 @@
 from passlib.context import CryptContext
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
 from jose import jwt, JWTError
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-SECRET_KEY = "your-secret-key-change-in-production"
-REFRESH_SECRET_KEY = "your-refresh-secret-key-change-in-production"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-REFRESH_TOKEN_EXPIRE_DAYS = 7
+load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# "development" may run on the built-in keys below; anywhere else they are refused
+APP_ENV = os.getenv("APP_ENV", "production").lower()
+
+# The keys tokens were signed with before they moved to config, and the values
+# .env.example still ships. They are public: anyone can forge tokens with them.
+_LEGACY_SECRET_KEY = "your-secret-key-change-in-production"
+_LEGACY_REFRESH_SECRET_KEY = "your-refresh-secret-key-change-in-production"
+
+SECRET_KEY = os.getenv("SECRET_KEY") or _LEGACY_SECRET_KEY
+REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY") or _LEGACY_REFRESH_SECRET_KEY
+if SECRET_KEY == _LEGACY_SECRET_KEY or REFRESH_SECRET_KEY == _LEGACY_REFRESH_SECRET_KEY:
+    if APP_ENV != "development":
+        raise RuntimeError(
+            "SECRET_KEY and REFRESH_SECRET_KEY must be set to private values (APP_ENV=development allows the built-in keys)"
+        )
+    logger.warning("SECRET_KEY / REFRESH_SECRET_KEY not set; signing tokens with the built-in development keys")
+
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+# "jose" (python-jose, the default) or "pyjwt" (optional: pip install PyJWT)
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose").lower()
+# Verified tokens kept per worker, each until its exp (0 disables)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+# bcrypt work factor. Each +1 doubles the cost (12 is roughly 250ms of CPU).
+# Hashes at any other cost are rewritten at the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so a thread pool gives real parallelism; size it
+# to the cores a worker may spend on hashing
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash requests allowed to queue before logins are answered with 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_pending = 0
+
 def hash_password(password: str) -> str:
     # Truncate password to 72 bytes for bcrypt compatibility
     if len(password.encode('utf-8')) > 72:
@@ -22,41 +74,136 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def _run_hasher(func, *args):
+    """Run a bcrypt call on the hashing pool so it never blocks the event loop"""
+    global _hash_pending
+    if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Too many sign-ins in progress, please retry", headers={"Retry-After": "1"})
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hasher(hash_password, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password off the event loop. Returns (valid, new_hash): new_hash is
+    set when the stored hash used a different cost and should be saved.
+    """
+    return await _run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
+
+class _PyJWTBackend:
+    """Same encode/decode surface as jose.jwt, backed by PyJWT"""
+
+    def __init__(self):
+        import jwt as pyjwt
+        self._jwt = pyjwt
+        self.error = pyjwt.PyJWTError
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithms: list) -> dict:
+        return self._jwt.decode(token, key, algorithms=algorithms)
+
+class _JoseBackend:
+    error = JWTError
+
+    encode = staticmethod(jwt.encode)
+    decode = staticmethod(jwt.decode)
+
+def _load_backend():
+    if JWT_BACKEND == "pyjwt":
+        try:
+            return _PyJWTBackend()
+        except ImportError:
+            logger.warning("JWT_BACKEND=pyjwt but PyJWT is not installed; using python-jose")
+    return _JoseBackend()
+
+_backend = _load_backend()
+
+class TokenCache:
+    """LRU of sha256(token) -> verified claims, each entry dropped at the token's exp"""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: bytes, claims: dict):
+        exp = claims.get("exp")
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._entries[key] = (exp, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache()
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return _backend.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
+    return _backend.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_refresh_token(token: str):
     try:
-        payload = jwt.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _backend.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
         if payload.get("type") != "refresh":
             return None
         return payload
     except:
         return None
 
+def decode_access_token(token: str) -> Optional[dict]:
+    """Verified claims of a token signed with SECRET_KEY, or None. Repeat presentations are served from token_cache."""
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        try:
+            claims = _backend.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except _backend.error:
+            return None
+        token_cache.put(key, claims)
+    # Callers get their own copy; the cached claims stay as verified
+    return dict(claims)
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("type") != "access":
-            raise HTTPException(status_code=401, detail="Invalid token type")
-        return payload
-    except JWTError:
+    payload = decode_access_token(credentials.credentials)
+    if payload is None:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if payload.get("type") != "access":
+        raise HTTPException(status_code=401, detail="Invalid token type")
+    return payload
 
 def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("type") != "access":
-            return None
-        return payload
-    except JWTError:
+    payload = decode_access_token(token)
+    if payload is None or payload.get("type") != "access":
         return None
+    return payload
@@ -1,73 +1,175 @@
+"""
+SMS one-time codes through Twilio Verify.
+
+One Twilio client is shared by the worker; its HTTP session keeps
+connections to the API open between calls, so an OTP doesn't pay a new TLS
+handshake. Handlers use `send_otp_sms_async` / `verify_otp_sms_async`, which
+run the blocking call on a thread and give up after SMS_TIMEOUT seconds.
+
+SMS_BACKEND=fake swaps Twilio for an in-memory stand-in (local development
+and benchmarks): codes are kept per number and can be read back with
+`backend.last_code(phone_number)`; SMS_FAKE_CODE fixes the code.
+
+Every send and check is timed in sms_otp_duration_seconds{operation,outcome}
+and, with metrics enabled, shows up as the "twilio" span in Server-Timing.
+"""
+import asyncio
 import os
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
 from dotenv import load_dotenv
+from app.core.lazy import is_available, lazy_import
+from app.core.metrics import Histogram, register, span
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_VERIFY_SERVICE_SID = os.getenv("TWILIO_VERIFY_SERVICE_SID")
+SMS_BACKEND = os.getenv("SMS_BACKEND", "twilio").lower()
+SMS_TIMEOUT = float(os.getenv("SMS_TIMEOUT", "10"))
+SMS_FAKE_CODE = os.getenv("SMS_FAKE_CODE")
+
+TWILIO_AVAILABLE = is_available("twilio")
+if SMS_BACKEND == "twilio" and not TWILIO_AVAILABLE:
+    logger.warning("Twilio not installed. SMS OTP will be disabled. Install with: pip install twilio")
+
+twilio_rest = lazy_import("twilio.rest")
+twilio_http = lazy_import("twilio.http.http_client")
+
+OTP_DURATION = register(Histogram(
+    "sms_otp_duration_seconds", "SMS OTP send and verify latency", ("operation", "outcome")
+))
+
+def _e164(phone_number: str) -> str:
+    # Stored numbers are already E.164 (app/core/phone.py); this covers legacy rows
+    return phone_number if phone_number.startswith("+") else f"+{phone_number}"
+
+class TwilioBackend:
+    """Twilio Verify through one client per worker, created on first use"""
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def configured(self) -> bool:
+        if not TWILIO_AVAILABLE:
+            logger.warning("SMS OTP requested but Twilio not installed")
+            return False
+        if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not TWILIO_VERIFY_SERVICE_SID:
+            logger.warning("Twilio not configured, SMS OTP not sent")
+            return False
+        return True
+
+    @property
+    def service(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    http_client = twilio_http.TwilioHttpClient(pool_connections=True, timeout=SMS_TIMEOUT)
+                    self._client = twilio_rest.Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=http_client)
+        return self._client.verify.v2.services(TWILIO_VERIFY_SERVICE_SID)
+
+    def send(self, phone_number: str) -> bool:
+        # Twilio generates the code
+        verification = self.service.verifications.create(to=phone_number, channel="sms")
+        logger.info("SMS OTP sent, status: %s", verification.status)
+        return True
+
+    def check(self, phone_number: str, otp: str) -> bool:
+        verification_check = self.service.verification_checks.create(to=phone_number, code=otp)
+        logger.debug("OTP verification status: %s", verification_check.status)
+        return verification_check.status == "approved"
+
+class FakeBackend:
+    """Twilio Verify stand-in: one pending code per number, approved once"""
 
-try:
-    from twilio.rest import Client
-    TWILIO_AVAILABLE = True
-except ImportError:
-    TWILIO_AVAILABLE = False
-    print("Twilio not installed. SMS OTP will be disabled. Install with: pip install twilio")
+    def __init__(self, code: Optional[str] = SMS_FAKE_CODE):
+        self.code = code
+        self.codes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def configured(self) -> bool:
+        return True
+
+    def send(self, phone_number: str) -> bool:
+        with self._lock:
+            self.codes[phone_number] = self.code or f"{random.randint(0, 999999):06d}"
+        logger.info("SMS OTP recorded by the fake backend for %s", phone_number)
+        return True
+
+    def check(self, phone_number: str, otp: str) -> bool:
+        with self._lock:
+            if otp and self.codes.get(phone_number) == otp:
+                del self.codes[phone_number]
+                return True
+        return False
+
+    def last_code(self, phone_number: str) -> Optional[str]:
+        with self._lock:
+            return self.codes.get(_e164(phone_number))
+
+def create_backend(kind: str = SMS_BACKEND):
+    if kind == "fake":
+        return FakeBackend()
+    if kind != "twilio":
+        logger.warning("Unknown SMS_BACKEND %r, using twilio", kind)
+    return TwilioBackend()
+
+backend = create_backend()
 
 def send_otp_sms(phone_number: str, otp: str = None):
-    """Send OTP via Twilio Verify API
+    """Send OTP via Twilio Verify API (blocking)
     If otp is provided, it's ignored (Twilio generates OTP automatically)
     """
-    if not TWILIO_AVAILABLE:
-        print(f"SMS OTP requested but Twilio not installed. OTP: {otp}")
+    if not backend.configured():
         return False
-    
-    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not TWILIO_VERIFY_SERVICE_SID:
-        print(f"Twilio not configured. OTP: {otp}")
-        return False
-    
+    start = time.perf_counter()
+    outcome = "error"
     try:
-        # Format phone number to E.164 format if not already
-        if not phone_number.startswith("+"):
-            phone_number = f"+{phone_number}"
-        
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        
-        # Use Twilio Verify API - let Twilio generate the OTP
-        verification = client.verify.v2.services(TWILIO_VERIFY_SERVICE_SID).verifications.create(
-            to=phone_number,
-            channel='sms'
-        )
-        
-        print(f"SMS OTP sent successfully. Status: {verification.status}")
-        return True
+        with span("twilio"):
+            sent = backend.send(_e164(phone_number))
+        outcome = "sent" if sent else "error"
+        return sent
     except Exception as e:
-        print(f"Failed to send SMS OTP: {e}")
+        logger.error("Failed to send SMS OTP: %s", e)
         return False
+    finally:
+        OTP_DURATION.observe(time.perf_counter() - start, ("send", outcome))
 
 def verify_otp_sms(phone_number: str, otp: str):
-    """Verify OTP via Twilio Verify API"""
-    if not TWILIO_AVAILABLE:
-        return False
-    
-    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not TWILIO_VERIFY_SERVICE_SID:
+    """Verify OTP via Twilio Verify API (blocking)"""
+    if not backend.configured():
         return False
-    
+    start = time.perf_counter()
+    outcome = "error"
     try:
-        # Format phone number to E.164 format if not already
-        if not phone_number.startswith("+"):
-            phone_number = f"+{phone_number}"
-        
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        
-        # Verify the OTP
-        verification_check = client.verify.v2.services(TWILIO_VERIFY_SERVICE_SID).verification_checks.create(
-            to=phone_number,
-            code=otp
-        )
-        
-        print(f"OTP verification status: {verification_check.status}")
-        return verification_check.status == "approved"
+        with span("twilio"):
+            approved = backend.check(_e164(phone_number), otp)
+        outcome = "approved" if approved else "rejected"
+        return approved
     except Exception as e:
-        print(f"Failed to verify OTP: {e}")
+        logger.error("Failed to verify OTP: %s", e)
         return False
+    finally:
+        OTP_DURATION.observe(time.perf_counter() - start, ("verify", outcome))
+
+async def _off_loop(operation: str, func, *args) -> bool:
+    try:
+        # The HTTP client has the same timeout; this bounds the wait for a thread as well
+        return await asyncio.wait_for(asyncio.to_thread(func, *args), SMS_TIMEOUT + 1)
+    except asyncio.TimeoutError:
+        logger.error("SMS OTP %s timed out after %.0fs", operation, SMS_TIMEOUT)
+        OTP_DURATION.observe(SMS_TIMEOUT + 1, (operation, "timeout"))
+        return False
+
+async def send_otp_sms_async(phone_number: str, otp: str = None) -> bool:
+    return await _off_loop("send", send_otp_sms, phone_number, otp)
+
+async def verify_otp_sms_async(phone_number: str, otp: str) -> bool:
+    return await _off_loop("verify", verify_otp_sms, phone_number, otp)
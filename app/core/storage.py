@@ -1,17 +1,24 @@
-import boto3
-from botocore.client import Config
-from botocore.exceptions import ClientError
 import os
 from dotenv import load_dotenv
 from typing import Optional
+import threading
 import uuid
 import urllib3
+import logging
+from app.core.lazy import lazy_import
+from app.core.metrics import span
+
+boto3 = lazy_import("boto3")
+botocore_client = lazy_import("botocore.client")
+botocore_exceptions = lazy_import("botocore.exceptions")
 
 # Suppress SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class UthoStorage:
     def __init__(self):
         self.access_key = os.getenv("UTHO_ACCESS_KEY")
@@ -19,16 +26,29 @@ class UthoStorage:
         self.bucket_name = os.getenv("UTHO_BUCKET_NAME")
         self.endpoint_url = os.getenv("UTHO_ENDPOINT_URL")
         self.region = os.getenv("UTHO_REGION", "in-noida-1")
-        
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=self.access_key,
-            aws_secret_access_key=self.secret_key,
-            endpoint_url=self.endpoint_url,
-            region_name=self.region,
-            config=Config(signature_version='s3v4'),
-            verify=False  # Disable SSL verification for Utho
-        )
+        self._s3_client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def s3_client(self):
+        """Built on first use, so importing this module (every worker boot) stays cheap"""
+        if self._s3_client is None:
+            with self._client_lock:
+                if self._s3_client is None:
+                    self._s3_client = boto3.client(
+                        's3',
+                        aws_access_key_id=self.access_key,
+                        aws_secret_access_key=self.secret_key,
+                        endpoint_url=self.endpoint_url,
+                        region_name=self.region,
+                        config=botocore_client.Config(signature_version='s3v4'),
+                        verify=False  # Disable SSL verification for Utho
+                    )
+        return self._s3_client
+
+    @s3_client.setter
+    def s3_client(self, client):
+        self._s3_client = client
     
     def upload_file(self, file_data, folder: str, filename: str) -> Optional[str]:
         """
@@ -45,18 +65,19 @@ class UthoStorage:
         try:
             object_key = f"{folder}/{filename}"
             
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=file_data,
-                ACL='public-read'
-            )
+            with span("storage"):
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=object_key,
+                    Body=file_data,
+                    ACL='public-read'
+                )
             
             file_url = f"{self.endpoint_url}/{self.bucket_name}/{object_key}"
             return file_url
             
-        except ClientError as e:
-            print(f"Error uploading file: {e}")
+        except botocore_exceptions.ClientError as e:
+            logger.error("Error uploading file: %s", e)
             return None
     
     def upload_crew_document(self, file_data, crew_id: str, doc_type: str, filename: str) -> Optional[str]:
@@ -126,6 +147,18 @@ class UthoStorage:
         unique_filename = f"profile_{uuid.uuid4().hex[:8]}_{filename}"
         return self.upload_file(file_data, folder, unique_filename)
     
+    def upload_thumbnail(self, file_data, source_url: str) -> Optional[str]:
+        """
+        Upload a JPEG thumbnail of a stored photo, under thumbnails/ with the photo's own path
+        """
+        try:
+            object_key = source_url.split(f"{self.bucket_name}/")[1]
+        except IndexError:
+            logger.error("Not a file in this bucket: %s", source_url)
+            return None
+        folder, _, filename = f"thumbnails/{object_key}".rpartition("/")
+        return self.upload_file(file_data, folder, f"{filename}.jpg")
+    
     def delete_file(self, file_url: str) -> bool:
         """
         Delete file from storage
@@ -138,10 +171,11 @@ class UthoStorage:
         """
         try:
             object_key = file_url.split(f"{self.bucket_name}/")[1]
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=object_key)
+            with span("storage"):
+                self.s3_client.delete_object(Bucket=self.bucket_name, Key=object_key)
             return True
         except Exception as e:
-            print(f"Error deleting file: {e}")
+            logger.error("Error deleting file: %s", e)
             return False
     
     def download_file(self, file_url: str) -> Optional[bytes]:
@@ -161,10 +195,11 @@ class UthoStorage:
             else:
                 object_key = file_url
             
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=object_key)
-            return response['Body'].read()
+            with span("storage"):
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=object_key)
+                return response['Body'].read()
         except Exception as e:
-            print(f"Error downloading file: {e}")
+            logger.error("Error downloading file: %s", e)
             return None
 
 # Singleton instance
@@ -1,11 +1,17 @@
 #test
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 import os
+import logging
+import time
 from pathlib import Path
 from dotenv import load_dotenv
+from app.core.metrics import METRICS_ENABLED, Gauge, record_pool_checkout, register
+
+logger = logging.getLogger(__name__)
 
 # Get the directory where this file is located
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -14,9 +20,9 @@ ENV_FILE = BASE_DIR / ".env"
 # Load .env file from the project root
 if ENV_FILE.exists():
     load_dotenv(ENV_FILE, override=True)
-    print(f"Loaded .env from: {ENV_FILE}")
+    logger.info("Loaded .env from: %s", ENV_FILE)
 else:
-    print(f"Warning: .env file not found at {ENV_FILE}")
+    logger.warning(".env file not found at %s", ENV_FILE)
     load_dotenv(override=True)  # Try to load from current directory as fallback
 
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -28,43 +34,132 @@ if not DATABASE_URL:
 if 'defaultdb' in DATABASE_URL:
     DATABASE_URL = DATABASE_URL.replace('defaultdb', 'packers')
 
-print(f"Using DATABASE_URL: {DATABASE_URL[:50]}...")
+logger.info("Using DATABASE_URL: %s", make_url(DATABASE_URL).render_as_string(hide_password=True))
+
+# Connection pool. Size it so that workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# stays below the server's max_connections. DB_POOL_MODE=pgbouncer keeps no
+# connections in the worker (NullPool) and leaves pooling to PgBouncer.
+POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait before answering 503
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+if POOL_MODE not in ("queue", "pgbouncer"):
+    raise ValueError(f"DB_POOL_MODE must be 'queue' or 'pgbouncer', not '{POOL_MODE}'")
+
+class _TimedCheckout:
+    """Pool mixin reporting how long each checkout waited (see app.core.metrics)"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            record_pool_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        record_pool_checkout(time.perf_counter() - start)
+        return connection
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
 
-# For async operations - convert psycopg2 to asyncpg if needed
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+def pool_options(metrics: bool = METRICS_ENABLED) -> dict:
+    if POOL_MODE == "pgbouncer":
+        # A fresh connection per checkout is cheap through PgBouncer, so pinging it is wasted work
+        return {"poolclass": TimedNullPool if metrics else NullPool}
+    return {
+        "poolclass": TimedQueuePool if metrics else QueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+# For async operations - convert psycopg2 to asyncpg if needed.
+# Built on first use (see __getattr__): nothing at runtime needs it yet, and
+# creating it imports asyncpg on every worker boot.
 async_url = DATABASE_URL.replace("postgresql+psycopg2://", "postgresql+asyncpg://")
-async_engine = create_async_engine(async_url, pool_pre_ping=True)
-AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+        options = pool_options(metrics=False)
+        if POOL_MODE == "queue":
+            del options["poolclass"]  # asyncio needs its own queue pool class, the default
+        else:
+            # PgBouncer in transaction mode cannot keep asyncpg's prepared statements
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        _async_engine = create_async_engine(async_url, **options)
+        _AsyncSessionLocal = sessionmaker(_async_engine, class_=AsyncSession, expire_on_commit=False)
+    return _async_engine
+
+def __getattr__(name):
+    # Keeps `from app.database.db import async_engine, AsyncSessionLocal` working
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "AsyncSessionLocal":
+        get_async_engine()
+        return _AsyncSessionLocal
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # For sync operations
 sync_url = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql+psycopg2://")
 engine = create_engine(
     sync_url,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    pool_size=5,
-    max_overflow=10,
-    echo=False  # Disable SQL logging in production
+    echo=False,  # Disable SQL logging in production
+    **pool_options()
 )
+
+if METRICS_ENABLED and POOL_MODE == "queue":
+    register(Gauge("db_pool_size", "Connections the pool keeps open", lambda: POOL_SIZE))
+    register(Gauge("db_pool_capacity", "Most connections the pool will open", lambda: POOL_SIZE + MAX_OVERFLOW))
+    register(Gauge("db_pool_checked_out", "Connections currently in use", lambda: engine.pool.checkedout()))
+    register(Gauge(
+        "db_pool_saturation", "Share of the pool's capacity in use",
+        lambda: engine.pool.checkedout() / (POOL_SIZE + MAX_OVERFLOW)
+    ))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Tables that predate the migrations, which only alter them. Every table added
+# since is created by its own migration, with its triggers, partial indexes and
+# backfills, so init_db must leave those to Alembic.
+LEGACY_TABLES = (
+    "clients", "urgency_levels", "service_types", "waste_types", "access_difficulties", "jobs", "invoices", "payments",
+)
+
 async def init_db_async():
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    tables = [Base.metadata.tables[name] for name in LEGACY_TABLES]
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
 
 def init_db():
-    print(f"Creating tables in database: {engine.url.database}")
-    Base.metadata.create_all(bind=engine, checkfirst=True)
+    """Create the missing legacy tables (models must be imported). Run before `alembic upgrade head`."""
+    logger.info("Creating tables in database: %s", engine.url.database)
+    tables = [Base.metadata.tables[name] for name in LEGACY_TABLES]
+    Base.metadata.create_all(bind=engine, tables=tables, checkfirst=True)
 
 async def get_async_db():
-    async with AsyncSessionLocal() as session:
+    get_async_engine()
+    async with _AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
 
 def get_db():
+    # The connection is checked out on first use, so requests answered from a
+    # cache never take one; if the pool is exhausted then, main.py answers 503
     db = SessionLocal()
     try:
         yield db
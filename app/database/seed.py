@@ -0,0 +1,55 @@
+"""
+Reference data for a fresh database.
+
+Each lookup table is filled only while it is empty, so rows an admin has
+renamed or removed are never put back. Run through `python -m app.cli seed`
+(or `setup`), not at worker startup.
+"""
+import logging
+from app.models.service_type import ServiceType
+from app.models.waste_type import WasteType
+from app.models.access_difficulty import AccessDifficulty
+from app.models.urgency_level import UrgencyLevel
+
+logger = logging.getLogger(__name__)
+
+SEED_DATA = [
+    (ServiceType, [
+        {"name": "Emergency Clearance", "description": "Urgent same-day service"},
+        {"name": "House Clearance", "description": "Full property clearance"},
+        {"name": "Office Clearance", "description": "Commercial spaces"},
+        {"name": "Garden Clearance", "description": "Outdoor waste removal"},
+    ]),
+    (WasteType, [
+        {"name": "General waste", "description": "Household items"},
+        {"name": "Furniture/appliances", "description": "Large items"},
+        {"name": "Garden waste", "description": "Green waste"},
+        {"name": "Construction waste", "description": "Building materials"},
+        {"name": "Hazardous waste", "description": "Special handling"},
+        {"name": "Electronic waste", "description": "WEEE items"},
+    ]),
+    (AccessDifficulty, [
+        {"name": "Ground floor", "description": "Easy access"},
+        {"name": "Stairs (no lift)", "description": "Manual carrying"},
+        {"name": "Restricted parking", "description": "Limited vehicle access"},
+        {"name": "Long carry distance", "description": "Extended walking"},
+    ]),
+    (UrgencyLevel, [
+        {"name": "Standard", "sla_hours": 72},
+        {"name": "Urgent", "sla_hours": 48},
+        {"name": "Emergency", "sla_hours": 24},
+    ]),
+]
+
+def seed_reference_data(db) -> dict:
+    """Fill empty lookup tables in one transaction. Returns rows added per table."""
+    added = {}
+    for model, rows in SEED_DATA:
+        if db.query(model.id).first() is not None:
+            continue
+        db.add_all(model(**row) for row in rows)
+        added[model.__tablename__] = len(rows)
+    db.commit()
+    for table, count in added.items():
+        logger.info("Seeded %s %s", count, table)
+    return added
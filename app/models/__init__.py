@@ -5,6 +5,13 @@ from app.models.service_type import ServiceType
 from app.models.waste_type import WasteType
 from app.models.access_difficulty import AccessDifficulty
 from app.models.job import Job
+from app.models.job_draft import JobDraft
+from app.models.job_media import JobMedia
 from app.models.invoice import Invoice
+from app.models.crew_rating import CrewRating
+from app.models.outbox_event import OutboxEvent
+from app.models.rate_card import RateCard
+from app.models.rate_limit_bucket import RateLimitBucket
+from app.models.idempotency_key import IdempotencyKey
 
-__all__ = ["Client", "UrgencyLevel", "ServiceType", "WasteType", "AccessDifficulty", "Job", "Invoice"]
+__all__ = ["Client", "UrgencyLevel", "ServiceType", "WasteType", "AccessDifficulty", "Job", "JobDraft", "JobMedia", "Invoice", "CrewRating", "OutboxEvent", "RateCard", "RateLimitBucket", "IdempotencyKey"]
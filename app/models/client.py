@@ -1,11 +1,15 @@
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Index, or_, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import uuid
 from datetime import datetime, timedelta, timezone
 from app.database.db import Base
+from app.core.phone import normalize_phone
 import random
 import secrets
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Client(Base):
     __tablename__ = "clients"
@@ -14,7 +18,7 @@ class Client(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
     full_name = Column(String)
-    phone_number = Column(String)
+    phone_number = Column(String, index=True)  # E.164
     client_type = Column(String)
     business_address = Column(String)
     profile_photo = Column(String, nullable=True)
@@ -31,9 +35,35 @@ class Client(Base):
     # Relationships
     invoices = relationship("Invoice", back_populates="client")
 
+    __table_args__ = (
+        # Maintenance worker: expired codes and tokens still set (only a handful at any time)
+        Index("ix_clients_otp_expiry", "otp_expiry", postgresql_where=text("otp_expiry IS NOT NULL")),
+        Index("ix_clients_reset_otp_expiry", "reset_otp_expiry", postgresql_where=text("reset_otp_expiry IS NOT NULL")),
+        Index("ix_clients_reset_token_expiry", "reset_token_expiry", postgresql_where=text("reset_token_expiry IS NOT NULL")),
+    )
+
+    @validates("phone_number")
+    def _normalize_phone_number(self, key, value):
+        return normalize_phone(value) or value
+
     @staticmethod
     def get_by_email(db, email: str):
         return db.query(Client).filter(Client.email == email).first()
+
+    @staticmethod
+    def resolve(db, identifier: str):
+        """Client by email or phone number, in one query (both columns are indexed)"""
+        if not identifier:
+            return None
+        phone = normalize_phone(identifier) if "@" not in identifier else None
+        if phone is None:
+            return Client.get_by_email(db, identifier)
+        return (
+            db.query(Client)
+            .filter(or_(Client.email == identifier, Client.phone_number == phone))
+            .order_by((Client.email == identifier).desc())
+            .first()
+        )
     
     @staticmethod
     def create(db, email: str, password: str, full_name: str = None, phone_number: str = None, client_type: str = None, business_address: str = None, otp_method: str = "email"):
@@ -66,68 +96,58 @@ class Client(Base):
             return user.id, otp, otp_method
         except Exception as e:
             db.rollback()
-            print(f"Error creating client: {e}")
+            logger.error("Error creating client: %s", e)
             return None, None, None
     
     @staticmethod
-    def verify_otp(db, identifier: str, otp: str):
-        print(f"[verify_otp] Checking identifier: {identifier}, OTP: {otp}")
-        
-        # Try email first
-        user = db.query(Client).filter(Client.email == identifier).first()
+    async def verify_otp(db, identifier: str, otp: str):
+        """Mark the client verified if the OTP matches. Returns the client, or None."""
+        logger.debug("verify_otp: checking identifier %s", identifier)
         
-        # If not found, try phone
-        if not user:
-            user = db.query(Client).filter(Client.phone_number == identifier).first()
+        user = Client.resolve(db, identifier)
         
         if not user:
-            print(f"[verify_otp] User not found")
-            return False
+            logger.debug("verify_otp: user not found")
+            return None
         
-        print(f"[verify_otp] User found: {user.email}, OTP method: {user.otp_method}")
-        print(f"[verify_otp] Stored OTP: {user.otp}, Expiry: {user.otp_expiry}")
+        logger.debug("verify_otp: user %s, OTP method %s, expiry %s", user.email, user.otp_method, user.otp_expiry)
         
         # If phone OTP, verify with Twilio
         if user.otp_method == "phone":
-            print(f"[verify_otp] Using Twilio verification for phone: {user.phone_number}")
-            from app.core.sms import verify_otp_sms
-            if verify_otp_sms(user.phone_number, otp):
+            logger.debug("verify_otp: using Twilio verification for phone %s", user.phone_number)
+            from app.core.sms import verify_otp_sms_async
+            phone_number = user.phone_number
+            # End the read transaction so the connection goes back to the pool during the check
+            db.commit()
+            if await verify_otp_sms_async(phone_number, otp):
                 user.is_verified = True
                 user.otp = None
                 user.otp_expiry = None
                 db.commit()
-                print(f"[verify_otp] Phone OTP verified successfully")
-                return True
-            print(f"[verify_otp] Phone OTP verification failed")
-            return False
+                logger.debug("verify_otp: phone OTP verified")
+                return user
+            logger.debug("verify_otp: phone OTP verification failed")
+            return None
         
         # Email OTP - verify from database
-        print(f"[verify_otp] Using database verification for email")
         if user.otp == otp and datetime.now(timezone.utc).replace(tzinfo=None) < user.otp_expiry:
             user.is_verified = True
             user.otp = None
             user.otp_expiry = None
             db.commit()
-            print(f"[verify_otp] Email OTP verified successfully")
-            return True
+            logger.debug("verify_otp: email OTP verified")
+            return user
         
-        print(f"[verify_otp] Email OTP verification failed - OTP mismatch or expired")
-        return False
+        logger.debug("verify_otp: email OTP mismatch or expired")
+        return None
     
     @staticmethod
     def resend_otp(db, identifier: str, otp_method: str = "email"):
-        # Try email first
-        user = db.query(Client).filter(Client.email == identifier).first()
-        
-        # If not found, try phone
-        if not user:
-            user = db.query(Client).filter(Client.phone_number == identifier).first()
+        """Issue a new registration OTP. Returns (client, otp, otp_method); client is None if not found or already verified."""
+        user = Client.resolve(db, identifier)
         
-        if not user:
-            return None, None
-        
-        if user.is_verified:
-            return None, None
+        if not user or user.is_verified:
+            return None, None, None
         
         # For phone OTP, don't store OTP in DB (Twilio generates it)
         if otp_method == "phone":
@@ -143,4 +163,4 @@ class Client(Base):
         user.otp_method = otp_method
         db.commit()
         
-        return otp, otp_method
+        return user, otp, otp_method
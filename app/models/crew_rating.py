@@ -0,0 +1,43 @@
+from sqlalchemy import Column, String, Float, Integer, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime
+from app.database.db import Base
+
+class CrewRating(Base):
+    """Running rating aggregate per crew, maintained alongside jobs.rating"""
+    __tablename__ = "crew_ratings"
+
+    crew_id = Column(String, primary_key=True)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def average(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @staticmethod
+    def record(db, crew_id: str, rating: float):
+        """Add one rating to the crew aggregate. Does not commit - runs in the caller's transaction."""
+        stmt = insert(CrewRating).values(
+            crew_id=crew_id,
+            rating_sum=rating,
+            rating_count=1,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CrewRating.crew_id],
+            set_={
+                "rating_sum": CrewRating.rating_sum + stmt.excluded.rating_sum,
+                "rating_count": CrewRating.rating_count + 1,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def get_average(db, crew_id: str):
+        aggregate = db.get(CrewRating, crew_id)
+        return aggregate.average if aggregate else None
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, Index
+from datetime import datetime
+from app.database.db import Base
+
+class IdempotencyKey(Base):
+    """First response to a request sent with an Idempotency-Key (app/core/idempotency.py)"""
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String, primary_key=True)  # who sent it, e.g. the client id
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)  # sha256 of the request it was first used with
+    status = Column(String, nullable=False, default="in_progress")  # in_progress, completed
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON
+    locked_until = Column(DateTime, nullable=False)  # in_progress claims older than this were abandoned
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Expiry sweep (maintenance worker)
+        Index("ix_idempotency_keys_expires", "expires_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.types import Numeric
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -19,4 +19,11 @@ class Invoice(Base):
     status = Column(String, default="generated")
     generated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
-    client = relationship("Client", back_populates="invoices")
\ No newline at end of file
+    client = relationship("Client", back_populates="invoices")
+    
+    __table_args__ = (
+        # One invoice per job; generate_paid_invoice relies on it to stay idempotent
+        Index("uq_invoices_job_id", "job_id", unique=True),
+        # Invoice history: WHERE client_id = ? ORDER BY generated_at DESC, id DESC
+        Index("ix_invoices_client_generated", "client_id", "generated_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Float, Integer, Boolean
+from sqlalchemy import Column, String, Text, DateTime, Float, Integer, Boolean, Index, text
 from datetime import datetime, timezone
 from app.database.db import Base
 import uuid
@@ -32,3 +32,12 @@ class Job(Base):
     rating = Column(Float, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Client list endpoints: WHERE client_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_jobs_client_created", "client_id", "created_at", "id"),
+        # Status filtered client views ordered by created_at (quotes) or updated_at (completed, cancelled, accepted)
+        Index("ix_jobs_client_status_created", "client_id", "status", "created_at"),
+        Index("ix_jobs_client_status_updated", "client_id", "status", "updated_at"),
+        Index("ix_jobs_assigned_crew_id", "assigned_crew_id", postgresql_where=text("assigned_crew_id IS NOT NULL")),
+    )
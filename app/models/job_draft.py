@@ -0,0 +1,76 @@
+from sqlalchemy import Column, String, Text, DateTime, Index, text
+from datetime import datetime
+from app.database.db import Base
+import json
+import uuid
+
+# Job columns a draft carries over when it is confirmed
+DRAFT_FIELDS = (
+    "property_address", "preferred_date", "preferred_time", "service_type", "urgency_level",
+    "property_size", "van_loads", "waste_types", "furniture_items", "property_photos",
+)
+
+class JobDraft(Base):
+    """Anonymous estimate, kept out of `jobs` until a client confirms it"""
+    __tablename__ = "job_drafts"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    data = Column(Text, nullable=False)  # JSON object of DRAFT_FIELDS
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # The expiry sweep (oldest first)
+        Index("ix_job_drafts_created", "created_at", "id"),
+    )
+
+    @property
+    def fields(self) -> dict:
+        return json.loads(self.data)
+
+    @fields.setter
+    def fields(self, values: dict):
+        self.data = json.dumps({key: values.get(key) for key in DRAFT_FIELDS})
+
+    @staticmethod
+    def get_active(db, draft_id: str, cutoff: datetime):
+        return db.query(JobDraft).filter(JobDraft.id == draft_id, JobDraft.created_at >= cutoff).first()
+
+    @staticmethod
+    def promote(db, draft_id: str, client_id: str, cutoff: datetime):
+        """
+        Turn a draft into a Job owned by `client_id`, keeping its id, with its
+        photos recorded in job_media. The draft is deleted and the job inserted
+        in the caller's transaction, so it is promoted exactly once even if
+        confirmed twice at the same time.
+        Returns None if there is no such unexpired draft. Does not commit.
+        """
+        from app.models.job import Job
+        from app.models.job_media import JobMedia
+        from app.core import outbox
+        from app.core.media import thumbnail_events
+
+        row = db.execute(
+            text("DELETE FROM job_drafts WHERE id = :id AND created_at >= :cutoff RETURNING data, created_at"),
+            {"id": draft_id, "cutoff": cutoff}
+        ).first()
+        if row is None:
+            return None
+        fields = json.loads(row.data)
+        photos = json.loads(fields.pop("property_photos", None) or "[]")
+        job = Job(
+            id=draft_id,
+            client_id=client_id,
+            status="job_created",
+            created_at=row.created_at,
+            updated_at=datetime.utcnow(),
+            property_photos=",".join(photos),
+            **{key: fields.get(key) for key in DRAFT_FIELDS if key != "property_photos"},
+        )
+        job.preferred_time = job.preferred_time or ""
+        db.add(job)
+        if photos:
+            media = JobMedia.add_all(db, draft_id, "property", [{"url": url} for url in photos])
+            db.flush()
+            for payload in thumbnail_events([item.id for item in media]):
+                outbox.enqueue(db, "media.thumbnail", payload)
+        return job
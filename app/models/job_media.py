@@ -0,0 +1,97 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, Index, bindparam, text
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from app.database.db import Base
+import uuid
+
+# property: uploaded by the client with the request; before/after: crew photos (mirrored from job_photos)
+MEDIA_KINDS = ("property", "before", "after")
+# Photos of each kind per job in list views (?include=photos)
+PHOTOS_PER_JOB = 4
+
+class JobMedia(Base):
+    """One photo of a job, with what list views need to show it without fetching the file"""
+    __tablename__ = "job_media"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # MEDIA_KINDS
+    url = Column(Text, nullable=False)
+    content_type = Column(String, nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    width = Column(Integer, nullable=True)  # filled in with the thumbnail
+    height = Column(Integer, nullable=True)
+    thumbnail_url = Column(Text, nullable=True)
+    position = Column(Integer, nullable=False, default=0, server_default="0")  # order within (job, kind)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Photos of a job in display order, and the first photo of each job (LIMIT 1 per job_id)
+        Index("ix_job_media_job_kind_position", "job_id", "kind", "position", "created_at"),
+    )
+
+    @staticmethod
+    def add_all(db, job_id: str, kind: str, photos: Iterable[dict]) -> List["JobMedia"]:
+        """Record uploaded photos ({url, content_type, size_bytes}) in order. Does not commit."""
+        media = [JobMedia(job_id=job_id, kind=kind, position=position, **photo) for position, photo in enumerate(photos)]
+        db.add_all(media)
+        return media
+
+    @staticmethod
+    def first_per_job(db, job_ids: List[str], kind: str = "property") -> Dict[str, dict]:
+        """First photo of each job, one index probe per job"""
+        if not job_ids:
+            return {}
+        rows = db.execute(
+            text("""
+                SELECT ids.job_id, m.url, m.thumbnail_url, m.width, m.height
+                FROM unnest(CAST(:ids AS varchar[])) AS ids(job_id)
+                CROSS JOIN LATERAL (
+                    SELECT url, thumbnail_url, width, height FROM job_media
+                    WHERE job_id = ids.job_id AND kind = :kind
+                    ORDER BY position, created_at LIMIT 1
+                ) m
+            """),
+            {"ids": list(job_ids), "kind": kind}
+        ).fetchall()
+        return {
+            row.job_id: {"url": row.url, "thumbnail_url": row.thumbnail_url, "width": row.width, "height": row.height}
+            for row in rows
+        }
+
+    @staticmethod
+    def for_jobs(
+        db, job_ids: List[str], kinds: Iterable[str] = MEDIA_KINDS, per_job: Optional[int] = PHOTOS_PER_JOB
+    ) -> Dict[str, Dict[str, List[dict]]]:
+        """
+        Photos of many jobs in one query, grouped by job then kind, in display
+        order. `per_job` caps the photos of each kind per job (None: all).
+        Jobs without photos get empty lists.
+        """
+        kinds = list(kinds)
+        grouped = {job_id: {kind: [] for kind in kinds} for job_id in job_ids}
+        if not grouped:
+            return grouped
+        rows = db.execute(
+            text("""
+                SELECT job_id, kind, url, thumbnail_url, width, height FROM (
+                    SELECT job_id, kind, url, thumbnail_url, width, height,
+                           row_number() OVER (PARTITION BY job_id, kind ORDER BY position, created_at) AS n
+                    FROM job_media
+                    WHERE job_id = ANY(:ids) AND kind = ANY(:kinds)
+                ) m
+                WHERE :per_job IS NULL OR n <= :per_job
+                ORDER BY job_id, kind, n
+            """).bindparams(bindparam("per_job", type_=Integer)),
+            {"ids": list(grouped), "kinds": kinds, "per_job": per_job}
+        ).fetchall()
+        for row in rows:
+            grouped[row.job_id][row.kind].append(
+                {"url": row.url, "thumbnail_url": row.thumbnail_url, "width": row.width, "height": row.height}
+            )
+        return grouped
+
+    @staticmethod
+    def for_job(db, job_id: str, kinds: Iterable[str] = MEDIA_KINDS) -> Dict[str, List[dict]]:
+        """All photos of one job grouped by kind, in display order"""
+        return JobMedia.for_jobs(db, [job_id], kinds, per_job=None)[job_id]
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, Index, text
+from datetime import datetime
+from app.database.db import Base
+import uuid
+
+class OutboxEvent(Base):
+    """Side effect recorded in the same transaction as the state change that caused it"""
+    __tablename__ = "outbox_events"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    event_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String, nullable=False, default="pending")  # pending, delivered, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # next attempt / lease expiry
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Relay claim: WHERE status = 'pending' AND available_at <= now ORDER BY available_at
+        Index("ix_outbox_events_pending", "available_at", postgresql_where=text("status = 'pending'")),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, Boolean
+from sqlalchemy import Column, String, Float, DateTime, Boolean, Index, text
 from datetime import datetime
 from app.database.db import Base
 import uuid
@@ -21,3 +21,12 @@ class Payment(Base):
     refund_amount = Column(Float, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Deposit / remaining lookups: WHERE job_id = ? AND payment_type = ? AND payment_status = ?
+        Index("ix_payments_job_type_status", "job_id", "payment_type", "payment_status"),
+        # Checkout confirmation: WHERE transaction_id = :session_id
+        Index("ix_payments_transaction_id", "transaction_id", postgresql_where=text("transaction_id IS NOT NULL")),
+        # Payment history: WHERE client_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_payments_client_created", "client_id", "created_at", "id"),
+    )
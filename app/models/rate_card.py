@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, Index, text
+from datetime import datetime
+from app.database.db import Base
+import json
+
+class RateCard(Base):
+    """Versioned pricing rules. Exactly one version is active at a time."""
+    __tablename__ = "rate_cards"
+
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    rules = Column(Text, nullable=False)  # JSON, same shape as app/core/pricing_rules.json
+    is_active = Column(Boolean, nullable=False, default=False)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    activated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ux_rate_cards_active", "is_active", unique=True, postgresql_where=text("is_active")),
+    )
+
+    @staticmethod
+    def get_active(db):
+        return db.query(RateCard).filter(RateCard.is_active == True).first()
+
+    @staticmethod
+    def publish(db, rules: dict, note: str = None, activate: bool = True):
+        """Store a new version, validating that it compiles first. Does not commit."""
+        from app.core.pricing import PricingEngine
+        PricingEngine(rules)
+
+        card = RateCard(rules=json.dumps(rules), note=note)
+        if activate:
+            db.query(RateCard).filter(RateCard.is_active == True).update(
+                {RateCard.is_active: False}, synchronize_session=False
+            )
+            card.is_active = True
+            card.activated_at = datetime.utcnow()
+        db.add(card)
+        db.flush()
+        return card
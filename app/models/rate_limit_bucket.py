@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Float, DateTime, func
+from app.database.db import Base
+
+class RateLimitBucket(Base):
+    """Token bucket state for the postgres rate limit store (app/core/rate_limit.py)"""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)  # rule:ip|identifier:value
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())  # last refill
@@ -1,4 +1,4 @@
 # Routers package
-from . import auth, job, urgency_level, invoice, job_draft, pricing, service_type, waste_type, access_difficulty, payment
+from . import auth, job, urgency_level, invoice, job_draft, pricing, service_type, waste_type, access_difficulty, payment, metrics
 
-__all__ = ["auth", "job", "urgency_level", "invoice", "job_draft", "pricing", "service_type", "waste_type", "access_difficulty", "payment"]
+__all__ = ["auth", "job", "urgency_level", "invoice", "job_draft", "pricing", "service_type", "waste_type", "access_difficulty", "payment", "metrics"]
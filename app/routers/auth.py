@@ -5,36 +5,38 @@ from sqlalchemy import or_
 from app.schemas.auth import ClientRegister, Login, Token, MessageResponse, RefreshTokenRequest, VerifyOTP, UpdateClientProfile, ResendOTP, ForgotPassword, VerifyForgotOTP, ResetPassword
 from app.models.client import Client
 from app.database.db import get_db
-from app.core.security import hash_password, verify_password, create_access_token, create_refresh_token, verify_refresh_token, get_current_user
+from app.core.security import hash_password_async, verify_and_update_password, create_access_token, create_refresh_token, verify_refresh_token
+from app.core.current_client import get_current_client
 from app.core.email import send_otp_email
-from app.core.sms import send_otp_sms
+from app.core.sms import send_otp_sms_async, verify_otp_sms_async
 from app.core.storage import storage
 import os
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.post("/register/client", response_model=MessageResponse, tags=["Authentication"])
 async def register_client(client: ClientRegister, db: Session = Depends(get_db)):
     try:
-        print(f"Registration attempt for: {client.email}")
+        logger.debug("Registration attempt for %s", client.email)
         
         existing_client = Client.get_by_email(db, client.email)
         if existing_client:
-            print(f"Email already exists: {client.email}")
+            logger.debug("Email already registered: %s", client.email)
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        # Check for duplicate phone number
+        # Check for duplicate phone number (already E.164, see ClientRegister)
         if client.phone_number:
-            existing_phone = db.query(Client).filter(Client.phone_number == client.phone_number).first()
+            existing_phone = db.query(Client.id).filter(Client.phone_number == client.phone_number).first()
             if existing_phone:
-                print(f"Phone number already exists: {client.phone_number}")
+                logger.debug("Phone number already registered: %s", client.phone_number)
                 raise HTTPException(status_code=400, detail="Phone number already registered")
         
-        print(f"Creating client record...")
         result = Client.create(
             db=db,
             email=client.email,
-            password=hash_password(client.password),
+            password=await hash_password_async(client.password),
             full_name=client.full_name,
             phone_number=client.phone_number,
             client_type=client.client_type,
@@ -42,26 +44,22 @@ async def register_client(client: ClientRegister, db: Session = Depends(get_db))
             otp_method=client.otp_method
         )
         
-        print(f"Client.create result: {result}")
-        
         if not result or not result[0]:
-            print("Registration failed - Client.create returned None")
+            logger.error("Registration failed - Client.create returned None for %s", client.email)
             raise HTTPException(status_code=400, detail="Registration failed - database error")
         
         user_id, otp, otp_method = result
-        print(f"User created: ID={user_id}, OTP={otp}, Method={otp_method}")
+        logger.info("Client registered: id=%s, otp_method=%s", user_id, otp_method)
         
         # Send OTP SYNCHRONOUSLY (like crew_admin_backend)
         try:
             if otp_method == "email":
-                print(f"Sending OTP via email to {client.email}")
                 send_otp_email(client.email, otp)
             elif otp_method == "phone":
-                print(f"Sending OTP via SMS to {client.phone_number}")
-                send_otp_sms(client.phone_number, otp)
+                await send_otp_sms_async(client.phone_number, otp)
         except Exception as e:
-            print(f"OTP send failed: {e}")
             # Don't fail registration, but log the error
+            logger.error("OTP send failed: %s", e)
         
         # Return success
         if otp_method == "email":
@@ -69,37 +67,18 @@ async def register_client(client: ClientRegister, db: Session = Depends(get_db))
         else:
             return {"message": "Registration successful. OTP sent to your phone."}
     
-    except HTTPException as http_ex:
-        print(f"HTTP Exception: {http_ex.detail}")
+    except HTTPException:
         raise
     except Exception as e:
-        print(f"Registration error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Registration error")
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @router.post("/verify-otp", response_model=Token, summary="Verify Registration OTP", tags=["Authentication"])
 async def verify_otp(data: VerifyOTP, db: Session = Depends(get_db)):
-    print(f"Verify OTP request - Identifier: {data.identifier}, OTP: {data.otp}")
-    
-    if not Client.verify_otp(db, data.identifier, data.otp):
-        print(f"OTP verification failed for: {data.identifier}")
-        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
-    
-    print(f"OTP verified successfully for: {data.identifier}")
-    
-    # Try email first
-    user = Client.get_by_email(db, data.identifier)
-    
-    # If not found, try phone
+    user = await Client.verify_otp(db, data.identifier, data.otp)
     if not user:
-        user = db.query(Client).filter(Client.phone_number == data.identifier).first()
-    
-    if not user:
-        print(f"User not found after verification: {data.identifier}")
-        raise HTTPException(status_code=400, detail="User not found")
-    
-    print(f"Generating tokens for user: {user.email}")
+        logger.info("OTP verification failed for %s", data.identifier)
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
     
     access_token = create_access_token(
         data={"sub": str(user.id), "role": "client"}
@@ -113,30 +92,23 @@ async def verify_otp(data: VerifyOTP, db: Session = Depends(get_db)):
 @router.post("/resend-otp", response_model=MessageResponse, tags=["Authentication"])
 async def resend_otp(data: ResendOTP, db: Session = Depends(get_db)):
     try:
-        result = Client.resend_otp(db, data.identifier, data.otp_method)
-        otp, otp_method = result
-        
-        if not otp:
-            raise HTTPException(status_code=400, detail="User not found or already verified")
+        user, otp, otp_method = Client.resend_otp(db, data.identifier, data.otp_method)
         
-        # Try email first
-        user = Client.get_by_email(db, data.identifier)
-        
-        # If not found, try phone
         if not user:
-            user = db.query(Client).filter(Client.phone_number == data.identifier).first()
+            raise HTTPException(status_code=400, detail="User not found or already verified")
         
-        if not user:
-            raise HTTPException(status_code=400, detail="User not found")
+        email, phone_number = user.email, user.phone_number
+        # End the read transaction so the connection goes back to the pool during the send
+        db.commit()
         
         # Send OTP SYNCHRONOUSLY
         try:
             if otp_method == "email":
-                send_otp_email(user.email, otp)
+                send_otp_email(email, otp)
             elif otp_method == "phone":
-                send_otp_sms(user.phone_number, otp)
+                await send_otp_sms_async(phone_number, otp)
         except Exception as e:
-            print(f"OTP send failed: {e}")
+            logger.error("OTP send failed: %s", e)
         
         # Return success
         if otp_method == "email":
@@ -147,7 +119,7 @@ async def resend_otp(data: ResendOTP, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Resend OTP error: {e}")
+        logger.exception("Resend OTP error")
         raise HTTPException(status_code=500, detail=f"Failed to resend OTP: {str(e)}")
 
 @router.post("/login/client", response_model=Token, tags=["Authentication"])
@@ -160,9 +132,15 @@ async def login_client(credentials: Login, db: Session = Depends(get_db)):
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Please verify your email first")
     
-    if not verify_password(credentials.password, user.password):
+    valid, new_hash = await verify_and_update_password(credentials.password, user.password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        user.password = new_hash
+        db.commit()
+    
     access_token = create_access_token(
         data={"sub": str(user.id), "role": "client"}
     )
@@ -194,10 +172,7 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 @router.get("/client/profile", tags=["Client"])
-async def get_client_profile(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Client not found")
+async def get_client_profile(user: Client = Depends(get_current_client)):
     return {
         "id": user.id,
         "email": user.email,
@@ -214,13 +189,9 @@ async def get_client_profile(current_user: dict = Depends(get_current_user), db:
 async def update_client_profile(
     business_address: str = Form(None),
     profile_photo: UploadFile = File(None),
-    current_user: dict = Depends(get_current_user),
+    user: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    user = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     if business_address:
         user.business_address = business_address
     
@@ -251,73 +222,59 @@ async def forgot_password(data: ForgotPassword, db: Session = Depends(get_db)):
         import random
         from datetime import datetime, timedelta
         
-        print(f"Forgot password request - Identifier: {data.identifier}, Method: {data.otp_method}")
+        logger.debug("Forgot password request for %s via %s", data.identifier, data.otp_method)
         
-        # Try email first
-        user = Client.get_by_email(db, data.identifier)
+        user = Client.resolve(db, data.identifier)
         
-        # If not found, try phone
         if not user:
-            user = db.query(Client).filter(Client.phone_number == data.identifier).first()
-        
-        if not user:
-            print(f"User not found for identifier: {data.identifier}")
+            logger.debug("Forgot password: no user for %s", data.identifier)
         elif not user.is_verified:
-            print(f"User found but not verified: {data.identifier}")
+            logger.debug("Forgot password: user %s not verified", data.identifier)
         elif user and user.is_verified:
-            print(f"User found and verified: {user.email}")
             user.otp_method = data.otp_method
             
             # For phone OTP, use Twilio (no DB storage)
             if data.otp_method == "phone":
-                print(f"Sending phone OTP to: {user.phone_number}")
                 user.reset_otp = None
                 user.reset_otp_expiry = None
                 db.commit()
                 try:
-                    result = send_otp_sms(user.phone_number)
-                    print(f"Phone OTP send result: {result}")
+                    await send_otp_sms_async(user.phone_number)
                 except Exception as e:
-                    print(f"Forgot password SMS OTP send failed: {e}")
+                    logger.error("Forgot password SMS OTP send failed: %s", e)
             else:
                 # For email OTP, store in DB
                 otp = str(random.randint(100000, 999999))  # 6-digit OTP
-                print(f"Generated email OTP: {otp} for {user.email}")
                 user.reset_otp = otp
                 user.reset_otp_expiry = datetime.utcnow() + timedelta(minutes=5)
                 db.commit()
                 try:
                     send_otp_email(user.email, otp)
-                    print(f"Email OTP sent to: {user.email}")
                 except Exception as e:
-                    print(f"Forgot password email OTP send failed: {e}")
+                    logger.error("Forgot password email OTP send failed: %s", e)
         
         return {"message": "If account exists, OTP has been sent"}
     
     except Exception as e:
-        print(f"Forgot password error: {e}")
+        logger.exception("Forgot password error")
         raise HTTPException(status_code=500, detail=f"Failed to process request: {str(e)}")
 
 @router.post("/verify-forgot-otp", response_model=MessageResponse, tags=["Authentication"])
 async def verify_forgot_otp(data: VerifyForgotOTP, db: Session = Depends(get_db)):
     import secrets
     from datetime import datetime, timedelta
-    from app.core.sms import verify_otp_sms
-    
-    # Try email first
-    user = Client.get_by_email(db, data.identifier)
     
-    # If not found, try phone
-    if not user:
-        user = db.query(Client).filter(Client.phone_number == data.identifier).first()
+    user = Client.resolve(db, data.identifier)
     
     if not user:
         raise HTTPException(status_code=400, detail="Invalid OTP")
     
     # Verify based on OTP method
     if user.otp_method == "phone":
-        # Verify with Twilio
-        if not verify_otp_sms(user.phone_number, data.otp):
+        # Verify with Twilio, without holding a pooled connection during the call
+        phone_number = user.phone_number
+        db.commit()
+        if not await verify_otp_sms_async(phone_number, data.otp):
             raise HTTPException(status_code=400, detail="Invalid OTP")
     else:
         # Verify from database for email
@@ -343,12 +300,7 @@ async def resend_forgot_otp(data: ForgotPassword, db: Session = Depends(get_db))
         import random
         from datetime import datetime, timedelta
         
-        # Try email first
-        user = Client.get_by_email(db, data.identifier)
-        
-        # If not found, try phone
-        if not user:
-            user = db.query(Client).filter(Client.phone_number == data.identifier).first()
+        user = Client.resolve(db, data.identifier)
         
         if user:
             user.otp_method = data.otp_method
@@ -359,9 +311,9 @@ async def resend_forgot_otp(data: ForgotPassword, db: Session = Depends(get_db))
                 user.reset_otp_expiry = None
                 db.commit()
                 try:
-                    send_otp_sms(user.phone_number)
+                    await send_otp_sms_async(user.phone_number)
                 except Exception as e:
-                    print(f"Resend forgot password SMS OTP failed: {e}")
+                    logger.error("Resend forgot password SMS OTP failed: %s", e)
             else:
                 # For email OTP, store in DB
                 otp = str(random.randint(100000, 999999))  # 6-digit OTP
@@ -371,12 +323,12 @@ async def resend_forgot_otp(data: ForgotPassword, db: Session = Depends(get_db))
                 try:
                     send_otp_email(user.email, otp)
                 except Exception as e:
-                    print(f"Resend forgot password email OTP failed: {e}")
+                    logger.error("Resend forgot password email OTP failed: %s", e)
         
         return {"message": "If account exists, OTP has been resent"}
     
     except Exception as e:
-        print(f"Resend forgot password OTP error: {e}")
+        logger.exception("Resend forgot password OTP error")
         raise HTTPException(status_code=500, detail=f"Failed to resend OTP: {str(e)}")
 
 @router.post("/reset-password", response_model=MessageResponse, tags=["Authentication"])
@@ -397,7 +349,7 @@ async def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
     if user.reset_token_expiry < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Reset token expired")
     
-    user.password = hash_password(data.new_password)
+    user.password = await hash_password_async(data.new_password)
     user.reset_token = None
     user.reset_token_expiry = None
     
@@ -1,32 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from app.database.db import get_db
 from app.models.invoice import Invoice
 from app.models.client import Client
 from app.models.job import Job
-from app.core.security import get_current_user
-from typing import List
+from app.core.current_client import get_current_client
+from app.core.pagination import LIMIT_DESCRIPTION, MAX_PAGE_SIZE, paginate, parse_status_filter, apply_date_range, set_next_cursor
+from typing import List, Optional
 from datetime import datetime
 import os
 import io
 import random
 import tempfile
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 
 router = APIRouter()
 
 @router.get("/client/invoices", tags=["Client"])
 async def get_invoice_history(
-    current_user: dict = Depends(get_current_user),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=LIMIT_DESCRIPTION),
+    cursor: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status", description="Comma separated invoice statuses"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    query = db.query(Invoice).filter(Invoice.client_id == client.id)
+    statuses = parse_status_filter(status_filter)
+    if statuses:
+        query = query.filter(Invoice.status.in_(statuses))
+    query = apply_date_range(query, Invoice.generated_at, date_from, date_to)
     
-    invoices = db.query(Invoice).filter(Invoice.client_id == client.id).order_by(Invoice.generated_at.desc()).all()
+    invoices, next_cursor = paginate(query, Invoice.generated_at, Invoice.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     
     invoice_list = []
     for invoice in invoices:
@@ -50,23 +58,21 @@ async def get_invoice_history(
             "property_address": job.property_address if job else "N/A"
         })
     
-    return {"total_invoices": len(invoice_list), "invoices": invoice_list}
+    return {"total_invoices": len(invoice_list), "invoices": invoice_list, "next_cursor": next_cursor}
 
 @router.get("/client/invoices/{invoice_id}/download", tags=["Client"])
 async def download_invoice(
     invoice_id: str,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
     from app.models.payment import Payment
     from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
     from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.pdfgen import canvas
     from reportlab.platypus import Table, TableStyle
     
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
-    
     invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
     if not invoice:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
@@ -1,17 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.database.db import get_db
+from app.database.db import get_db, SessionLocal
 from app.models.job import Job
 from app.models.client import Client
+from app.models.job_media import JobMedia
+from app.models.crew_rating import CrewRating
 from app.schemas.job import CreateJob, JobResponse
-from app.core.security import get_current_user
+from app.core.security import verify_token
+from app.core.current_client import get_current_client
+from app.core.events import broker as event_broker, format_sse
+from app.core import idempotency, outbox
 from app.core.pricing import calculate_job_price
 from app.core.storage import storage
+from app.core.media import thumbnail_events
 from app.core.location import geocode_address, haversine_distance
+from app.core.pagination import LIMIT_DESCRIPTION, MAX_PAGE_SIZE, paginate, parse_status_filter, parse_include, apply_date_range, set_next_cursor
 from typing import Optional, List
+from datetime import datetime
+import asyncio
+import logging
 import os
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+optional_security = HTTPBearer(auto_error=False)
+
+TRACKING_HEARTBEAT_SECONDS = 15
+TRACKING_TERMINAL_STATUSES = ["job_completed", "cancelled"]
+LIST_INCLUDES = ("photos",)
 
 @router.post("/jobs", response_model=JobResponse, tags=["Jobs"], summary="Create Request")
 async def create_request(
@@ -27,13 +47,10 @@ async def create_request(
     additional_information: Optional[str] = Form(None),
     access_difficulty: Optional[str] = Form(None),
     property_photos: List[UploadFile] = File(default=[]),
-    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     if not service_type or not urgency_level or not property_address or not preferred_date or not preferred_time:
         raise HTTPException(status_code=400, detail="service_type, urgency_level, property_address, preferred_date, and preferred_time are required")
     
@@ -43,22 +60,57 @@ async def create_request(
     if not urgency_level_obj:
         raise HTTPException(status_code=400, detail="Invalid urgency_level")
     
-    image_paths = []
-    if property_photos:
-        for img in property_photos:
-            if img.filename:
-                try:
-                    photo_url = storage.upload_client_job_photo(img.file, str(client.id), "temp_job", img.filename)
-                    if photo_url:
-                        image_paths.append(photo_url)
-                except Exception as e:
-                    print(f"Failed to upload photo {img.filename}: {e}")
-    
-    # Geocode job address
-    lat, lon = geocode_address(property_address)
-    
+    # A retried request replays the first response instead of creating (and dispatching) a second job
+    claim = None
+    if idempotency_key is not None:
+        claim = await idempotency.claim(db, str(client.id), idempotency_key, idempotency.fingerprint(
+            "POST /api/jobs", service_type, urgency_level, property_size, van_loads, waste_types,
+            furniture_items, property_address, preferred_date, preferred_time, additional_information,
+            access_difficulty, [(img.filename, img.size) for img in property_photos]
+        ))
+        if isinstance(claim, Response):
+            return claim
+    client_id = str(client.id)
+    # End the lookup transaction: no connection is held while uploading and geocoding
+    db.commit()
+    try:
+        uploaded, (lat, lon) = await run_in_threadpool(
+            _upload_and_geocode, client_id, property_address, property_photos
+        )
+        job = _create_job(
+            db, client_id, service_type, urgency_level, property_size, van_loads, waste_types, furniture_items,
+            property_address, preferred_date, preferred_time, additional_information, uploaded, lat, lon
+        )
+        if claim is not None:
+            claim.complete(db, 200, jsonable_encoder(JobResponse.model_validate(job)))
+        db.commit()
+    except BaseException:
+        if claim is not None:
+            claim.release(db)
+        raise
+    db.refresh(job)
+    return job
+
+def _upload_and_geocode(client_id: str, property_address: str, property_photos: List[UploadFile]):
+    """Photo uploads and geocoding, the slow part of creating a job. Does not touch the database."""
+    uploaded = []
+    for img in property_photos or []:
+        if img.filename:
+            try:
+                photo_url = storage.upload_client_job_photo(img.file, client_id, "temp_job", img.filename)
+                if photo_url:
+                    uploaded.append({"url": photo_url, "content_type": img.content_type, "size_bytes": img.size})
+            except Exception as e:
+                logger.error("Failed to upload photo %s: %s", img.filename, e)
+    return uploaded, geocode_address(property_address)
+
+def _create_job(
+    db, client_id, service_type, urgency_level, property_size, van_loads, waste_types, furniture_items,
+    property_address, preferred_date, preferred_time, additional_information, uploaded, lat, lon
+) -> Job:
+    """The job row, its photos and crew dispatch. Flushes, does not commit."""
     job = Job(
-        client_id=str(client.id),
+        client_id=client_id,
         service_type=service_type,
         urgency_level=urgency_level,
         property_size=property_size,
@@ -68,7 +120,7 @@ async def create_request(
         property_address=property_address,
         preferred_date=preferred_date,
         preferred_time=preferred_time,
-        property_photos=",".join(image_paths) if image_paths else "",
+        property_photos=",".join(photo["url"] for photo in uploaded),
         additional_information=additional_information,
         status='job_created',
         latitude=lat,
@@ -76,10 +128,15 @@ async def create_request(
     )
     
     db.add(job)
-    db.commit()
-    db.refresh(job)
+    db.flush()  # assigns job.id for the assignment email and the photos
+    
+    if uploaded:
+        media = JobMedia.add_all(db, job.id, "property", uploaded)
+        db.flush()
+        for payload in thumbnail_events([item.id for item in media]):
+            outbox.enqueue(db, "media.thumbnail", payload)
     
-    # Auto-assign to nearest available crew
+    # Auto-assign to nearest available crew, in the same transaction as the job itself
     if lat and lon:
         from sqlalchemy import text
         crews = db.execute(
@@ -91,18 +148,28 @@ async def create_request(
             job.assigned_crew_id = nearest_crew[0]
             job.status = 'crew-dispatched'
             db.execute(text("UPDATE crew SET status = 'assigned' WHERE id = :crew_id"), {"crew_id": nearest_crew[0]})
-            db.commit()
-            db.refresh(job)
             
-            # Send notification email
-            from app.core.email import send_job_assignment_email
-            send_job_assignment_email(nearest_crew[1], nearest_crew[2], job.id, property_address, preferred_date)
-    
+            # Notification email is delivered by the outbox relay after commit
+            outbox.enqueue(db, "email.job_assignment", {
+                "crew_email": nearest_crew[1],
+                "crew_name": nearest_crew[2],
+                "job_id": job.id,
+                "address": property_address,
+                "scheduled_date": preferred_date
+            })
+    
+    db.flush()
     return job
 
 @router.get("/jobs", tags=["Jobs"], summary="Active Jobs - Currently in Progress")
 async def get_all_requests(
-    current_user: dict = Depends(get_current_user),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=LIMIT_DESCRIPTION),
+    cursor: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="Comma separated job statuses"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
     from sqlalchemy import text
@@ -110,11 +177,14 @@ async def get_all_requests(
     from app.models.service_type import ServiceType
     from app.models.urgency_level import UrgencyLevel
     
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
+    query = db.query(Job).filter(Job.client_id == str(client.id))
+    statuses = parse_status_filter(status)
+    if statuses:
+        query = query.filter(Job.status.in_(statuses))
+    query = apply_date_range(query, Job.created_at, date_from, date_to)
     
-    jobs = db.query(Job).filter(Job.client_id == str(client.id)).order_by(Job.created_at.desc()).all()
+    jobs, next_cursor = paginate(query, Job.created_at, Job.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     
     result = []
     for job in jobs:
@@ -165,13 +235,9 @@ async def submit_job_rating(
     job_id: str,
     rating: float = Form(...),
     review: Optional[str] = Form(None),
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     job = db.query(Job).filter(Job.id == job_id, Job.client_id == str(client.id)).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -185,7 +251,16 @@ async def submit_job_rating(
     if job.rating is not None:
         raise HTTPException(status_code=400, detail="Job already rated")
     
-    job.rating = rating
+    # Conditional update so two concurrent submissions can't both count towards the crew aggregate
+    updated = db.query(Job).filter(Job.id == job.id, Job.rating == None).update(
+        {Job.rating: rating}, synchronize_session=False
+    )
+    if not updated:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Job already rated")
+    
+    if job.assigned_crew_id:
+        CrewRating.record(db, job.assigned_crew_id, rating)
     db.commit()
     
     return {
@@ -197,13 +272,9 @@ async def submit_job_rating(
 @router.get("/jobs/{job_id}/rating", tags=["Jobs"])
 async def get_job_rating(
     job_id: str,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     job = db.query(Job).filter(Job.id == job_id, Job.client_id == str(client.id)).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -218,16 +289,12 @@ async def get_job_rating(
 async def cancel_job(
     job_id: str,
     cancellation_reason: str = Form(...),
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
     from sqlalchemy import text
     from app.models.payment import Payment
     
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     job = db.query(Job).filter(Job.id == job_id, Job.client_id == str(client.id)).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -273,13 +340,9 @@ async def cancel_job(
 
 @router.get("/client/quotes", tags=["Client"], summary="Get All Quotes for Client")
 async def get_client_quotes(
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     jobs = db.query(Job).filter(
         Job.client_id == str(client.id),
         Job.status.in_(["quote_sent", "quote_accepted", "quote_rejected"])
@@ -314,13 +377,9 @@ async def get_client_quotes(
 @router.get("/client/quotes/{job_id}", tags=["Client"], summary="Get Quote Details by ID")
 async def get_quote_by_id(
     job_id: str,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     job = db.query(Job).filter(
         Job.id == job_id,
         Job.client_id == str(client.id)
@@ -356,13 +415,9 @@ async def get_quote_by_id(
 @router.post("/client/quotes/{job_id}/approve", tags=["Client"], summary="Approve Quote")
 async def approve_quote(
     job_id: str,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     job = db.query(Job).filter(
         Job.id == job_id,
         Job.client_id == str(client.id)
@@ -387,13 +442,9 @@ async def approve_quote(
 async def decline_quote(
     job_id: str,
     decline_reason: str = Form(...),
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     job = db.query(Job).filter(
         Job.id == job_id,
         Job.client_id == str(client.id)
@@ -418,18 +469,27 @@ async def decline_quote(
 
 @router.get("/client/tracking", tags=["Client"], summary="Job Tracking - Get All Active Jobs")
 async def get_job_tracking(
-    current_user: dict = Depends(get_current_user),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=LIMIT_DESCRIPTION),
+    cursor: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="Comma separated job statuses"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     # Get all jobs including completed (exclude only cancelled)
-    jobs = db.query(Job).filter(
+    query = db.query(Job).filter(
         Job.client_id == str(client.id),
         Job.status != "cancelled"
-    ).order_by(Job.created_at.desc()).all()
+    )
+    statuses = parse_status_filter(status)
+    if statuses:
+        query = query.filter(Job.status.in_(statuses))
+    query = apply_date_range(query, Job.created_at, date_from, date_to)
+    
+    jobs, next_cursor = paginate(query, Job.created_at, Job.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     
     result = []
     for job in jobs:
@@ -473,17 +533,29 @@ async def get_job_tracking(
 
 @router.get("/client/history", tags=["Client"], summary="Job History - Get All Completed Jobs")
 async def get_job_history(
-    current_user: dict = Depends(get_current_user),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=LIMIT_DESCRIPTION),
+    cursor: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="Comma separated job statuses"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    include: Optional[str] = Query(None, description="Comma separated extras: photos"),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
+    includes = parse_include(include, LIST_INCLUDES)
     
     # Get all jobs (including active, completed, cancelled)
-    jobs = db.query(Job).filter(
-        Job.client_id == str(client.id)
-    ).order_by(Job.created_at.desc()).all()
+    query = db.query(Job).filter(Job.client_id == str(client.id))
+    statuses = parse_status_filter(status)
+    if statuses:
+        query = query.filter(Job.status.in_(statuses))
+    query = apply_date_range(query, Job.created_at, date_from, date_to)
+    
+    jobs, next_cursor = paginate(query, Job.created_at, Job.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    # One query for the photos of the whole page
+    photos = JobMedia.for_jobs(db, [job.id for job in jobs]) if "photos" in includes else None
     
     result = []
     for job in jobs:
@@ -542,25 +614,27 @@ async def get_job_history(
             {"name": "Complete", "completed": job.status == "job_completed"}
         ]
         
-        result.append({
+        item = {
             "job_id": job.id,
             "service_type": service_name,
             "property_address": job.property_address,
             "scheduled_date": job.preferred_date if hasattr(job, 'preferred_date') and job.preferred_date else "",
             "status_badge": status_badge,
             "workflow_progress": workflow_steps
-        })
+        }
+        if photos is not None:
+            item["photos"] = photos[job.id]
+        result.append(item)
     
     return result
 
 @router.get("/client/completed-jobs", tags=["Client"], summary="Recently Completed Jobs")
 async def get_completed_jobs(
-    current_user: dict = Depends(get_current_user),
+    include: Optional[str] = Query(None, description="Comma separated extras: photos"),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
+    includes = parse_include(include, LIST_INCLUDES)
     
     # Get completed jobs
     jobs = db.query(Job).filter(
@@ -568,148 +642,218 @@ async def get_completed_jobs(
         Job.status == "job_completed"
     ).order_by(Job.updated_at.desc()).all()
     
+    job_ids = [job.id for job in jobs]
+    if "photos" in includes:
+        photos = JobMedia.for_jobs(db, job_ids)
+        first_photos = {job_id: media["property"][0] for job_id, media in photos.items() if media["property"]}
+    else:
+        photos = None
+        first_photos = JobMedia.first_per_job(db, job_ids)
+    
     completed_jobs = []
     for job in jobs:
-        # Get first property photo if available
-        property_photo = None
-        if job.property_photos:
-            photos = job.property_photos.split(",")
-            property_photo = photos[0] if photos else None
-        
-        completed_jobs.append({
+        photo = first_photos.get(job.id)
+        item = {
             "job_id": job.id,
             "completion_date": job.updated_at.strftime("%d %b %Y") if job.updated_at else "",
-            "property_photo": property_photo,
+            "property_photo": photo["url"] if photo else None,
+            "property_thumbnail": photo["thumbnail_url"] if photo else None,
             "total_amount": float(job.quote_amount) if job.quote_amount else 0.0,
             "status": "Completed"
-        })
+        }
+        if photos is not None:
+            item["photos"] = photos[job.id]
+        completed_jobs.append(item)
     
     return completed_jobs
 
-@router.get("/client/tracking/{job_id}", tags=["Client"], summary="Get Job Tracking Details by ID")
-async def get_job_tracking_details(
-    job_id: str,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    from sqlalchemy import text
-    
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
-    job = db.query(Job).filter(
-        Job.id == job_id,
-        Job.client_id == str(client.id)
-    ).first()
-    
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    # Determine display status
-    if job.status == "job_created":
-        display_status = "Awaiting Quote"
-    elif job.status == "quote_sent":
-        display_status = "Quote Sent"
-    elif job.status == "quote_accepted":
-        display_status = "Booking Confirmed"
-    elif job.status == "crew_assigned":
-        display_status = "Crew Assigned"
-    elif job.status in ["crew_assigned", "crew_arrived", "before_photo", "clearance_in_progress", "after_photo"]:
-        display_status = "Work In Progress"
-    elif job.status == "work_completed":
-        display_status = "Work Completed"
-    elif job.status == "job_completed":
-        display_status = "Job Completed"
-    else:
-        display_status = job.status
-    
-    # Build progress steps
-    progress_steps = [
+def tracking_display_status(status: str) -> str:
+    if status == "job_created":
+        return "Awaiting Quote"
+    elif status == "quote_sent":
+        return "Quote Sent"
+    elif status == "quote_accepted":
+        return "Booking Confirmed"
+    elif status == "crew_assigned":
+        return "Crew Assigned"
+    elif status in ["crew_assigned", "crew_arrived", "before_photo", "clearance_in_progress", "after_photo"]:
+        return "Work In Progress"
+    elif status == "work_completed":
+        return "Work Completed"
+    elif status == "job_completed":
+        return "Job Completed"
+    return status
+
+def tracking_progress(status: str, assigned_crew_id: Optional[str]) -> list:
+    return [
         {
             "step": 1,
             "title": "Crew Assigned",
-            "completed": job.assigned_crew_id is not None
+            "completed": assigned_crew_id is not None
         },
         {
             "step": 2,
             "title": "Arrived at Property",
-            "completed": job.status in ["crew_arrived", "before_photo", "clearance_in_progress", "after_photo", "work_completed", "job_verified", "payment_pending", "job_completed"]
+            "completed": status in ["crew_arrived", "before_photo", "clearance_in_progress", "after_photo", "work_completed", "job_verified", "payment_pending", "job_completed"]
         },
         {
             "step": 3,
             "title": "Work Started",
-            "completed": job.status in ["before_photo", "clearance_in_progress", "after_photo", "work_completed", "job_verified", "payment_pending", "job_completed"]
+            "completed": status in ["before_photo", "clearance_in_progress", "after_photo", "work_completed", "job_verified", "payment_pending", "job_completed"]
         },
         {
             "step": 4,
             "title": "Work Completed",
-            "completed": job.status in ["work_completed", "job_verified", "payment_pending", "job_completed"]
+            "completed": status in ["work_completed", "job_verified", "payment_pending", "job_completed"]
         }
     ]
+
+def get_crew_details(db: Session, crew_id: Optional[str]):
+    from sqlalchemy import text
     
-    # Get crew details if assigned
-    crew_details = None
-    if job.assigned_crew_id:
-        try:
-            crew_result = db.execute(
-                text("SELECT full_name, phone_number, email, vehicle_number FROM crew WHERE id = :id"),
-                {"id": job.assigned_crew_id}
-            ).fetchone()
-            
-            if crew_result:
-                # Get crew rating (average of all completed jobs)
-                rating_result = db.execute(
-                    text("SELECT AVG(rating) FROM jobs WHERE assigned_crew_id = :id AND rating IS NOT NULL"),
-                    {"id": job.assigned_crew_id}
-                ).fetchone()
-                
-                crew_details = {
-                    "name": crew_result[0],
-                    "phone_number": crew_result[1],
-                    "email": crew_result[2],
-                    "vehicle_number": crew_result[3],
-                    "rating": round(float(rating_result[0]), 1) if rating_result and rating_result[0] else None
-                }
-        except Exception as e:
-            print(f"Error fetching crew details: {e}")
-    
-    # Get before and after photos
-    before_photos = []
-    after_photos = []
+    if not crew_id:
+        return None
     try:
-        photo_results = db.execute(
-            text("SELECT photo_url, type FROM job_photos WHERE job_id = :job_id ORDER BY timestamp ASC"),
-            {"job_id": job_id}
-        ).fetchall()
+        crew_result = db.execute(
+            text("SELECT full_name, phone_number, email, vehicle_number FROM crew WHERE id = :id"),
+            {"id": crew_id}
+        ).fetchone()
         
-        for photo in photo_results:
-            if photo[1] == "before":
-                before_photos.append(photo[0])
-            elif photo[1] == "after":
-                after_photos.append(photo[0])
+        if crew_result:
+            return {
+                "name": crew_result[0],
+                "phone_number": crew_result[1],
+                "email": crew_result[2],
+                "vehicle_number": crew_result[3],
+                "rating": CrewRating.get_average(db, crew_id)
+            }
     except Exception as e:
-        print(f"Error fetching photos: {e}")
+        logger.error("Error fetching crew details: %s", e)
+    return None
+
+def build_tracking_details(db: Session, job: Job) -> dict:
+    # Crew before and after photos (job_media mirrors job_photos)
+    photos = JobMedia.for_job(db, job.id, ("before", "after"))
     
     return {
         "job_id": job.id,
         "property_address": job.property_address,
-        "status": display_status,
-        "progress": progress_steps,
-        "crew_details": crew_details,
-        "before_photos": before_photos,
-        "after_photos": after_photos
+        "status": tracking_display_status(job.status),
+        "progress": tracking_progress(job.status, job.assigned_crew_id),
+        "crew_details": get_crew_details(db, job.assigned_crew_id),
+        "before_photos": [photo["url"] for photo in photos["before"]],
+        "after_photos": [photo["url"] for photo in photos["after"]]
     }
 
+@router.get("/client/tracking/{job_id}", tags=["Client"], summary="Get Job Tracking Details by ID")
+async def get_job_tracking_details(
+    job_id: str,
+    client: Client = Depends(get_current_client),
+    db: Session = Depends(get_db)
+):
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.client_id == str(client.id)
+    ).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return build_tracking_details(db, job)
+
+def load_crew_details(crew_id: Optional[str]):
+    db = SessionLocal()
+    try:
+        return get_crew_details(db, crew_id)
+    finally:
+        db.close()
+
+def load_tracking_snapshot(job_id: str):
+    """Tracking details and status of a job, (None, None) if it no longer exists"""
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return None, None
+        return build_tracking_details(db, job), job.status
+    finally:
+        db.close()
+
+@router.get("/client/tracking/{job_id}/stream", tags=["Client"], summary="Stream Job Tracking Updates (Server-Sent Events)")
+async def stream_job_tracking(
+    job_id: str,
+    request: Request,
+    token: Optional[str] = Query(None, description="Access token for EventSource clients, which cannot send an Authorization header"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """
+    Sends a `snapshot` event with the same body as GET /client/tracking/{job_id},
+    then `status`, `crew` and `photo` events as the job changes. The stream ends
+    once the job is completed or cancelled.
+    """
+    payload = verify_token(credentials.credentials if credentials else token) if (credentials or token) else None
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    # Short-lived session: a stream can stay open for hours and must not pin a pooled connection
+    db = SessionLocal()
+    try:
+        owned = db.query(Job.id).filter(Job.id == job_id, Job.client_id == payload.get("sub")).first()
+    finally:
+        db.close()
+    if not owned:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        # Subscribed here rather than before returning the response: if the client goes away
+        # before the body starts, the generator never runs and its finally would not unsubscribe
+        queue = event_broker.subscribe(job_id)
+        try:
+            # Subscribe before reading the snapshot so no change can fall between the two
+            snapshot, current_status = await run_in_threadpool(load_tracking_snapshot, job_id)
+            if snapshot is None:
+                return
+            yield format_sse("snapshot", snapshot)
+            if current_status in TRACKING_TERMINAL_STATUSES:
+                return
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=TRACKING_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if event.get("type") == "photo":
+                    yield format_sse("photo", {"type": event.get("photo_type"), "photo_url": event.get("photo_url")})
+                    continue
+                
+                status = event.get("status")
+                yield format_sse("status", {
+                    "status": tracking_display_status(status),
+                    "progress": tracking_progress(status, event.get("assigned_crew_id"))
+                })
+                if event.get("crew_changed"):
+                    crew_details = await run_in_threadpool(load_crew_details, event.get("assigned_crew_id"))
+                    yield format_sse("crew", {"crew_details": crew_details})
+                if status in TRACKING_TERMINAL_STATUSES:
+                    return
+        finally:
+            event_broker.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/client/payment-requests", tags=["Client"], summary="Get Pending Payment Requests")
 async def get_payment_requests(
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     # Get jobs with payment_pending status (admin sent remaining amount request)
     jobs = db.query(Job).filter(
         Job.client_id == str(client.id),
@@ -735,13 +879,9 @@ async def get_payment_requests(
 
 @router.get("/client/cancelled-jobs", tags=["Client"], summary="Get All Cancelled Jobs")
 async def get_cancelled_jobs(
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     jobs = db.query(Job).filter(
         Job.client_id == str(client.id),
         Job.status.in_(["cancelled", "quote_rejected"])
@@ -777,13 +917,9 @@ async def get_cancelled_jobs(
 
 @router.get("/client/accepted-quotes", tags=["Client"], summary="Get All Accepted Quotes")
 async def get_accepted_quotes(
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    client = db.query(Client).filter(Client.id == current_user.get("sub")).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     jobs = db.query(Job).filter(
         Job.client_id == str(client.id),
         Job.status.in_(["quote_accepted", "deposit_paid", "crew_assigned", "crew_arrived", "before_photo", "clearance_in_progress", "after_photo", "work_completed", "job_verified", "payment_pending", "job_completed"])
@@ -4,72 +4,53 @@ from sqlalchemy.orm import Session
 from app.database.db import get_db
 from app.core.security import verify_token
 from app.core.storage import storage
+from app.core.maintenance import draft_cutoff
 from app.models.job import Job
+from app.models.job_draft import JobDraft
 from app.models.urgency_level import UrgencyLevel
 from app.schemas.job_draft import JobResponse, ConfirmJob
 from app.schemas.auth import MessageResponse
 from typing import List, Optional
-from datetime import datetime
 import json
+import uuid
 
 router = APIRouter(prefix="/api/jobs", tags=["Job Draft"])
 security = HTTPBearer()
 
+def draft_response(draft: JobDraft) -> JobResponse:
+    fields = draft.fields
+    return JobResponse(
+        id=draft.id,
+        property_address=fields["property_address"],
+        date=fields["preferred_date"],
+        service_id=fields["service_type"],
+        urgency_level_id=fields["urgency_level"],
+        property_size=fields.get("property_size"),
+        van_loads=fields.get("van_loads"),
+        waste_types=fields.get("waste_types"),
+        furniture_items=fields.get("furniture_items"),
+        status="pending",
+        created_at=draft.created_at.isoformat() if draft.created_at else ""
+    )
+
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job_draft(
     job_id: str,
     db: Session = Depends(get_db)
 ):
-    """Get job draft by ID - no authentication required"""
+    """Get job draft by ID - no authentication; the random id is what gives access to it"""
     try:
-        job = db.query(Job).filter(Job.id == job_id).first()
+        draft = JobDraft.get_active(db, job_id, draft_cutoff())
         
-        if not job:
+        if not draft:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        return JobResponse(
-            id=job.id,
-            property_address=job.property_address,
-            date=job.preferred_date,
-            service_id=job.service_type,
-            urgency_level_id=job.urgency_level,
-            property_size=job.property_size,
-            van_loads=job.van_loads,
-            waste_types=job.waste_types,
-            furniture_items=job.furniture_items,
-            status=job.status,
-            created_at=job.created_at.isoformat() if job.created_at else ""
-        )
+        return draft_response(draft)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-@router.get("/", response_model=List[JobResponse])
-async def get_all_draft_jobs(
-    db: Session = Depends(get_db)
-):
-    """Get all draft jobs (before login) - no authentication"""
-    try:
-        jobs = db.query(Job).filter(Job.client_id == None, Job.status == 'pending').order_by(Job.created_at.desc()).all()
-        
-        return [
-            JobResponse(
-                id=job.id,
-                property_address=job.property_address,
-                date=job.preferred_date,
-                service_id=job.service_type,
-                urgency_level_id=job.urgency_level,
-                property_size=job.property_size,
-                van_loads=job.van_loads,
-                waste_types=job.waste_types,
-                furniture_items=job.furniture_items,
-                status=job.status,
-                created_at=job.created_at.isoformat() if job.created_at else ""
-            )
-            for job in jobs
-        ]
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
 @router.post("/", response_model=JobResponse)
 async def create_job_draft(
     property_address: Optional[str] = Form(None),
@@ -85,29 +66,22 @@ async def create_job_draft(
 ):
     """Create job draft without authentication - for price estimation"""
     try:
+        # The draft becomes a Job on confirmation, which needs these
+        missing = [name for name, value in (
+            ("property_address", property_address), ("preferred_date", preferred_date), ("service_type", service_type)
+        ) if not value]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing {', '.join(missing)}")
+        
         # Get urgency level from database
         urgency_level_obj = db.query(UrgencyLevel).filter(UrgencyLevel.id == urgency_level).first()
         if not urgency_level_obj:
             raise HTTPException(status_code=400, detail="Invalid urgency_level")
-        
-        # Create job first to get job_id
-        job = Job(
-            property_address=property_address,
-            preferred_date=preferred_date,
-            preferred_time="",
-            service_type=service_type,
-            urgency_level=urgency_level,
-            property_size=property_size,
-            van_loads=van_loads,
-            waste_types=waste_types,
-            furniture_items=furniture_items,
-            status='pending'
-        )
-        db.add(job)
+        # Nothing else to read; don't hold a pooled connection during the uploads
         db.commit()
-        db.refresh(job)
         
-        # Upload property photos if provided
+        # Upload property photos first; the draft is written once, with their URLs
+        draft_id = str(uuid.uuid4())
         photo_urls = []
         if property_photos:
             for photo in property_photos:
@@ -115,31 +89,31 @@ async def create_job_draft(
                     file_content = await photo.read()
                     photo_url = storage.upload_file(
                         file_content,
-                        f"job_drafts/{job.id}",
+                        f"job_drafts/{draft_id}",
                         photo.filename
                     )
                     if photo_url:
                         photo_urls.append(photo_url)
         
-        # Update job with photo URLs
-        if photo_urls:
-            job.property_photos = json.dumps(photo_urls)
-            db.commit()
-            db.refresh(job)
+        draft = JobDraft(id=draft_id)
+        draft.fields = {
+            "property_address": property_address,
+            "preferred_date": preferred_date,
+            "preferred_time": "",
+            "service_type": service_type,
+            "urgency_level": urgency_level,
+            "property_size": property_size,
+            "van_loads": van_loads,
+            "waste_types": waste_types,
+            "furniture_items": furniture_items,
+            "property_photos": json.dumps(photo_urls) if photo_urls else None,
+        }
+        db.add(draft)
+        db.commit()
         
-        return JobResponse(
-            id=job.id,
-            property_address=job.property_address,
-            date=job.preferred_date,
-            service_id=job.service_type,
-            urgency_level_id=job.urgency_level,
-            property_size=job.property_size,
-            van_loads=job.van_loads,
-            waste_types=job.waste_types,
-            furniture_items=job.furniture_items,
-            status=job.status,
-            created_at=job.created_at.isoformat() if job.created_at else ""
-        )
+        return draft_response(draft)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -155,19 +129,16 @@ async def confirm_job_draft(
         if not payload:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        job = db.query(Job).filter(Job.id == confirm_data.job_id).first()
+        job = JobDraft.promote(db, confirm_data.job_id, payload["sub"], draft_cutoff())
         
         if not job:
+            if db.query(Job.id).filter(Job.id == confirm_data.job_id).first():
+                raise HTTPException(status_code=400, detail="Job already confirmed")
             raise HTTPException(status_code=404, detail="Job not found")
         
-        if job.status != "pending":
-            raise HTTPException(status_code=400, detail="Job already confirmed")
-        
-        job.client_id = payload["sub"]
-        job.status = "job_created"
-        job.updated_at = datetime.utcnow()
-        
         db.commit()
-        return MessageResponse(message=f"Job confirmed successfully with ID: {job.id}")
+        return MessageResponse(message=f"Job confirmed successfully with ID: {confirm_data.job_id}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from app.core import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """Prometheus text exposition for this worker process"""
+    if not metrics.authorized(dict(request.scope["headers"])):
+        raise HTTPException(status_code=401, detail="Not authorized")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
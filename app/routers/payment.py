@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, Response
 from fastapi.responses import FileResponse, HTMLResponse
 from sqlalchemy.orm import Session
 from app.database.db import get_db
 from app.models.client import Client
 from app.models.payment import Payment
-from app.core.security import get_current_user
+from app.models.job import Job
+from app.models.invoice import Invoice
+from app.core.current_client import get_current_client
+from app.core import outbox
 from app.core.payment import create_checkout_session, verify_payment
+from app.core.pagination import LIMIT_DESCRIPTION, MAX_PAGE_SIZE, paginate, parse_status_filter, apply_date_range, set_next_cursor
 from pydantic import BaseModel
+from typing import Optional
 from datetime import datetime
 from sqlalchemy import text
 import os
@@ -43,19 +48,9 @@ def get_frontend_url(request: Request) -> str:
 async def create_deposit_payment(
     job_id: str,
     request: Request,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    identifier = current_user["sub"]
-    client = db.query(Client).filter(Client.email == identifier).first()
-    if not client:
-        try:
-            client = db.query(Client).filter(Client.id == identifier).first()
-        except:
-            pass
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     try:
         job_result = db.execute(
             text("SELECT id, client_id, quote_amount, deposit_amount, status FROM jobs WHERE id = :job_id"),
@@ -84,17 +79,21 @@ async def create_deposit_payment(
         if not deposit_amount or deposit_amount <= 0:
             raise HTTPException(status_code=400, detail="Invalid deposit amount")
         
+        client_id = str(client.id)
+        # End the read transaction so the connection goes back to the pool during the Stripe call
+        db.commit()
+        
         frontend_url = get_frontend_url(request)
         payment_data = create_checkout_session(
             amount=deposit_amount,
-            metadata={"job_id": job_id, "client_id": str(client.id), "payment_type": "deposit"},
+            metadata={"job_id": job_id, "client_id": client_id, "payment_type": "deposit"},
             success_url=f"{frontend_url}/client/payment?session_id={{CHECKOUT_SESSION_ID}}&type=deposit&status=success",
             cancel_url=f"{frontend_url}/client/payment?status=cancel"
         )
         
         payment = Payment(
             job_id=job_id,
-            client_id=str(client.id),
+            client_id=client_id,
             payment_type="deposit",
             amount=deposit_amount,
             payment_method="stripe",
@@ -114,19 +113,9 @@ async def create_deposit_payment(
 @router.post("/client/payments/confirm-deposit", tags=["Client Payment"])
 async def confirm_deposit_payment(
     request: ConfirmPaymentRequest,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    identifier = current_user["sub"]
-    client = db.query(Client).filter(Client.email == identifier).first()
-    if not client:
-        try:
-            client = db.query(Client).filter(Client.id == identifier).first()
-        except:
-            pass
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     payment = db.query(Payment).filter(
         Payment.transaction_id == request.session_id
     ).first()
@@ -151,12 +140,7 @@ async def confirm_deposit_payment(
     
     payment.payment_status = "succeeded"
     payment.paid_at = datetime.utcnow()
-    
-    try:
-        db.execute(text("UPDATE jobs SET status = 'deposit_paid' WHERE id = :job_id"), {"job_id": payment.job_id})
-    except:
-        pass
-    
+    db.query(Job).filter(Job.id == payment.job_id).update({Job.status: "deposit_paid"}, synchronize_session=False)
     db.commit()
     
     return {
@@ -169,19 +153,9 @@ async def confirm_deposit_payment(
 @router.get("/client/jobs/{job_id}/remaining-payment", tags=["Client Payment"])
 async def get_remaining_payment_details(
     job_id: str,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    identifier = current_user["sub"]
-    client = db.query(Client).filter(Client.email == identifier).first()
-    if not client:
-        try:
-            client = db.query(Client).filter(Client.id == identifier).first()
-        except:
-            pass
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     try:
         job_result = db.execute(
             text("SELECT id, client_id, quote_amount, deposit_amount, remaining_amount, status FROM jobs WHERE id = :job_id"),
@@ -213,19 +187,9 @@ async def get_remaining_payment_details(
 async def create_remaining_payment_intent(
     job_id: str,
     request: Request,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    identifier = current_user["sub"]
-    client = db.query(Client).filter(Client.email == identifier).first()
-    if not client:
-        try:
-            client = db.query(Client).filter(Client.id == identifier).first()
-        except:
-            pass
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     try:
         job_result = db.execute(
             text("SELECT id, client_id, remaining_amount, status FROM jobs WHERE id = :job_id"),
@@ -245,17 +209,21 @@ async def create_remaining_payment_intent(
         if not remaining_amount or remaining_amount <= 0:
             raise HTTPException(status_code=400, detail="Invalid remaining amount")
         
+        client_id = str(client.id)
+        # End the read transaction so the connection goes back to the pool during the Stripe call
+        db.commit()
+        
         frontend_url = get_frontend_url(request)
         payment_data = create_checkout_session(
             amount=remaining_amount,
-            metadata={"job_id": job_id, "client_id": str(client.id), "payment_type": "remaining"},
+            metadata={"job_id": job_id, "client_id": client_id, "payment_type": "remaining"},
             success_url=f"{frontend_url}/client/payment?session_id={{CHECKOUT_SESSION_ID}}&type=remaining&status=success",
             cancel_url=f"{frontend_url}/client/payment?status=cancel"
         )
         
         payment = Payment(
             job_id=job_id,
-            client_id=str(client.id),
+            client_id=client_id,
             payment_type="remaining",
             amount=remaining_amount,
             payment_method="stripe",
@@ -275,19 +243,9 @@ async def create_remaining_payment_intent(
 @router.post("/client/payments/confirm-remaining", tags=["Client Payment"])
 async def confirm_remaining_payment(
     request: ConfirmPaymentRequest,
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    identifier = current_user["sub"]
-    client = db.query(Client).filter(Client.email == identifier).first()
-    if not client:
-        try:
-            client = db.query(Client).filter(Client.id == identifier).first()
-        except:
-            pass
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     payment = db.query(Payment).filter(
         Payment.transaction_id == request.session_id,
         Payment.client_id == str(client.id)
@@ -301,140 +259,34 @@ async def confirm_remaining_payment(
     
     payment.payment_status = "succeeded"
     payment.paid_at = datetime.utcnow()
+    db.query(Job).filter(Job.id == payment.job_id).update({Job.status: "job_completed"}, synchronize_session=False)
     
-    try:
-        db.execute(text("UPDATE jobs SET status = 'job_completed' WHERE id = :job_id"), {"job_id": payment.job_id})
-    except:
-        pass
-    
-    # Auto-generate invoice with PDF after full payment
-    invoice_generated = False
-    invoice_error = None
-    try:
-        from app.models.invoice import Invoice
-        from app.models.job import Job
-        from app.core.storage import storage
-        import random
-        import tempfile
-        import os
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
-        
-        # Check if invoice already exists
-        existing_invoice = db.query(Invoice).filter(Invoice.job_id == payment.job_id).first()
-        if not existing_invoice:
-            # Get job and payment details
-            job = db.query(Job).filter(Job.id == payment.job_id).first()
-            if not job:
-                raise Exception("Job not found for invoice generation")
-            
-            quote_amount = job.quote_amount if job and job.quote_amount else payment.amount
-            deposit_amount = job.deposit_amount if job and job.deposit_amount else 0.0
-            remaining_amount = float(quote_amount) - float(deposit_amount)
-            
-            invoice_number = f"INV-{random.randint(10000, 99999)}"
-            
-            # Generate PDF
-            tmp_file_path = None
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                    tmp_file_path = tmp_file.name
-                    c = canvas.Canvas(tmp_file_path, pagesize=letter)
-                    width, height = letter
-                    
-                    # Invoice content
-                    c.setFont("Helvetica-Bold", 20)
-                    c.drawString(50, height - 50, "INVOICE")
-                    
-                    c.setFont("Helvetica", 12)
-                    c.drawString(50, height - 100, f"Invoice Number: {invoice_number}")
-                    c.drawString(50, height - 120, f"Job ID: {payment.job_id}")
-                    c.drawString(50, height - 140, f"Date: {datetime.utcnow().strftime('%Y-%m-%d')}")
-                    
-                    c.drawString(50, height - 180, "Bill To:")
-                    c.drawString(50, height - 200, f"{client.full_name}")
-                    c.drawString(50, height - 220, f"{client.email}")
-                    
-                    # Payment breakdown
-                    c.setFont("Helvetica-Bold", 12)
-                    c.drawString(50, height - 280, "Payment Details:")
-                    c.setFont("Helvetica", 12)
-                    c.drawString(50, height - 300, f"Quote Amount: £{float(quote_amount):.2f}")
-                    c.drawString(50, height - 320, f"Deposit Paid: £{float(deposit_amount):.2f}")
-                    c.drawString(50, height - 340, f"Remaining Paid: £{remaining_amount:.2f}")
-                    
-                    c.setFont("Helvetica-Bold", 14)
-                    c.drawString(50, height - 380, f"Total Amount: £{float(quote_amount):.2f}")
-                    
-                    c.setFont("Helvetica", 10)
-                    c.drawString(50, 50, "Thank you for your business!")
-                    c.save()
-                
-                # Upload PDF to Utho storage
-                with open(tmp_file_path, 'rb') as pdf_file:
-                    pdf_url = storage.upload_file(
-                        pdf_file.read(),
-                        f"invoices/{client.id}",
-                        f"{invoice_number}.pdf"
-                    )
-            finally:
-                # Clean up temp file
-                if tmp_file_path and os.path.exists(tmp_file_path):
-                    try:
-                        os.unlink(tmp_file_path)
-                    except:
-                        pass
-            
-            # Create invoice with PDF URL and quote amount
-            invoice = Invoice(
-                job_id=payment.job_id,
-                client_id=client.id,
-                invoice_number=invoice_number,
-                amount=quote_amount,
-                status="paid",
-                pdf_path=pdf_url,
-                generated_at=datetime.utcnow()
-            )
-            db.add(invoice)
-            invoice_generated = True
-        else:
-            invoice_generated = True  # Already exists
-    except Exception as e:
-        invoice_error = str(e)
-        print(f"Invoice generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+    # The invoice PDF is rendered and uploaded by the outbox relay once this commits
+    invoice_generated = db.query(Invoice.id).filter(Invoice.job_id == payment.job_id).first() is not None
+    if not invoice_generated:
+        outbox.enqueue(db, "invoice.generate", {
+            "job_id": payment.job_id,
+            "client_id": str(client.id),
+            "amount": payment.amount
+        })
     
     db.commit()
     
-    response_data = {
+    return {
         "message": "Remaining payment confirmed. Job completed successfully!",
         "payment_id": payment.id,
         "amount": payment.amount,
         "job_id": payment.job_id,
-        "invoice_generated": invoice_generated
+        "invoice_generated": invoice_generated,
+        "invoice_queued": not invoice_generated
     }
-    
-    if invoice_error:
-        response_data["invoice_error"] = invoice_error
-    
-    return response_data
 
 @router.get("/client/payments", tags=["Client Payment"])
 async def get_all_payments(
-    current_user: dict = Depends(get_current_user),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
     """Get all payments with job details for the logged-in client"""
-    identifier = current_user["sub"]
-    client = db.query(Client).filter(Client.email == identifier).first()
-    if not client:
-        try:
-            client = db.query(Client).filter(Client.id == identifier).first()
-        except:
-            pass
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
     
     try:
         query = text("""
@@ -511,22 +363,23 @@ async def get_all_payments(
 
 @router.get("/client/payments/history", tags=["Client Payment"])
 async def get_payment_history(
-    current_user: dict = Depends(get_current_user),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=LIMIT_DESCRIPTION),
+    cursor: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="Comma separated payment statuses"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    client: Client = Depends(get_current_client),
     db: Session = Depends(get_db)
 ):
-    identifier = current_user["sub"]
-    client = db.query(Client).filter(Client.email == identifier).first()
-    if not client:
-        try:
-            client = db.query(Client).filter(Client.id == identifier).first()
-        except:
-            pass
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
+    query = db.query(Payment).filter(Payment.client_id == str(client.id))
+    statuses = parse_status_filter(status)
+    if statuses:
+        query = query.filter(Payment.payment_status.in_(statuses))
+    query = apply_date_range(query, Payment.created_at, date_from, date_to)
     
-    payments = db.query(Payment).filter(
-        Payment.client_id == str(client.id)
-    ).order_by(Payment.created_at.desc()).all()
+    payments, next_cursor = paginate(query, Payment.created_at, Payment.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     
     return [
         {
@@ -1,7 +1,15 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Query, Request, Response
+from pydantic import BaseModel, Field
 from typing import Optional, List
-from app.core.pricing import calculate_job_price
+from functools import lru_cache
+from app.core.pricing import get_engine, PricingEngine
+import hashlib
+import json
+import os
+
+MAX_BATCH_SCENARIOS = 1000
+ESTIMATE_CACHE_SIZE = int(os.getenv("ESTIMATE_CACHE_SIZE", "8192"))
+ESTIMATE_CACHE_MAX_AGE = int(os.getenv("ESTIMATE_CACHE_MAX_AGE", "300"))
 
 router = APIRouter()
 
@@ -14,36 +22,104 @@ class PriceEstimateRequest(BaseModel):
     urgency: str = "standard"
     compliance_addons: Optional[List[str]] = None
 
+class PriceEstimateBatchRequest(BaseModel):
+    scenarios: List[PriceEstimateRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SCENARIOS)
+
+@lru_cache(maxsize=ESTIMATE_CACHE_SIZE)
+def render_estimate(engine: PricingEngine, key: tuple) -> tuple:
+    """
+    Response body and ETag for one canonical scenario under one rate card.
+    The engine is part of the cache key, so publishing a new rate card
+    naturally stops old entries from being served.
+    """
+    property_size, van_loads, waste_type, furniture_items, access, urgency, compliance = key
+    body = json.dumps({
+        "estimated_price": engine.price_key(key),
+        "currency": "GBP",
+        "rate_card_version": engine.version,
+        "breakdown": {
+            "base_callout": engine.base_price,
+            "property_size": property_size,
+            "van_loads": van_loads,
+            "waste_type": waste_type,
+            "furniture_items": furniture_items,
+            "access_difficulty": list(access),
+            "urgency": urgency,
+            "compliance_addons": list(compliance),
+            "minimum_charge": engine.minimum_price
+        }
+    }, separators=(",", ":"), sort_keys=True).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return body, etag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return etag in candidates or f"W/{etag}" in candidates
+
+@router.get("/estimate-price", tags=["Pricing"], include_in_schema=False)
+async def estimate_price_cached(
+    request: Request,
+    property_size: Optional[str] = None,
+    van_loads: int = 1,
+    waste_type: str = "general",
+    furniture_items: int = 0,
+    access_difficulty: Optional[List[str]] = Query(None),
+    urgency: str = "standard",
+    compliance_addons: Optional[List[str]] = Query(None)
+):
+    """
+    Cacheable price estimate for the public quote widget. Same pricing as
+    POST /estimate-price, but inputs are canonicalized (so "2 Bed" and "2bed"
+    share a cache entry and ETag) and the response carries Cache-Control so
+    a CDN or the browser can serve repeats. Repeat list params for access
+    difficulties and compliance add-ons.
+    """
+    engine = get_engine()
+    key = engine.key(
+        property_size=property_size,
+        van_loads=van_loads,
+        waste_type=waste_type,
+        furniture_items=furniture_items,
+        access_difficulty=access_difficulty,
+        urgency=urgency,
+        compliance_addons=compliance_addons
+    )
+    body, etag = render_estimate(engine, key)
+    headers = {
+        "ETag": etag,
+        # Short max-age bounds how long a superseded rate card can be served
+        "Cache-Control": f"public, max-age={ESTIMATE_CACHE_MAX_AGE}, stale-while-revalidate={ESTIMATE_CACHE_MAX_AGE}"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.post("/estimate-price", tags=["Pricing"], include_in_schema=False)
 async def estimate_price(request: PriceEstimateRequest):
     """
     Calculate instant price estimate based on job details.
     
-    Components:
-    - Base: £250
-    - Property: studio/1bed=+£100, 2bed=+£200, 3bed=+£350, 4+bed=+£500
-    - Van loads: 1=+£150, 2=+£300, 3=+£450, 4+=+£600
-    - Waste: general=+£0, furniture=+£50/item, garden=+£100, construction=+£200, hazardous=+£300
-    - Access: stairs=+£100, parking=+£100, long_carry=+£100
-    - Urgency: standard=+£0, 24h=+£150, same_day=+£300
-    - Compliance: photo=+£50, council_pack=+£100, bio_clean=+£250
-    - Minimum: £350
-    """
-    price = calculate_job_price(
-        property_size=request.property_size,
-        van_loads=request.van_loads,
-        waste_type=request.waste_type,
-        furniture_items=request.furniture_items,
-        access_difficulty=request.access_difficulty,
-        urgency=request.urgency,
-        compliance_addons=request.compliance_addons
-    )
+    Components (amounts come from the active rate card, see app/core/pricing.py):
+    - Base call-out charge
+    - Property size, van loads, waste type and per-item furniture surcharges
+    - Access difficulty, urgency and compliance add-ons
+    - Minimum charge
+    """
+    # Take one snapshot so the price, the version and the breakdown agree
+    engine = get_engine()
+    price = engine.price(**request.model_dump())
     
     return {
         "estimated_price": price,
         "currency": "GBP",
+        "rate_card_version": engine.version,
         "breakdown": {
-            "base_callout": 250.0,
+            "base_callout": engine.base_price,
             "property_size": request.property_size,
             "van_loads": request.van_loads,
             "waste_type": request.waste_type,
@@ -51,6 +127,22 @@ async def estimate_price(request: PriceEstimateRequest):
             "access_difficulty": request.access_difficulty or [],
             "urgency": request.urgency,
             "compliance_addons": request.compliance_addons or [],
-            "minimum_charge": 350.0
+            "minimum_charge": engine.minimum_price
         }
     }
+
+@router.post("/estimate-price/batch", tags=["Pricing"], include_in_schema=False)
+async def estimate_price_batch(request: PriceEstimateBatchRequest):
+    """
+    Price up to 1000 scenarios in one request. Prices are returned in the
+    same order as the scenarios, using the same components as /estimate-price.
+    """
+    engine = get_engine()
+    prices = engine.price_many(scenario.model_dump() for scenario in request.scenarios)
+    
+    return {
+        "estimated_prices": prices,
+        "count": len(prices),
+        "currency": "GBP",
+        "rate_card_version": engine.version
+    }
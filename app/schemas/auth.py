@@ -2,6 +2,15 @@ from pydantic import BaseModel, EmailStr, field_validator
 from fastapi import UploadFile
 from typing import Optional, Literal
 import re
+from app.core.phone import normalize_phone
+
+def _e164(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    number = normalize_phone(value)
+    if number is None:
+        raise ValueError("Invalid phone number")
+    return number
 
 class ClientRegister(BaseModel):
     email: EmailStr
@@ -12,6 +21,9 @@ class ClientRegister(BaseModel):
     business_address: str
     otp_method: Literal["email", "phone"] = "email"
 
+    # Stored in E.164 so phone lookups are a single exact match
+    _normalize_phone = field_validator("phone_number")(_e164)
+
 class Login(BaseModel):
     email: EmailStr
     password: str
@@ -40,6 +52,8 @@ class UpdateClientProfile(BaseModel):
     phone_number: Optional[str] = None
     business_address: Optional[str] = None
 
+    _normalize_phone = field_validator("phone_number")(_e164)
+
 class ForgotPassword(BaseModel):
     identifier: str  # email or phone
     otp_method: Literal["email", "phone"] = "email"
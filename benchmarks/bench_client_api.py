@@ -0,0 +1,272 @@
+"""
+Client API load benchmark.
+
+Runs concurrent virtual clients through the whole client journey in-process
+(httpx over ASGI, so no server is needed):
+
+  register -> verify OTP -> login -> create a job with photos -> dashboards
+  -> deposit checkout + confirm -> remaining checkout + confirm
+  -> invoice generation (outbox relay) -> list and download the invoice
+
+Stripe, SMTP, S3 (moto when installed) and the geocoder are replaced by the
+fakes in benchmarks/fakes.py; the admin-side steps (quoting, requesting the
+final payment) are done with direct SQL. Everything else is the real app
+against the database in DATABASE_URL, which must be a disposable local
+Postgres with the migrations applied (`alembic upgrade head`). SQLite is not
+supported: the app relies on Postgres features (upserts, partial indexes,
+SKIP LOCKED, LISTEN/NOTIFY, asyncpg).
+
+Reports throughput and p50/p95/p99 per endpoint. --save-baseline stores the
+numbers; --check compares against the stored baseline and exits non-zero on
+errors or regressions. Baselines are machine specific - record them on the
+machine that runs --check.
+
+Usage: python -m benchmarks.bench_client_api [--users 10] [--iterations 3] [--check | --save-baseline]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+# Quiet, deterministic app: background loops off, the benchmark drives the relay itself
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("OUTBOX_RELAY_ENABLED", "false")
+os.environ.setdefault("JOB_EVENTS_LISTEN", "false")
+# Every virtual client comes from the same address
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+from benchmarks.fakes import FakeSMTP, FakeStripe, fake_geocoder, install_fake_s3, install_fake_smtp
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "client_api.json"
+PASSWORD = "Bench-Passw0rd!"
+MIN_SAMPLES_FOR_P95 = 20
+PHOTO = b"\xff\xd8\xff\xe0" + os.urandom(48 * 1024)
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, expect=(200,), **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code not in expect:
+            self.errors[name] += 1
+            raise RuntimeError(f"{name} -> {response.status_code}: {response.text[:200]}")
+        return response
+
+    async def step(self, name: str, func, *args):
+        """Time a non-HTTP step (e.g. the relay) run in a worker thread"""
+        start = time.perf_counter()
+        result = await asyncio.to_thread(func, *args)
+        self.latencies[name].append(time.perf_counter() - start)
+        return result
+
+def admin_sql(statement: str, params: dict):
+    from sqlalchemy import text
+    from app.database.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.execute(text(statement), params)
+        db.commit()
+    finally:
+        db.close()
+
+def first_urgency_level() -> str:
+    from sqlalchemy import text
+    from app.database.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return str(db.execute(text("SELECT id FROM urgency_levels ORDER BY id LIMIT 1")).scalar())
+    finally:
+        db.close()
+
+async def client_journey(client: httpx.AsyncClient, rec: Recorder, iterations: int, urgency_level: str):
+    from app.core.outbox import relay
+
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    await rec.call(client, "POST /api/auth/register/client", "POST", "/api/auth/register/client", json={
+        "email": email, "password": PASSWORD, "full_name": "Bench Client",
+        "phone_number": "+4477" + str(uuid.uuid4().int)[:8], "client_type": "Landlord", "business_address": "1 Bench St"
+    })
+    await rec.call(client, "POST /api/auth/verify-otp", "POST", "/api/auth/verify-otp", json={
+        "identifier": email, "otp": FakeSMTP.last_otp(email)
+    })
+    login = await rec.call(client, "POST /api/auth/login/client", "POST", "/api/auth/login/client", json={
+        "email": email, "password": PASSWORD
+    })
+    auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    for _ in range(iterations):
+        job = await rec.call(client, "POST /api/jobs", "POST", "/api/jobs", headers=auth, data={
+            "service_type": "1", "urgency_level": urgency_level, "property_size": "2 bed", "van_loads": "2",
+            "property_address": "10 Downing Street, London", "preferred_date": "2026-01-01", "preferred_time": "10:00"
+        }, files=[("property_photos", (f"p{i}.jpg", PHOTO, "image/jpeg")) for i in range(2)])
+        job_id = job.json()["id"]
+
+        for name, url in (
+            ("GET /api/jobs", "/api/jobs"),
+            ("GET /api/client/tracking", "/api/client/tracking"),
+            ("GET /api/client/tracking/{job_id}", f"/api/client/tracking/{job_id}"),
+            ("GET /api/client/history", "/api/client/history"),
+            ("GET /api/client/quotes", "/api/client/quotes"),
+        ):
+            await rec.call(client, name, "GET", url, headers=auth)
+
+        # Admin quotes the job and the client accepts
+        await asyncio.to_thread(admin_sql, (
+            "UPDATE jobs SET status = 'quote_accepted', quote_amount = 500, deposit_amount = 100, "
+            "remaining_amount = 400 WHERE id = :id"
+        ), {"id": job_id})
+
+        checkout = await rec.call(client, "POST /api/client/jobs/{job_id}/create-deposit-payment", "POST",
+                                  f"/api/client/jobs/{job_id}/create-deposit-payment", headers=auth)
+        await rec.call(client, "POST /api/client/payments/confirm-deposit", "POST", "/api/client/payments/confirm-deposit",
+                       headers=auth, json={"session_id": FakeStripe.session_id_from_url(checkout.json()["checkout_url"])})
+
+        # Crew finishes; admin requests the final payment
+        await asyncio.to_thread(admin_sql, "UPDATE jobs SET status = 'payment_pending' WHERE id = :id", {"id": job_id})
+
+        await rec.call(client, "GET /api/client/jobs/{job_id}/remaining-payment", "GET",
+                       f"/api/client/jobs/{job_id}/remaining-payment", headers=auth)
+        checkout = await rec.call(client, "POST /api/client/jobs/{job_id}/pay-remaining", "POST",
+                                  f"/api/client/jobs/{job_id}/pay-remaining", headers=auth)
+        await rec.call(client, "POST /api/client/payments/confirm-remaining", "POST", "/api/client/payments/confirm-remaining",
+                       headers=auth, json={"session_id": FakeStripe.session_id_from_url(checkout.json()["checkout_url"])})
+        await rec.step("relay: invoice.generate", relay.run_once)
+
+        for name, url in (
+            ("GET /api/client/payments", "/api/client/payments"),
+            ("GET /api/client/payments/history", "/api/client/payments/history"),
+            ("GET /api/client/completed-jobs", "/api/client/completed-jobs"),
+        ):
+            await rec.call(client, name, "GET", url, headers=auth)
+
+        invoices = (await rec.call(client, "GET /api/client/invoices", "GET", "/api/client/invoices", headers=auth)).json()
+        invoice = next(i for i in invoices["invoices"] if i["job_id"] == job_id)
+        await rec.call(client, "GET /api/client/invoices/{invoice_id}/download", "GET",
+                       f"/api/client/invoices/{invoice['invoice_id']}/download", headers=auth)
+
+def summarize(rec: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for name, samples in sorted(rec.latencies.items()):
+        if len(samples) >= 2:
+            q = statistics.quantiles(samples, n=100, method="inclusive")
+            p50, p95, p99 = q[49], q[94], q[98]
+        else:
+            p50 = p95 = p99 = samples[0]
+        endpoints[name] = {
+            "count": len(samples),
+            "errors": rec.errors.get(name, 0),
+            "rps": len(samples) / elapsed,
+            "p50_ms": p50 * 1000,
+            "p95_ms": p95 * 1000,
+            "p99_ms": p99 * 1000,
+        }
+    total = sum(len(s) for name, s in rec.latencies.items() if not name.startswith("relay"))
+    return {"elapsed_s": elapsed, "requests": total, "rps": total / elapsed, "endpoints": endpoints}
+
+def print_report(result: dict):
+    print(f"{'endpoint':<58} {'n':>5} {'err':>4} {'req/s':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, e in result["endpoints"].items():
+        print(f"{name:<58} {e['count']:>5} {e['errors']:>4} {e['rps']:>7.1f} "
+              f"{e['p50_ms']:>7.1f}ms {e['p95_ms']:>7.1f}ms {e['p99_ms']:>7.1f}ms")
+    print(f"\n{result['requests']} requests in {result['elapsed_s']:.1f}s = {result['rps']:.1f} req/s")
+
+def check(result: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    problems = []
+    for name, e in result["endpoints"].items():
+        if e["errors"]:
+            problems.append(f"{name}: {e['errors']} errors")
+        base = baseline["endpoints"].get(name)
+        if base is None:
+            continue
+        # With few samples p95 is a single outlier; gate those endpoints on the median instead
+        stat = "p95_ms" if e["count"] >= MIN_SAMPLES_FOR_P95 else "p50_ms"
+        limit = base[stat] * (1 + tolerance)
+        # Fast endpoints jitter by more than any ratio; require an absolute change too
+        if e[stat] > limit and e[stat] - base[stat] > min_delta_ms:
+            problems.append(f"{name}: {stat[:3]} {e[stat]:.1f}ms > {limit:.1f}ms (baseline {base[stat]:.1f}ms)")
+    if result["rps"] < baseline["rps"] * (1 - tolerance):
+        problems.append(f"throughput {result['rps']:.1f} req/s < {baseline['rps'] * (1 - tolerance):.1f} (baseline {baseline['rps']:.1f})")
+    return problems
+
+async def run(args) -> dict:
+    import main
+    from app.core.storage import storage
+    from app.routers import job as job_router
+
+    latency = args.fake_latency_ms / 1000
+    stripe = FakeStripe(latency).install()
+    install_fake_smtp(latency)
+    s3_mock = install_fake_s3(storage, latency)
+    job_router.geocode_address = fake_geocoder() if args.geocode else (lambda address: (None, None))
+
+    await main.app.router.startup()
+    try:
+        urgency_level = await asyncio.to_thread(first_urgency_level)
+        rec = Recorder()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            # Warm-up journey: imports, pools, caches
+            await client_journey(client, Recorder(), 1, urgency_level)
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(client_journey(client, rec, args.iterations, urgency_level) for _ in range(args.users)),
+                return_exceptions=True
+            )
+            elapsed = time.perf_counter() - start
+        failures = [r for r in results if isinstance(r, Exception)]
+        for failure in failures[:5]:
+            print(f"journey failed: {failure}", file=sys.stderr)
+        return summarize(rec, elapsed)
+    finally:
+        await main.app.router.shutdown()
+        stripe.uninstall()
+        if s3_mock is not None:
+            s3_mock.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual clients")
+    parser.add_argument("--iterations", type=int, default=3, help="jobs taken through to invoice per client")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0, help="simulated round trip for each fake external call")
+    parser.add_argument("--geocode", action="store_true", help="geocode jobs so crew auto-assignment runs (needs the crew table)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail on errors or regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative p95/throughput regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p95 regressions smaller than this")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    result["config"] = {"users": args.users, "iterations": args.iterations, "fake_latency_ms": args.fake_latency_ms}
+    print_report(result)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if args.check:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("config") != result["config"]:
+            print(f"warning: baseline was recorded with {baseline.get('config')}", file=sys.stderr)
+        problems = check(result, baseline, args.tolerance, args.min_delta_ms)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Worker cold-start benchmark.
+
+Boots the app in fresh interpreters, the way an autoscaled worker starts,
+and reports per run:
+
+  interpreter   python itself, up to the first line of main.py
+  import        importing main (FastAPI, models, routers, engines)
+  startup       the startup hooks, up to ready to serve
+  total         process launch to ready, as the autoscaler sees it
+
+Needs DATABASE_URL (the engine is created, though startup no longer talks to
+the database). Background loops are disabled so only boot work is measured.
+
+Usage: python -m benchmarks.bench_cold_start [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+ready = time.perf_counter()
+print(json.dumps({
+    "interpreter": main.BOOT_STARTED - float(sys.argv[1]),
+    "import": imported - main.BOOT_STARTED,
+    "startup": ready - imported,
+    "ready": ready,
+}))
+"""
+
+def boot_once(env: dict) -> dict:
+    launched = time.perf_counter()
+    # perf_counter is CLOCK_MONOTONIC on Linux, so it is comparable across processes
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, repr(launched)], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    timings["total"] = timings.pop("ready") - launched
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env["OUTBOX_RELAY_ENABLED"] = "false"
+    env["JOB_EVENTS_LISTEN"] = "false"
+
+    boot_once(env)  # warm the OS page cache and .pyc files
+    runs = [boot_once(env) for _ in range(args.runs)]
+
+    print(f"{'phase':<12} {'median':>9} {'min':>9} {'max':>9}")
+    for phase in ("interpreter", "import", "startup", "total"):
+        values = [r[phase] * 1000 for r in runs]
+        print(f"{phase:<12} {statistics.median(values):>7.0f}ms {min(values):>7.0f}ms {max(values):>7.0f}ms")
+
+if __name__ == "__main__":
+    main()
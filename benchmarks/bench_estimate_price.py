@@ -0,0 +1,132 @@
+"""
+Public estimate endpoint load benchmark.
+
+Replays a quote-widget-like stream of scenarios (a small discrete input space,
+with users retyping the same values) against the pricing endpoints and
+reports throughput and latency percentiles for:
+
+  post        POST /api/estimate-price (uncached body per request)
+  get         GET  /api/estimate-price (canonical LRU + ETag)
+  get-304     GET  with If-None-Match, as a browser or CDN revalidates
+
+By default it runs in-process against just the pricing router over ASGI, so
+no server is needed (DATABASE_URL must still be set because the routers
+package imports the models, but no connection is made). Pass --url to load a running server instead
+(started with RATE_LIMIT_ENABLED=false, or the run is throttled to 60/min).
+
+Usage: python -m benchmarks.bench_estimate_price [--requests 5000] [--concurrency 50] [--url http://localhost:8000]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+PROPERTY_SIZES = [None, "studio", "1 bed", "2 Bed", "2bed", "3-bed", "4+ bed"]
+WASTE_TYPES = ["general", "furniture", "garden waste", "construction", "hazardous"]
+ACCESS = [[], ["stairs"], ["parking"], ["stairs", "long carry"]]
+URGENCY = ["standard", "24h", "same_day"]
+
+def scenarios(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            "property_size": rng.choice(PROPERTY_SIZES),
+            "van_loads": rng.randint(1, 4),
+            "waste_type": rng.choice(WASTE_TYPES),
+            "furniture_items": rng.randint(0, 5),
+            "access_difficulty": rng.choice(ACCESS),
+            "urgency": rng.choice(URGENCY),
+        }
+
+def query_params(scenario: dict) -> list:
+    params = []
+    for name, value in scenario.items():
+        if value is None:
+            continue
+        if isinstance(value, list):
+            params.extend((name, v) for v in value)
+        else:
+            params.append((name, value))
+    return params
+
+def build_client(url: str = None) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=30)
+    from fastapi import FastAPI
+    from app.routers import pricing
+
+    app = FastAPI()
+    app.include_router(pricing.router, prefix="/api")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+async def run(mode: str, client: httpx.AsyncClient, total: int, concurrency: int):
+    work = list(scenarios(total))
+    etags = {}
+    latencies = []
+    statuses = {}
+
+    if mode == "get-304":
+        # Prime: what a browser/CDN already holds after the first visit
+        for scenario in {repr(s): s for s in work}.values():
+            r = await client.get("/api/estimate-price", params=query_params(scenario))
+            etags[repr(scenario)] = r.headers["etag"]
+
+    async def one(scenario: dict):
+        start = time.perf_counter()
+        if mode == "post":
+            r = await client.post("/api/estimate-price", json=scenario)
+        elif mode == "get":
+            r = await client.get("/api/estimate-price", params=query_params(scenario))
+        else:
+            r = await client.get(
+                "/api/estimate-price",
+                params=query_params(scenario),
+                headers={"If-None-Match": etags[repr(scenario)]}
+            )
+        latencies.append(time.perf_counter() - start)
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(scenario: dict):
+        async with semaphore:
+            await one(scenario)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(s) for s in work))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "mode": mode,
+        "rps": total / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "statuses": statuses,
+    }
+
+async def main_async(args):
+    async with build_client(args.url) as client:
+        # Warm up imports, route compilation and connection pools
+        await run("get", client, 200, args.concurrency)
+        results = [await run(mode, client, args.requests, args.concurrency) for mode in args.modes]
+
+    print(f"{'mode':>8} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}  statuses")
+    for r in results:
+        print(f"{r['mode']:>8} {r['rps']:>9.0f} {r['p50_ms']:>6.2f}ms {r['p95_ms']:>6.2f}ms {r['p99_ms']:>6.2f}ms  {r['statuses']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", default=["post", "get", "get-304"], choices=["post", "get", "get-304"])
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process ASGI)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
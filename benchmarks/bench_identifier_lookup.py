@@ -0,0 +1,129 @@
+"""
+Identifier lookup round trips in the OTP and password-reset flows.
+
+Registers a throwaway client, then walks resend-otp -> verify-otp ->
+forgot-password -> verify-forgot-otp -> resend-forgot-otp in-process, once
+identifying the client by email and once by phone number (typed in national
+format, "07..."), and counts per request:
+
+  lookups      SELECTs on clients by email or phone number
+  statements   every SQL statement the request issued
+
+LEGACY is what these endpoints cost before Client.resolve: an email query
+then a phone query, repeated in the router after the model had already done
+it. --check exits non-zero unless every request makes exactly one lookup.
+
+SMTP is faked (benchmarks/fakes.py) so the email OTPs can be read back.
+Needs DATABASE_URL pointing at a migrated database.
+
+Usage: python -m benchmarks.bench_identifier_lookup [--check]
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import uuid
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("OUTBOX_RELAY_ENABLED", "false")
+os.environ.setdefault("JOB_EVENTS_LISTEN", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+STEPS = ("resend-otp", "verify-otp", "forgot-password", "verify-forgot-otp", "resend-forgot-otp")
+
+# (step, identified by) -> client lookups per request before Client.resolve
+LEGACY = {
+    ("resend-otp", "email"): 2, ("resend-otp", "phone"): 4,
+    ("verify-otp", "email"): 2, ("verify-otp", "phone"): 4,
+    ("forgot-password", "email"): 1, ("forgot-password", "phone"): 2,
+    ("verify-forgot-otp", "email"): 1, ("verify-forgot-otp", "phone"): 2,
+    ("resend-forgot-otp", "email"): 1, ("resend-forgot-otp", "phone"): 2,
+}
+
+LOOKUP = re.compile(r"FROM clients\b.*WHERE.*clients\.(email|phone_number) =", re.S)
+
+class StatementLog:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def take(self) -> tuple:
+        statements, self.statements = self.statements, []
+        return sum(1 for s in statements if LOOKUP.search(s)), len(statements)
+
+async def walk(client, smtp, log, email: str, identifier: str) -> dict:
+    counts = {}
+
+    async def call(step, body):
+        log.take()
+        response = await client.post(f"/api/auth/{step}", json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{step} returned {response.status_code}: {response.text}")
+        counts[step] = log.take()
+
+    await call("resend-otp", {"identifier": identifier})
+    await call("verify-otp", {"identifier": identifier, "otp": smtp.last_otp(email)})
+    await call("forgot-password", {"identifier": identifier})
+    await call("verify-forgot-otp", {"identifier": identifier, "otp": smtp.last_otp(email)})
+    await call("resend-forgot-otp", {"identifier": identifier})
+    return counts
+
+async def register(client, email: str, phone: str):
+    response = await client.post("/api/auth/register/client", json={
+        "email": email, "password": "Bench-Lookup-Passw0rd!", "full_name": "Bench Lookup",
+        "phone_number": phone, "client_type": "Landlord", "business_address": "1 Bench Street",
+    })
+    if response.status_code != 200:
+        raise RuntimeError(f"register returned {response.status_code}: {response.text}")
+
+async def run() -> list:
+    import httpx
+    from sqlalchemy import event
+    from benchmarks.fakes import install_fake_smtp
+
+    smtp = install_fake_smtp()
+    import main
+    from app.database.db import engine
+
+    log = StatementLog()
+    event.listen(engine, "before_cursor_execute", log)
+    problems, total = [], 0
+    print(f"{'step':<20} {'by':<6} {'lookups':>8} {'legacy':>7} {'statements':>11}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for kind in ("email", "phone"):
+            email = f"bench-lookup-{uuid.uuid4().hex[:12]}@example.com"
+            national = f"07{random.randrange(10 ** 9):09d}"
+            await register(client, email, f"+44{national[1:]}")
+            identifier = email if kind == "email" else f"{national[:5]} {national[5:]}"
+            counts = await walk(client, smtp, log, email, identifier)
+            for step in STEPS:
+                lookups, statements = counts[step]
+                legacy = LEGACY[(step, kind)]
+                total += lookups
+                print(f"{step:<20} {kind:<6} {lookups:>8} {legacy:>7} {statements:>11}")
+                if lookups != 1:
+                    problems.append(f"{step} by {kind}: {lookups} lookups (legacy {legacy})")
+    event.remove(engine, "before_cursor_execute", log)
+
+    print(f"\nlookups for both walks: {sum(LEGACY.values())} before, {total} now")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="fail unless each request resolves the client once")
+    args = parser.parse_args()
+
+    problems = asyncio.run(run())
+    for problem in problems:
+        print(f"FAIL {problem}", file=sys.stderr)
+    if args.check:
+        sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
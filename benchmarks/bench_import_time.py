@@ -0,0 +1,95 @@
+"""
+Import-time audit for a worker.
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and
+reports the median cost of importing main, the heaviest top-level packages
+it pulls in, and the worker's resident memory afterwards.
+
+--check turns it into a budget gate (exits non-zero):
+  - main must import within --budget-ms (median over --runs)
+  - none of the lazily loaded integrations (see app/core/lazy.py) may be
+    imported at startup; a new top-level `import stripe` fails this even
+    when the machine is fast enough to stay under the time budget
+
+Needs DATABASE_URL (engines are created, no connection is made).
+
+Usage: python -m benchmarks.bench_import_time [--runs 5] [--top 15] [--check] [--budget-ms 1500]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+LAZY_MODULES = ("stripe", "boto3", "botocore", "reportlab", "geopy", "twilio", "asyncpg")
+
+CHILD = r"""
+import resource, sys
+import main
+print("LOADED", ",".join(sorted({name.split(".")[0] for name in sys.modules})))
+print("MAXRSS_KB", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def import_once(env: dict) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD], env=env, capture_output=True, text=True, check=True
+    )
+    total_us = 0
+    packages = defaultdict(int)  # top-level package -> self time, summed over its modules
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        packages[name.split(".")[0]] += self_us
+        if name == "main" and not indent:
+            total_us = cumulative_us
+    loaded, rss_kb = set(), 0
+    for line in proc.stdout.splitlines():
+        if line.startswith("LOADED "):
+            loaded = set(line.split(" ", 1)[1].split(","))
+        elif line.startswith("MAXRSS_KB "):
+            rss_kb = int(line.split()[1])
+    return {"total_ms": total_us / 1000, "packages": packages, "loaded": loaded, "rss_mb": rss_kb / 1024}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--check", action="store_true", help="fail when over budget or a lazy module loads eagerly")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    import_once(env)  # warm .pyc files and the page cache
+    runs = [import_once(env) for _ in range(args.runs)]
+
+    total_ms = statistics.median(r["total_ms"] for r in runs)
+    rss_mb = statistics.median(r["rss_mb"] for r in runs)
+    packages = {name: statistics.median(r["packages"].get(name, 0) for r in runs) / 1000 for name in runs[0]["packages"]}
+
+    print(f"{'package':<24} {'self ms':>9}")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<24} {ms:>9.1f}")
+    print(f"\nimport main: {total_ms:.0f} ms (median of {args.runs}), max RSS {rss_mb:.1f} MB")
+
+    eager = sorted(set(LAZY_MODULES) & runs[0]["loaded"])
+    if eager:
+        print(f"imported eagerly: {', '.join(eager)}")
+
+    if args.check:
+        problems = []
+        if total_ms > args.budget_ms:
+            problems.append(f"import main took {total_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+        if eager:
+            problems.append(f"lazy integrations imported at startup: {', '.join(eager)}")
+        for problem in problems:
+            print(f"OVER BUDGET {problem}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
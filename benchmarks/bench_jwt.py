@@ -0,0 +1,55 @@
+"""
+Auth dependency micro-benchmark.
+
+Times `get_current_user` - what every authenticated request pays before the
+handler runs - for one dashboard token presented repeatedly:
+
+  jose           python-jose decode on every call (the old behaviour)
+  pyjwt          PyJWT decode on every call (JWT_BACKEND=pyjwt), if installed
+  cached         token cache hit: sha256 of the token plus an LRU lookup
+
+Usage: python -m benchmarks.bench_jwt [--calls 20000]
+"""
+import argparse
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import security
+
+def per_call_us(calls: int, credentials) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        security.get_current_user(credentials)
+    return (time.perf_counter() - start) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = security.create_access_token({"sub": "3f6c1f3e-6d1b-4a53-9d47-1c1f4f0b8a10", "role": "client"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    original_backend, original_size = security._backend, security.token_cache.max_size
+
+    variants = [("jose", security._JoseBackend(), 0)]
+    try:
+        variants.append(("pyjwt", security._PyJWTBackend(), 0))
+    except ImportError:
+        print("PyJWT not installed; skipping the pyjwt variant")
+    variants.append(("cached", original_backend, original_size or 4096))
+
+    print(f"{'variant':<10} {'us/call':>9} {'calls/s':>11}")
+    try:
+        for name, backend, cache_size in variants:
+            security._backend = backend
+            security.token_cache.max_size = cache_size
+            security.token_cache.clear()
+            security.get_current_user(credentials)  # warm (and fill the cache when enabled)
+            us = per_call_us(args.calls, credentials)
+            print(f"{name:<10} {us:>9.2f} {1e6 / us:>11,.0f}")
+    finally:
+        security._backend, security.token_cache.max_size = original_backend, original_size
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Request-path logging overhead benchmark.
+
+Compares what one request pays for its diagnostic lines (about ten, as the
+pricing and OTP paths used to print) under:
+
+  print         the old unbuffered print() to stdout, one write() per line
+  debug-off     logger.debug() with DEBUG disabled (the production default)
+  debug-1pct    DEBUG enabled but sampled at 1% (LOG_DEBUG_SAMPLE_RATE=0.01)
+  info-queued   INFO records enabled, handed to the QueueHandler. This is
+                the request's share; JSON formatting and the write happen
+                on the listener thread afterwards (reported separately)
+
+Output goes to /dev/null, so the print figures exclude terminal or pipe
+back-pressure and are a lower bound for the real cost.
+
+Usage: python -m benchmarks.bench_logging [--requests 20000] [--lines 10]
+"""
+import argparse
+import io
+import logging
+import os
+import time
+
+from app.core import logging_config
+
+def unbuffered_devnull():
+    # What python -u / PYTHONUNBUFFERED=1 stdout looks like in a container
+    return io.TextIOWrapper(open(os.devnull, "wb", buffering=0), write_through=True)
+
+def time_per_request(func, requests: int, lines: int) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        func(i, lines)
+    return (time.perf_counter() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--lines", type=int, default=10)
+    args = parser.parse_args()
+
+    stream = unbuffered_devnull()
+    results = {}
+
+    def with_print(i, lines):
+        for n in range(lines):
+            print(f"PRICING DEBUG - step {n}: request {i} -> adding: {n * 50}", file=stream)
+    results["print"] = time_per_request(with_print, args.requests, args.lines)
+
+    os.environ["LOG_LEVEL"] = "INFO"
+    os.environ["LOG_FORMAT"] = "json"
+    logging_config.setup_logging(stream=stream)
+    logger = logging.getLogger("bench.request")
+
+    def with_debug(i, lines):
+        for n in range(lines):
+            logger.debug("step %s: request %s -> adding: %s", n, i, n * 50)
+
+    logger.setLevel(logging.INFO)
+    results["debug-off"] = time_per_request(with_debug, args.requests, args.lines)
+
+    logger.setLevel(logging.DEBUG)
+    logging_config.set_debug_sample_rate(0.01)
+    results["debug-1pct"] = time_per_request(with_debug, args.requests, args.lines)
+    logging_config.set_debug_sample_rate(1.0)
+
+    def with_info(i, lines):
+        for n in range(lines):
+            logger.info("step %s: request %s -> adding: %s", n, i, n * 50)
+
+    # Hold the writer thread so the timing is the request-side cost alone,
+    # not GIL contention from formatting a saturated backlog
+    listener = logging_config._listener
+    listener.stop()
+    results["info-queued"] = time_per_request(with_info, args.requests, args.lines)
+
+    drain_start = time.perf_counter()
+    listener.start()
+    logging_config.shutdown_logging()
+    drain_us = (time.perf_counter() - drain_start) / (args.requests * args.lines) * 1e6
+
+    print(f"{args.lines} lines per request, {args.requests} requests")
+    print(f"{'mode':>12} {'us/request':>11} {'vs print':>9}")
+    for mode, us in results.items():
+        print(f"{mode:>12} {us:>11.2f} {results['print'] / us:>8.1f}x")
+    print(f"listener thread: {drain_us:.2f}us per record to format and write, off the request path")
+
+if __name__ == "__main__":
+    main()
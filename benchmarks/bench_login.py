@@ -0,0 +1,133 @@
+"""
+Concurrent login benchmark.
+
+Fires a storm of concurrent client logins in-process and, at the same time,
+probes a cheap endpoint (GET /) to show whether the event loop stays
+responsive. Reports logins per second, login latency and probe latency:
+
+  pool     bcrypt on the hashing thread pool (the app as shipped)
+  inline   bcrypt called directly in the async handler, as before; every
+           hash stalls all other requests on the worker
+
+Uses BCRYPT_ROUNDS (default 12) for the test accounts. Needs DATABASE_URL
+pointing at a migrated database; accounts are created on first run and
+reused.
+
+Usage: python -m benchmarks.bench_login [--logins 40] [--concurrency 20] [--mode pool|inline|both]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("OUTBOX_RELAY_ENABLED", "false")
+os.environ.setdefault("JOB_EVENTS_LISTEN", "false")
+# The storm comes from one address, and would be throttled after 20 logins
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+PASSWORD = "Bench-Login-Passw0rd!"
+
+def ensure_accounts(count: int) -> list:
+    from app.core.security import hash_password
+    from app.database.db import SessionLocal
+    from app.models.client import Client
+
+    emails = [f"bench-login-{i}@example.com" for i in range(count)]
+    db = SessionLocal()
+    try:
+        existing = {c.email for c in db.query(Client).filter(Client.email.in_(emails))}
+        missing = [email for email in emails if email not in existing]
+        if missing:
+            password = hash_password(PASSWORD)
+            db.add_all(Client(email=email, password=password, full_name="Bench Login", is_verified=True) for email in missing)
+            db.commit()
+    finally:
+        db.close()
+    return emails
+
+def use_inline_bcrypt():
+    """Swap the login path back to calling passlib on the event loop"""
+    from app.core.security import pwd_context
+    from app.routers import auth
+
+    async def inline(plain_password, hashed_password):
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+    original = auth.verify_and_update_password
+    auth.verify_and_update_password = inline
+    return lambda: setattr(auth, "verify_and_update_password", original)
+
+async def storm(client, emails: list, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    login_times, probe_times, statuses = [], [], []
+    done = asyncio.Event()
+
+    async def login(email):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/auth/login/client", json={"email": email, "password": PASSWORD})
+            login_times.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/")
+            probe_times.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login(emails[i % len(emails)]) for i in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+
+    def pct(values, q):
+        return statistics.quantiles(values, n=100, method="inclusive")[q - 1] * 1000 if len(values) > 1 else values[0] * 1000
+
+    return {
+        "logins_per_s": logins / elapsed,
+        "ok": statuses.count(200),
+        "errors": len(statuses) - statuses.count(200),
+        "login_p50": pct(login_times, 50),
+        "login_p95": pct(login_times, 95),
+        "probe_p50": pct(probe_times, 50),
+        "probe_max": max(probe_times) * 1000,
+    }
+
+async def run(args):
+    import httpx
+    import main
+    from app.core.security import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+
+    emails = await asyncio.to_thread(ensure_accounts, min(args.logins, 50))
+    modes = ["pool", "inline"] if args.mode == "both" else [args.mode]
+    print(f"bcrypt rounds {BCRYPT_ROUNDS}, hashing threads {PASSWORD_HASH_WORKERS}, "
+          f"{args.logins} logins at concurrency {args.concurrency}\n")
+    print(f"{'mode':<8} {'logins/s':>9} {'ok':>4} {'err':>4} {'login p50':>10} {'login p95':>10} {'probe p50':>10} {'probe max':>10}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/api/auth/login/client", json={"email": emails[0], "password": PASSWORD})  # warm-up
+        for mode in modes:
+            restore = use_inline_bcrypt() if mode == "inline" else None
+            try:
+                r = await storm(client, emails, args.logins, args.concurrency)
+            finally:
+                if restore:
+                    restore()
+            print(f"{mode:<8} {r['logins_per_s']:>9.1f} {r['ok']:>4} {r['errors']:>4} {r['login_p50']:>8.0f}ms "
+                  f"{r['login_p95']:>8.0f}ms {r['probe_p50']:>8.1f}ms {r['probe_max']:>8.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mode", choices=("pool", "inline", "both"), default="both")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Connection pool exhaustion check.
+
+Runs the app in-process with a deliberately small pool and:
+
+  1. saturation - more concurrent requests than connections; reports the
+     checkout wait (db_pool_checkout_wait_seconds) and that every request
+     still succeeds once a connection frees up
+  2. exhaustion - every connection held elsewhere for longer than
+     DB_POOL_TIMEOUT; the request must get a 503 with Retry-After (not a
+     500 or a hang), be counted in db_pool_timeouts_total, and the app must
+     recover as soon as the connections are released
+
+Exits non-zero if any expectation fails. Needs DATABASE_URL pointing at a
+migrated, seeded database (`python -m app.cli setup`).
+
+Usage: python -m benchmarks.bench_pool [--pool-size 2] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+def configure(args):
+    # Before any app import: the engine reads these once
+    os.environ["DB_POOL_MODE"] = "queue"
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = "0"
+    os.environ["DB_POOL_TIMEOUT"] = str(args.timeout)
+    os.environ["METRICS_ENABLED"] = "true"
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ.setdefault("OUTBOX_RELAY_ENABLED", "false")
+    os.environ.setdefault("JOB_EVENTS_LISTEN", "false")
+
+async def saturation(client, concurrency: int) -> list:
+    from app.core.metrics import POOL_CHECKOUT_WAIT
+
+    before = POOL_CHECKOUT_WAIT._values.get((), [0] * (len(POOL_CHECKOUT_WAIT.buckets) + 2))[-1]
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.get("/api/urgency-levels") for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    series = POOL_CHECKOUT_WAIT._values[()]
+    checkouts = series[-1] - before
+    statuses = sorted({r.status_code for r in responses})
+    print(f"saturation: {concurrency} requests in {elapsed * 1000:.0f} ms, statuses {statuses}, "
+          f"{checkouts} checkouts, mean wait {series[-2] / series[-1] * 1000:.1f} ms")
+    return [] if statuses == [200] else [f"saturation returned {statuses}, expected only 200"]
+
+async def exhaustion(client, pool_size: int, timeout: float) -> list:
+    from app.core.metrics import POOL_TIMEOUTS
+    from app.database.db import engine
+
+    problems = []
+    held = [engine.connect() for _ in range(pool_size)]
+    try:
+        start = time.perf_counter()
+        response = await client.get("/api/urgency-levels")
+        waited = time.perf_counter() - start
+        print(f"exhaustion: {response.status_code} after {waited * 1000:.0f} ms, "
+              f"Retry-After={response.headers.get('retry-after')}, timeouts={POOL_TIMEOUTS._values.get((), 0)}")
+        if response.status_code != 503:
+            problems.append(f"exhausted pool returned {response.status_code}, expected 503")
+        if "retry-after" not in response.headers:
+            problems.append("503 without Retry-After")
+        if waited > timeout + 2:
+            problems.append(f"503 took {waited:.1f}s, DB_POOL_TIMEOUT is {timeout}s")
+        if not POOL_TIMEOUTS._values.get(()):
+            problems.append("db_pool_timeouts_total was not incremented")
+    finally:
+        for connection in held:
+            connection.close()
+
+    response = await client.get("/api/urgency-levels")
+    print(f"recovery: {response.status_code}")
+    if response.status_code != 200:
+        problems.append(f"after releasing the pool the app returned {response.status_code}")
+    return problems
+
+async def run(args) -> list:
+    import httpx
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        problems = await saturation(client, args.concurrency)
+        problems += await exhaustion(client, args.pool_size, args.timeout)
+        metrics = await client.get("/metrics")
+        for line in metrics.text.splitlines():
+            if line.startswith(("db_pool_saturation", "db_pool_checked_out", "db_pool_timeouts_total")):
+                print(f"  {line}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=0.5, help="DB_POOL_TIMEOUT for the run")
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    configure(args)
+
+    problems = asyncio.run(run(args))
+    for problem in problems:
+        print(f"FAIL {problem}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+In-process stand-ins for the external services the client API calls, so the
+load benchmarks measure this service rather than Stripe, SMTP, S3 or the
+geocoder. Each fake can add a fixed latency to mimic a network round trip.
+"""
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+class FakeStripe:
+    """Replaces the Stripe Checkout calls used by app.core.payment"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sessions = {}
+        self._originals = []
+
+    def _create_session(self, **kwargs):
+        time.sleep(self.latency)
+        session_id = f"cs_fake_{uuid.uuid4().hex}"
+        session = SimpleNamespace(
+            id=session_id,
+            url=f"https://checkout.stripe.fake/{session_id}",
+            payment_intent=f"pi_fake_{uuid.uuid4().hex}",
+            metadata=kwargs.get("metadata", {}),
+        )
+        self.sessions[session_id] = session
+        return session
+
+    def _retrieve_session(self, session_id, **kwargs):
+        time.sleep(self.latency)
+        return self.sessions[session_id]
+
+    def install(self):
+        import stripe
+
+        for owner, name, fake in (
+            (stripe.checkout.Session, "create", self._create_session),
+            (stripe.checkout.Session, "retrieve", self._retrieve_session),
+        ):
+            self._originals.append((owner, name, owner.__dict__[name]))
+            setattr(owner, name, fake)
+        return self
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+
+    @staticmethod
+    def session_id_from_url(checkout_url: str) -> str:
+        return checkout_url.rsplit("/", 1)[-1]
+
+class FakeSMTP:
+    """Drop-in for smtplib.SMTP that keeps every message in memory"""
+
+    latency = 0.0
+    outbox = {}  # recipient -> list of message bodies
+    _lock = threading.Lock()
+
+    def __init__(self, host="", port=0, timeout=None, **kwargs):
+        time.sleep(self.latency)
+
+    def starttls(self, *args, **kwargs):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg):
+        body = msg.get_payload()[0].get_payload() if msg.is_multipart() else msg.get_payload()
+        with self._lock:
+            self.outbox.setdefault(msg["To"], []).append(body)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+    @classmethod
+    def last_otp(cls, recipient: str) -> str:
+        with cls._lock:
+            body = cls.outbox[recipient][-1]
+        return re.search(r"\b(\d{6})\b", body).group(1)
+
+def install_fake_smtp(latency: float = 0.0):
+    import os
+    import smtplib
+
+    FakeSMTP.latency = latency
+    # email.py skips sending entirely unless these are set
+    os.environ.setdefault("SMTP_USER", "bench@example.com")
+    os.environ.setdefault("SMTP_PASSWORD", "bench")
+    smtplib.SMTP = FakeSMTP
+    return FakeSMTP
+
+def install_fake_s3(storage, latency: float = 0.0):
+    """
+    Point the storage singleton at S3. Uses moto when installed; otherwise a
+    minimal in-memory client covering put/get/delete_object.
+    Returns a context to stop when done (or None).
+    """
+    bucket = storage.bucket_name or "bench-bucket"
+    storage.bucket_name = bucket
+    storage.endpoint_url = storage.endpoint_url or "https://s3.fake"
+    try:
+        import boto3
+        from moto import mock_aws
+    except ImportError:
+        storage.s3_client = _MemoryS3(latency)
+        return None
+
+    mock = mock_aws()
+    mock.start()
+    client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="bench", aws_secret_access_key="bench")
+    client.create_bucket(Bucket=bucket)
+    storage.s3_client = _Delayed(client, latency) if latency else client
+    return mock
+
+class _Delayed:
+    def __init__(self, client, latency: float):
+        self._client, self._latency = client, latency
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency)
+            return attr(*args, **kwargs)
+        return call
+
+class _MemoryS3:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        time.sleep(self.latency)
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.read()
+        return {}
+
+    def get_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        data = self.objects[(Bucket, Key)]
+        return {"Body": SimpleNamespace(read=lambda: data)}
+
+    def delete_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        self.objects.pop((Bucket, Key), None)
+        return {}
+
+def fake_geocoder(coordinates=(51.5074, -0.1278)):
+    def geocode_address(address: str):
+        return coordinates
+    return geocode_address
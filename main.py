@@ -1,9 +1,20 @@
 #test
-from fastapi import FastAPI
+import time
+
+BOOT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+import logging
+
+# Configure logging before anything below logs at import time
+from app.core.logging_config import setup_logging
+setup_logging()
+logger = logging.getLogger("main")
 
 # CRITICAL: Import ALL models BEFORE any database operations
 from app.models.client import Client
@@ -12,14 +23,23 @@ from app.models.service_type import ServiceType
 from app.models.waste_type import WasteType
 from app.models.access_difficulty import AccessDifficulty
 from app.models.job import Job
+from app.models.job_draft import JobDraft
+from app.models.job_media import JobMedia
 from app.models.invoice import Invoice
 from app.models.payment import Payment
+from app.models.crew_rating import CrewRating
+from app.models.outbox_event import OutboxEvent
+from app.models.rate_card import RateCard
+from app.models.rate_limit_bucket import RateLimitBucket
+from app.models.idempotency_key import IdempotencyKey
 
 # Import database AFTER models are loaded
-from app.database.db import init_db, engine, Base
+from app.database.db import engine
 
 # Import routers last
-from app.routers import auth, job, urgency_level, invoice, job_draft, pricing, service_type, waste_type, access_difficulty, payment
+from app.routers import auth, job, urgency_level, invoice, job_draft, pricing, service_type, waste_type, access_difficulty, payment, metrics
+from app.core.metrics import METRICS_ENABLED, MetricsMiddleware, WORKER_STARTUP, instrument_engine
+from app.core.rate_limit import RATE_LIMIT_ENABLED, RateLimitMiddleware
 
 app = FastAPI(
     title="Emergency Property Clearance API",
@@ -27,6 +47,10 @@ app = FastAPI(
     description="FastAPI backend for UK-based Emergency Property Clearance & Operations platform"
 )
 
+if RATE_LIMIT_ENABLED:
+    # Added before CORS so CORS wraps it and browsers can read the 429
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -44,8 +68,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "Retry-After", "Idempotent-Replayed"],
 )
 
+if METRICS_ENABLED:
+    # Added after CORS so it wraps it and times the whole request
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    app.include_router(metrics.router)
+
 app.include_router(auth.router, prefix="/api/auth")
 app.include_router(job_draft.router)
 app.include_router(job.router, prefix="/api")
@@ -57,103 +88,47 @@ app.include_router(invoice.router, prefix="/api")
 app.include_router(pricing.router, prefix="/api")
 app.include_router(payment.router, prefix="/api")
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_exhausted(request: Request, exc: PoolTimeoutError):
+    # Every connection stayed busy for DB_POOL_TIMEOUT; ask the client to back off rather than 500
+    logger.warning("Connection pool exhausted: %s %s", request.method, request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service is busy, please retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
 # Mount static files AFTER all routers to avoid conflicts
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.on_event("startup")
-def startup():
-    try:
-        print(f"🔍 Registered tables: {list(Base.metadata.tables.keys())}")
-        
-        with engine.connect() as conn:
-            # Check which database we're connected to
-            db_name = conn.execute(text("SELECT current_database()")).scalar()
-            print(f"📊 Connected to database: {db_name}")
-            
-            # Check if clients table exists
-            result = conn.execute(text(
-                "SELECT EXISTS (SELECT FROM information_schema.tables "
-                "WHERE table_schema = 'public' AND table_name = 'clients')"
-            ))
-            table_exists = result.scalar()
-            print(f"🔍 Clients table exists: {table_exists}")
-            
-        print("✅ Database connected")
-        
-        init_db()
-        print("✅ Tables created")
-        
-        # Verify clients table exists
-        with engine.connect() as conn:
-            result = conn.execute(text(
-                "SELECT table_name FROM information_schema.tables "
-                "WHERE table_schema = 'public' AND table_name = 'clients'"
-            ))
-            if result.fetchone():
-                print("✅ Clients table verified")
-            else:
-                print("⚠️ Clients table NOT found!")
-        
-        # Add default services
-        from sqlalchemy.orm import Session
-        db = Session(bind=engine)
-        try:
-            # Add service types
-            if db.query(ServiceType).count() == 0:
-                service_types = [
-                    ServiceType(name="Emergency Clearance", description="Urgent same-day service"),
-                    ServiceType(name="House Clearance", description="Full property clearance"),
-                    ServiceType(name="Office Clearance", description="Commercial spaces"),
-                    ServiceType(name="Garden Clearance", description="Outdoor waste removal")
-                ]
-                db.add_all(service_types)
-                db.commit()
-                print("✅ Service types added")
-            
-            # Add waste types
-            if db.query(WasteType).count() == 0:
-                waste_types = [
-                    WasteType(name="General waste", description="Household items"),
-                    WasteType(name="Furniture/appliances", description="Large items"),
-                    WasteType(name="Garden waste", description="Green waste"),
-                    WasteType(name="Construction waste", description="Building materials"),
-                    WasteType(name="Hazardous waste", description="Special handling"),
-                    WasteType(name="Electronic waste", description="WEEE items")
-                ]
-                db.add_all(waste_types)
-                db.commit()
-                print("✅ Waste types added")
-            
-            # Add access difficulties
-            if db.query(AccessDifficulty).count() == 0:
-                access_difficulties = [
-                    AccessDifficulty(name="Ground floor", description="Easy access"),
-                    AccessDifficulty(name="Stairs (no lift)", description="Manual carrying"),
-                    AccessDifficulty(name="Restricted parking", description="Limited vehicle access"),
-                    AccessDifficulty(name="Long carry distance", description="Extended walking")
-                ]
-                db.add_all(access_difficulties)
-                db.commit()
-                print("✅ Access difficulties added")
-            
-            # Add urgency levels
-            if db.query(UrgencyLevel).count() == 0:
-                urgency_levels = [
-                    UrgencyLevel(name="Standard", sla_hours=72),
-                    UrgencyLevel(name="Urgent", sla_hours=48),
-                    UrgencyLevel(name="Emergency", sla_hours=24)
-                ]
-                db.add_all(urgency_levels)
-                db.commit()
-                print("✅ Urgency levels added")
-        except Exception as data_error:
-            print(f"⚠️ Data initialization failed: {data_error}")
-        finally:
-            db.close()
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
-        import traceback
-        traceback.print_exc()
+async def start_background_tasks():
+    # Schema and reference data are handled by `python -m app.cli setup` (the
+    # release step), so booting a worker does no database work of its own
+    from app.core.events import listener
+    from app.core.maintenance import worker as maintenance
+    from app.core.outbox import relay
+    from app.core.pricing import reloader
+    # Registers its NOTIFY channel, so it must start before the listener connects
+    reloader.start()
+    listener.start()
+    relay.start()
+    maintenance.start()
+
+    boot_seconds = time.perf_counter() - BOOT_STARTED
+    WORKER_STARTUP.observe(boot_seconds)
+    logger.info("Worker ready in %.0f ms", boot_seconds * 1000)
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    from app.core.events import listener
+    from app.core.maintenance import worker as maintenance
+    from app.core.outbox import relay
+    from app.core.pricing import reloader
+    await listener.stop()
+    await relay.stop()
+    await maintenance.stop()
+    await reloader.stop()
 
 @app.get("/")
 def root():
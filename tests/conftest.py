@@ -0,0 +1,17 @@
+import os
+import pytest
+
+# Captured before the placeholder below: only a real database enables the Postgres tests
+POSTGRES_URL = os.getenv("DATABASE_URL", "")
+# app.database.db refuses to import without a URL; unit tests never connect with it
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unused")
+# Lets app.core.security sign test tokens with its built-in keys
+os.environ.setdefault("APP_ENV", "development")
+
+@pytest.fixture(scope="session")
+def postgres_engine():
+    """The app's engine, for tests that need a migrated Postgres database (skipped without DATABASE_URL)"""
+    if not POSTGRES_URL.startswith("postgres"):
+        pytest.skip("DATABASE_URL is not set to a Postgres database")
+    from app.database.db import engine
+    return engine
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import app.models.invoice  # noqa: F401  (Client.invoices needs the Invoice mapper)
+from app.models.client import Client
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Client.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Client(email="sam@example.com", password="x", phone_number="07700 900123"),
+        Client(email="alex@example.com", password="x", phone_number="+44 7700 900456"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.fixture
+def statements(db):
+    """SQL sent by `db` from here on"""
+    sent = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: sent.append(args[2]))
+    return sent
+
+@pytest.mark.parametrize("identifier, email", [
+    ("sam@example.com", "sam@example.com"),
+    ("+447700900123", "sam@example.com"),
+    ("07700-900-456", "alex@example.com"),
+    ("0044 7700 900456", "alex@example.com"),
+])
+def test_resolve_takes_one_statement(db, statements, identifier, email):
+    assert Client.resolve(db, identifier).email == email
+    assert len(statements) == 1
+
+@pytest.mark.parametrize("identifier", ["nobody@example.com", "07700 900999"])
+def test_unknown_identifier_takes_one_statement(db, statements, identifier):
+    assert Client.resolve(db, identifier) is None
+    assert len(statements) == 1
+
+def test_empty_identifier_takes_no_statement(db, statements):
+    assert Client.resolve(db, "") is None
+    assert statements == []
+
+def test_phone_numbers_are_stored_normalized(db):
+    assert {client.phone_number for client in db.query(Client)} == {"+447700900123", "+447700900456"}
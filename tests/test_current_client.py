@@ -0,0 +1,74 @@
+import uuid
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import app.models.invoice  # noqa: F401  (Client.invoices needs the Invoice mapper)
+from app.core import current_client
+from app.core.current_client import ClientCache, _snapshot
+from app.models.client import Client
+
+def values(client_id, email="sam@example.com"):
+    return {"id": client_id, "email": email}
+
+def test_invalidate_drops_every_subject_of_the_client_only():
+    cache = ClientCache(ttl=60)
+    sam, alex = uuid.uuid4(), uuid.uuid4()
+    cache.put(str(sam), values(sam), cache.generation())
+    cache.put("sam@example.com", values(sam), cache.generation())  # legacy email subject
+    cache.put(str(alex), values(alex, "alex@example.com"), cache.generation())
+
+    cache.invalidate(sam)
+
+    assert cache.get(str(sam)) is None
+    assert cache.get("sam@example.com") is None
+    assert cache.get(str(alex)) == values(alex, "alex@example.com")
+
+def test_lookup_that_raced_an_invalidation_is_not_cached():
+    cache = ClientCache(ttl=60)
+    sam = uuid.uuid4()
+    generation = cache.generation()  # lookup starts, reads the row...
+    cache.invalidate(sam)            # ...while a profile write lands
+    cache.put(str(sam), values(sam), generation)
+    assert cache.get(str(sam)) is None
+
+    cache.put(str(sam), values(sam), cache.generation())
+    assert cache.get(str(sam)) == values(sam)
+
+def test_races_are_still_caught_once_the_invalidation_record_is_evicted():
+    cache = ClientCache(ttl=60, max_size=2)
+    sam = uuid.uuid4()
+    generation = cache.generation()
+    cache.invalidate(sam)
+    for _ in range(3):
+        cache.invalidate(uuid.uuid4())
+    cache.put(str(sam), values(sam), generation)
+    assert cache.get(str(sam)) is None
+
+def test_lru_eviction_keeps_the_index_in_step():
+    cache = ClientCache(ttl=60, max_size=2)
+    ids = [uuid.uuid4() for _ in range(3)]
+    for client_id in ids:
+        cache.put(str(client_id), values(client_id), cache.generation())
+    assert cache.get(str(ids[0])) is None
+    cache.invalidate(ids[0])
+    cache.invalidate(ids[1])
+    assert cache.get(str(ids[1])) is None
+    assert cache.get(str(ids[2])) == values(ids[2])
+
+def test_write_is_evicted_again_when_it_commits(monkeypatch):
+    cache = ClientCache(ttl=60)
+    monkeypatch.setattr(current_client, "cache", cache)
+    engine = create_engine("sqlite://")
+    Client.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    client = Client(email="sam@example.com", password="x", full_name="Sam")
+    db.add(client)
+    db.commit()
+    subject, before = str(client.id), _snapshot(client)
+
+    client.full_name = "Sam Client"
+    db.flush()
+    # A lookup between the flush and the commit still reads the committed row
+    cache.put(subject, before, cache.generation())
+    assert cache.get(subject)["full_name"] == "Sam"
+    db.commit()
+    assert cache.get(subject) is None
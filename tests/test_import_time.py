@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Loaded on first use (app/core/lazy.py); importing any of them at startup costs every worker boot
+LAZY_MODULES = ("stripe", "reportlab", "boto3", "geopy", "twilio")
+
+def test_startup_does_not_import_lazy_integrations():
+    child = "import sys, main; print(','.join(sorted({name.split('.')[0] for name in sys.modules})))"
+    proc = subprocess.run(
+        [sys.executable, "-c", child], cwd=ROOT, env=dict(os.environ), capture_output=True, text=True, check=True
+    )
+    loaded = set(proc.stdout.strip().splitlines()[-1].split(","))
+    assert loaded.isdisjoint(LAZY_MODULES), f"imported at startup: {sorted(loaded & set(LAZY_MODULES))}"
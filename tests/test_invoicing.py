@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+import pytest
+from app.core import invoicing
+from app.models.invoice import Invoice
+from app.models.job import Job
+
+class FakeQuery:
+    def __init__(self, result):
+        self.result = result
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.result
+
+class FakeSession:
+    def __init__(self, job):
+        self.rows = {Invoice: None, Job: job}
+        self.executed = []
+
+    def query(self, model):
+        return FakeQuery(self.rows[model])
+
+    def execute(self, statement):
+        self.executed.append(statement)
+
+def test_failed_pdf_upload_raises_before_the_insert(monkeypatch):
+    monkeypatch.setattr(invoicing.storage, "upload_file", lambda data, folder, filename: None)
+    db = FakeSession(SimpleNamespace(quote_amount=300.0, deposit_amount=60.0))
+    client = SimpleNamespace(id="client-1", full_name="Sam Client", email="sam@example.com")
+
+    # The outbox only redelivers events whose handler raised
+    with pytest.raises(RuntimeError):
+        invoicing.generate_paid_invoice(db, "job-1", client)
+    assert db.executed == []
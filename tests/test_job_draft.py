@@ -0,0 +1,7 @@
+from fastapi.testclient import TestClient
+import main
+
+def test_anonymous_drafts_cannot_be_listed():
+    # Drafts hold addresses and anyone can create one; each is read by its own id only
+    response = TestClient(main.app).get("/api/jobs/")
+    assert response.status_code == 405
@@ -0,0 +1,25 @@
+import pytest
+from app.core import metrics
+
+BEARER = {b"authorization": b"Bearer s3cret"}
+
+def test_metrics_refused_without_a_configured_token(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", None)
+    assert not metrics.authorized({})
+    assert not metrics.authorized(BEARER)
+
+def test_metrics_need_the_configured_token(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "s3cret")
+    assert metrics.authorized(BEARER)
+    assert not metrics.authorized({b"authorization": b"Bearer guess"})
+    assert not metrics.authorized({})
+
+@pytest.mark.parametrize("token, header, expected", [
+    (None, b"1", False),
+    (None, b"", False),
+    ("s3cret", b"1", False),
+    ("s3cret", b"s3cret", True),
+])
+def test_profiling_needs_the_configured_token(monkeypatch, token, header, expected):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", token)
+    assert metrics.profile_requested({metrics.PROFILE_HEADER: header}) is expected
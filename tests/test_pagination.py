@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from sqlalchemy import Column, DateTime, Index, String, create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker
+from app.core.pagination import encode_cursor, paginate
+
+Base = declarative_base()
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(String, primary_key=True)
+    sorted_at = Column(DateTime, nullable=True)
+
+    # What ix_jobs_client_created and friends are to the real list endpoints
+    __table_args__ = (Index("ix_rows_sorted_at_id", "sorted_at", "id"),)
+
+def session_with(rows):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(rows)
+    db.commit()
+    return db
+
+def walk(db, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor = paginate(db.query(Row), Row.sorted_at, Row.id, cursor, limit)
+        seen.extend(row.id for row in page)
+        if cursor is None:
+            return seen
+
+def test_null_sort_values_cross_page_boundaries():
+    start = datetime(2026, 1, 1)
+    rows = [Row(id=f"d{i}", sorted_at=start + timedelta(days=i)) for i in range(3)]
+    rows += [Row(id=f"n{i}", sorted_at=None) for i in range(4)]
+    db = session_with(rows)
+
+    # Pages end inside the NULL head, on its last row, and on dated rows
+    for limit in (1, 2, 3, 4, 5):
+        assert walk(db, limit) == ["n3", "n2", "n1", "n0", "d2", "d1", "d0"]
+
+def test_all_null_sort_values():
+    db = session_with([Row(id=f"n{i}", sorted_at=None) for i in range(5)])
+    assert walk(db, 2) == ["n4", "n3", "n2", "n1", "n0"]
+
+def test_without_limit_every_row_is_returned():
+    start = datetime(2026, 1, 1)
+    db = session_with([Row(id=f"d{i}", sorted_at=start + timedelta(days=i)) for i in range(120)])
+    rows, cursor = paginate(db.query(Row), Row.sorted_at, Row.id, None, None)
+    assert len(rows) == 120
+    assert cursor is None
+
+def page_cost(total_rows, limit=20):
+    """(statements, SQLite VM steps) to fetch the page in the middle of `total_rows` rows"""
+    start = datetime(2026, 1, 1)
+    db = session_with([])
+    db.execute(Row.__table__.insert(), [
+        {"id": f"r{i:06d}", "sorted_at": start + timedelta(minutes=i)} for i in range(total_rows)
+    ])
+    db.commit()
+    middle = encode_cursor(start + timedelta(minutes=total_rows // 2), f"r{total_rows // 2:06d}")
+
+    statements, steps = [], [0]
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    connection.connection.dbapi_connection.set_progress_handler(lambda: steps.__setitem__(0, steps[0] + 1), 1)
+    rows, _ = paginate(db.query(Row), Row.sorted_at, Row.id, middle, limit)
+    assert len(rows) == limit
+    return len(statements), steps[0]
+
+def test_page_cost_does_not_grow_with_the_table():
+    # A scan or sort would make the larger table's page cost ~20x as much
+    assert page_cost(1_000) == page_cost(20_000)
+    assert page_cost(1_000)[0] == 1
@@ -0,0 +1,21 @@
+import pytest
+from app.core.phone import normalize_phone
+
+@pytest.mark.parametrize("typed, expected", [
+    ("07700 900123", "+447700900123"),          # national, leading 0
+    ("447700900123", "+447700900123"),          # country code without +
+    ("+44 7700-900-123", "+447700900123"),      # spaces and dashes
+    ("(07700) 900.123", "+447700900123"),       # brackets and dots
+    ("00447700900123", "+447700900123"),        # international 00 prefix
+    ("+44 (0)7700 900123", "+447700900123"),    # trunk 0 kept after the country code
+    ("+1 415 555 0100", "+14155550100"),        # other countries are left as they are
+])
+def test_normalizes_to_e164(typed, expected):
+    assert normalize_phone(typed) == expected
+
+@pytest.mark.parametrize("typed", [None, "", "   ", "not a number", "sam@example.com", "+44", "0", "+0447700900123", "+4477009001234567"])
+def test_rejects_what_is_not_a_phone_number(typed):
+    assert normalize_phone(typed) is None
+
+def test_national_numbers_use_the_given_country_code():
+    assert normalize_phone("0612345678", country_code="33") == "+33612345678"
@@ -0,0 +1,36 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import main
+from app.database.db import get_db
+
+@pytest.fixture
+def exhausted_pool(tmp_path):
+    """get_db sessions on a one-connection pool whose connection is held elsewhere"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    held = engine.connect()
+    session_factory = sessionmaker(bind=engine)
+
+    def override():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[get_db] = override
+    yield
+    del main.app.dependency_overrides[get_db]
+    held.close()
+    engine.dispose()
+
+def test_exhausted_pool_answers_503_with_retry_after(exhausted_pool):
+    # No `with`: the startup hook (listener, relay, maintenance) needs a real database
+    response = TestClient(main.app).get("/api/urgency-levels")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"detail": "Service is busy, please retry shortly"}
@@ -0,0 +1,18 @@
+import asyncio
+import json
+from app.core.pricing import PRICING_RULES_PATH, PricingEngine
+from app.routers import pricing
+
+def test_estimate_breakdown_comes_from_the_active_rate_card(monkeypatch):
+    with open(PRICING_RULES_PATH) as f:
+        rules = json.load(f)
+    rules.update(base_price=275, minimum_price=400)
+    engine = PricingEngine(rules, version="7")
+    monkeypatch.setattr(pricing, "get_engine", lambda: engine)
+
+    body = asyncio.run(pricing.estimate_price(pricing.PriceEstimateRequest(van_loads=2)))
+
+    assert body["rate_card_version"] == "7"
+    assert body["estimated_price"] == engine.price(**pricing.PriceEstimateRequest(van_loads=2).model_dump())
+    assert body["breakdown"]["base_callout"] == 275.0
+    assert body["breakdown"]["minimum_charge"] == 400.0
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from app.core.rate_limit import MemoryStore, RateLimitMiddleware, RULES, client_ip
+
+LOGIN = RULES[("POST", "/api/auth/login/client")]
+
+def scope(peer: str, forwarded=None) -> dict:
+    headers = [(b"content-type", b"application/json")]
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    return {
+        "type": "http", "method": "POST", "path": "/api/auth/login/client",
+        "client": (peer, 50000), "headers": headers,
+    }
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+def call(middleware, request_scope, email: str) -> int:
+    body = json.dumps({"email": email, "password": "x"}).encode()
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(request_scope, receive, send))
+    return sent[0]["status"]
+
+def test_forwarded_for_ignored_without_trusted_proxies():
+    assert client_ip(scope("203.0.113.7", "198.51.100.1"), proxy_hops=0) == "203.0.113.7"
+
+def test_spoofed_forwarded_for_does_not_change_bucket_key():
+    # Behind one trusted proxy the router appends the real peer; anything to its left is client-supplied
+    real = client_ip(scope("10.0.0.2", "203.0.113.7"), proxy_hops=1)
+    spoofed = client_ip(scope("10.0.0.2", "1.2.3.4, 5.6.7.8, 203.0.113.7"), proxy_hops=1)
+    assert real == spoofed == "203.0.113.7"
+
+def test_rotating_spoofed_forwarded_for_is_still_limited():
+    middleware = RateLimitMiddleware(ok_app, store=MemoryStore())
+    ip_limit = LOGIN.limits[0].capacity
+    statuses = [
+        call(middleware, scope("203.0.113.7", f"198.51.100.{i}"), f"user{i}@example.com")
+        for i in range(ip_limit + 1)
+    ]
+    assert statuses[:-1] == [200] * ip_limit
+    assert statuses[-1] == 429
+
+def test_refused_request_does_not_drain_other_buckets():
+    store = MemoryStore()
+    middleware = RateLimitMiddleware(ok_app, store=store)
+    ip_limit, identifier_limit = (limit.capacity for limit in LOGIN.limits)
+    # Empty the attacker's IP bucket on throwaway identifiers
+    for i in range(ip_limit):
+        assert call(middleware, scope("203.0.113.66"), f"throwaway{i}@example.com") == 200
+    # Refused on the IP bucket, so the victim's identifier bucket is left alone
+    for _ in range(identifier_limit * 2):
+        assert call(middleware, scope("203.0.113.66"), "victim@example.com") == 429
+    assert all(
+        call(middleware, scope(f"192.0.2.{i}"), "victim@example.com") == 200
+        for i in range(identifier_limit)
+    )
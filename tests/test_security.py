@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def import_security(**env):
+    """Exit status and stderr of importing app.core.security in a fresh interpreter with `env`"""
+    child_env = {k: v for k, v in os.environ.items() if k not in ("APP_ENV", "SECRET_KEY", "REFRESH_SECRET_KEY")}
+    child_env.update(env)
+    proc = subprocess.run(
+        [sys.executable, "-c", "import app.core.security"], cwd=ROOT, env=child_env, capture_output=True, text=True
+    )
+    return proc.returncode, proc.stderr
+
+@pytest.mark.parametrize("env", [
+    {},
+    {"SECRET_KEY": "your-secret-key-change-in-production", "REFRESH_SECRET_KEY": "your-refresh-secret-key-change-in-production"},
+    {"SECRET_KEY": "a-private-key"},
+    {"APP_ENV": "staging", "REFRESH_SECRET_KEY": "a-private-key"},
+])
+def test_refuses_public_keys_outside_development(env):
+    status, stderr = import_security(**env)
+    assert status != 0
+    assert "SECRET_KEY and REFRESH_SECRET_KEY must be set" in stderr
+
+def test_private_keys_are_accepted():
+    assert import_security(SECRET_KEY="a-private-key", REFRESH_SECRET_KEY="another-private-key")[0] == 0
+
+def test_development_may_use_the_built_in_keys():
+    assert import_security(APP_ENV="development")[0] == 0